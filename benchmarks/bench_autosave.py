@@ -0,0 +1,43 @@
+"""Main-thread pause of an autosave against a blocking save_game, over a few turns of play.
+
+Run from the repository root with: python -m benchmarks.bench_autosave
+"""
+import os
+import tempfile
+import time
+from benchmarks.bench_saves import WORLDS, play
+from src.autosave import Autosaver
+from src.colors import Colors
+from src.game import Game
+from src.savegame import save_game
+
+SAVES = 20
+COMMANDS = ["move north", "move east", "move south", "move west", "look"]
+
+def take_turns(game, colors, turn):
+    game.player.current_room.enemies = []
+    for command in COMMANDS:
+        game.handle_command(command, colors)
+    # Change a few rooms so every save has new contents
+    grid = game.player.current_strata.grid
+    for position in list(grid)[turn::len(grid) // 5][:5]:
+        grid[position].touch()
+
+if __name__ == "__main__":
+    colors = Colors()
+    print(f"{'world':>7} {'blocking save (ms)':>19} {'autosave pause (ms)':>20} {'max pause (ms)':>15} {'written':>8} {'skipped':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, world_options in WORLDS.items():
+            game = Game(seed=1, world_options=world_options)
+            play(game)
+            blocking = []
+            autosaver = Autosaver(os.path.join(directory, f"{name}_autosave.sav"))
+            for turn in range(SAVES):
+                take_turns(game, colors, turn)
+                start = time.perf_counter()
+                save_game(game, os.path.join(directory, f"{name}.sav"))
+                blocking.append(time.perf_counter() - start)
+                autosaver.save(game)
+            autosaver.close()
+            stats = autosaver.stats()
+            print(f"{name:>7} {1000 * sum(blocking) / SAVES:>19.2f} {stats['mean_pause_ms']:>20.2f} {stats['max_pause_ms']:>15.2f} {stats['written']:>8} {stats['skipped']:>8}")
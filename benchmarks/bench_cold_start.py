@@ -0,0 +1,36 @@
+"""Cold start of the headless and GUI entry points, each in a fresh interpreter.
+
+The headless case runs main.py --headless on a two-command script (start, look and
+quit on a new seeded world). The GUI cases import gui, which is what main.py started
+with before headless runs existed; opening the window needs a display and is left out.
+The best of REPEATS runs is reported.
+
+Run from the repository root with: python -m benchmarks.bench_cold_start
+"""
+import subprocess
+import sys
+import time
+
+REPEATS = 20
+SCRIPT = "look\nquit\n"
+
+CASES = [
+    ("interpreter only", ["-c", "pass"], None),
+    ("import src.headless", ["-c", "import src.headless"], None),
+    ("main.py --headless", ["main.py", "--headless", "--seed", "1"], SCRIPT),
+    ("import gui", ["-c", "import gui"], None),
+    ("import gui + headless", ["-c", "import gui, sys; from src.headless import main; main(['--seed', '1'])"], SCRIPT),
+]
+
+def best_time(args, script):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + args, input=script, text=True, stdout=subprocess.DEVNULL, check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    best_time(["-c", "import gui"], None) # Warm the OS caches
+    for name, args, script in CASES:
+        print(f"{name:<24} {best_time(args, script) * 1000:7.1f} ms")
@@ -0,0 +1,74 @@
+"""Speed of estimate_combat at 10k, 100k and 1M fights, and a check that it agrees with
+the game: the same fights played through the attack, use_weapon and escape commands
+must come out the same.
+
+Run from the repository root with: python -m benchmarks.bench_combat
+"""
+import itertools
+import random
+import time
+import numpy as np
+from src.colors import Colors
+from src.combat import estimate_combat
+from src.commands import Command
+from src.game import Game
+from src.gameobjects.enemies import Enemy
+from src.gameobjects.items import Item
+from src.gameobjects.templates import content_template, content_templates
+from src.world import Room
+
+FIGHTS = [10000, 100000, 1000000]
+PLAYED = 10000
+ESCAPE_BELOW = 40
+
+def play(game, templates, colors, escape_below):
+    """Fights templates through the commands, escaping at or below escape_below health.
+    Returns (outcome, health lost, turns)."""
+    room = Room(game.player.current_room.description, game.player.current_room.zone, 0, 0, 0)
+    game.player.current_room = room
+    game.player.health = 100
+    for template in templates:
+        room.add_enemy(Enemy(template))
+    turns = 0
+    while room.enemies and game.player.is_alive():
+        turns += 1
+        if game.player.health <= escape_below:
+            game.handle_command(Command("escape"), colors)
+            if not room.enemies:
+                return "escape", 100 - game.player.health, turns
+            continue
+        game.handle_command(Command("attack", room.enemies[0].name), colors)
+        game.handle_command(Command("use_weapon", "gbe"), colors)
+    return ("win" if game.player.is_alive() else "death"), min(100 - game.player.health, 100), turns
+
+if __name__ == "__main__":
+    enemies = content_templates("enemies")
+    for fights in FIGHTS:
+        start = time.perf_counter()
+        estimate_combat(enemies, weapon="GBE", fights=fights, group_size=3, escape_below=ESCAPE_BELOW, rng=np.random.default_rng(1))
+        seconds = time.perf_counter() - start
+        print(f"{fights:>8} fights of 3 enemies: {seconds * 1e3:8.1f} ms ({fights / seconds / 1e6:.2f} M fights/s)")
+
+    colors = Colors()
+    game = Game(seed=1)
+    game.player.add_item(Item(content_template("items", "gbe")))
+    game.pass_time = lambda turns, output, colors: None # Hunger and roaming aren't part of the fight
+    for group in itertools.product(enemies, repeat=3):
+        outcome, lost, turns = play(game, group, colors, escape_below=0)
+        expected = estimate_combat(group, weapon="GBE", fights=1)
+        assert expected[outcome] == 1.0 and expected["mean_hp_loss"] == lost, (group, outcome, lost)
+        if outcome == "win":
+            assert expected["turns_to_kill"] == {turns: 1.0}, (group, turns)
+    print(f"{len(enemies) ** 3} groups of 3 played through the commands: same outcome, health lost and turns")
+
+    # Escapes are the only dice in a fight, besides which enemies are in the room
+    game.rng.seed(1)
+    rng = random.Random(1)
+    played = [play(game, rng.choices(enemies, k=3), colors, ESCAPE_BELOW) for _ in range(PLAYED)]
+    estimate = estimate_combat(enemies, weapon="GBE", group_size=3, escape_below=ESCAPE_BELOW, rng=np.random.default_rng(1))
+    print(f"{PLAYED} fights of 3 random enemies, escaping at {ESCAPE_BELOW} health:")
+    for outcome in ("win", "death", "escape"):
+        share = sum(result[0] == outcome for result in played) / PLAYED
+        print(f"{outcome:>6}: played {share:.1%}, estimated {estimate[outcome]:.1%}")
+        assert abs(share - estimate[outcome]) < 0.02, outcome
+    print(f"health lost: played {np.mean([result[1] for result in played]):.1f}, estimated {estimate['mean_hp_loss']:.1f}")
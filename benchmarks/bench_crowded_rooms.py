@@ -0,0 +1,79 @@
+"""Latency of commands that look things up by name (talk, attack, read, get) in rooms
+and inventories crowded with 10 to 1000 entries, each looking up the last entry, next to
+the case-lowering scan the commands used before name indexes.
+
+Lookups go through name indexes, so talk, attack and read take the same time however
+crowded it gets. get still grows a little: taking the item out of the room's list is a
+scan, though a pointer comparison per entry instead of lowering every name.
+
+Run from the repository root with: python -m benchmarks.bench_crowded_rooms
+"""
+import time
+from src.colors import Colors
+from src.commands import Command
+from src.game import Game
+from src.gameobjects.enemies import Enemy, NPC
+from src.gameobjects.items import Item
+from src.gameobjects.templates import intern_template
+from src.world import Room
+
+SIZES = [10, 100, 1000]
+REPEATS = 2000
+
+def crowded(kind, cls, count, **fields):
+    return [cls(intern_template(kind, dict(fields, name=f"{kind} {index}", description="Crowding the room.")))
+            for index in range(count)]
+
+def linear_scan(objects, name):
+    for obj in objects:
+        if obj.name.lower() == name.lower():
+            return obj
+    return None
+
+def per_call(function):
+    best = float("inf")
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(REPEATS):
+            function()
+        best = min(best, (time.perf_counter() - start) / REPEATS)
+    return best * 1e6
+
+def get_and_put_back(game, room, item, colors):
+    game.handle_command(Command("get", item.name), colors)
+    game.player.remove_item(item)
+    room.add_item(item)
+
+def attack_and_clear(game, enemy, colors):
+    game.handle_command(Command("attack", enemy.name), colors)
+    game.current_attack_target = None
+
+if __name__ == "__main__":
+    colors = Colors()
+    print(f"{'entries':>8} {'talk':>8} {'attack':>8} {'read':>8} {'get':>8} {'scan':>8}   (us per command)")
+    timings = {}
+    for size in SIZES:
+        game = Game(seed=1)
+        room = Room(game.player.current_room.description, game.player.current_room.zone, 0, 0, 0)
+        game.player.current_room = room
+        items = crowded("items", Item, size)
+        npcs = crowded("npcs", NPC, size, dialogue=["..."])
+        enemies = crowded("enemies", Enemy, size, damage=1, durability=1, health=10)
+        for entity in items + npcs:
+            room.add_item(entity)
+        fight_room = Room(room.description, room.zone, 0, 0, 1)
+        for enemy in enemies:
+            fight_room.add_enemy(enemy)
+        for index in range(size):
+            game.player.add_item(Item(intern_template("items", {"name": f"log {index}", "description": "Carried."}), "A log."))
+
+        talk = per_call(lambda: game.handle_command(Command("talk", npcs[-1].name), colors))
+        read = per_call(lambda: game.handle_command(Command("read", f"log {size - 1}"), colors))
+        get = per_call(lambda: get_and_put_back(game, room, items[-1], colors))
+        scan = per_call(lambda: linear_scan(room.items, items[-1].name))
+        game.player.current_room = fight_room
+        attack = per_call(lambda: attack_and_clear(game, enemies[-1], colors))
+        print(f"{size:>8} {talk:>8.2f} {attack:>8.2f} {read:>8.2f} {get:>8.2f} {scan:>8.2f}")
+        timings[size] = (talk, attack, read)
+    for smallest, largest in zip(timings[SIZES[0]], timings[SIZES[-1]]):
+        assert largest < 4 * smallest, "lookup latency grows with crowding"
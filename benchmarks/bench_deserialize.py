@@ -0,0 +1,42 @@
+"""Deserializing the items, terminals, NPCs, obstacles and enemies of a generated world one
+record at a time with create_from_json versus in bulk with create_many_from_json.
+
+Run from the repository root with: python -m benchmarks.bench_deserialize
+"""
+import time
+from src.gameobjects.enemies import Enemy
+from src.gameobjects.factory import create_from_json, create_many_from_json
+from src.world import generate_world
+
+WORLD = {"num_stratas": 3, "strata_size": [20, 20, 20]}
+REPEATS = 7
+
+def best_time(function):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    starting_room, all_stratas = generate_world(seed=1, workers=1, **WORLD)
+    records = []
+    enemy_records = []
+    for strata in all_stratas:
+        for room in strata.grid.values():
+            records += [entity.to_json() for entity in room.entities]
+            records += [obstacle.to_json() for obstacle in room.obstacles.values()]
+            enemy_records += [enemy.to_json() for enemy in room.enemies]
+
+    one_by_one = best_time(lambda: [create_from_json(data) for data in records])
+    bulk = best_time(lambda: create_many_from_json(records))
+    print(f"{len(records)} item, terminal, NPC and obstacle records")
+    print(f"create_from_json      {one_by_one * 1000:7.1f} ms")
+    print(f"create_many_from_json {bulk * 1000:7.1f} ms")
+
+    one_by_one = best_time(lambda: [Enemy.from_json(data) for data in enemy_records])
+    bulk = best_time(lambda: Enemy.from_json_many(enemy_records))
+    print(f"{len(enemy_records)} enemy records")
+    print(f"Enemy.from_json       {one_by_one * 1000:7.1f} ms")
+    print(f"Enemy.from_json_many  {bulk * 1000:7.1f} ms")
@@ -0,0 +1,113 @@
+"""Per-command dispatch cost of Game.handle_command for commands typed as text, for
+pre-parsed Commands, and for the same Commands run as one handle_commands batch, against
+the if/elif chain handle_command used before the handler registry. Every case combines
+the output of all its commands.
+
+The commands are cheap ones (status, escape out of combat, an unknown verb, move with
+no direction, a weapon with no target) so that the time is mostly parsing and dispatch
+rather than game logic. None of them takes game time, so no timed effect can end the
+batch early however often they run.
+
+Run from the repository root with: python -m benchmarks.bench_dispatch
+"""
+import time
+from src.colors import Colors
+from src.commands import Command
+from src.game import Game
+
+COUNT = 100000
+REPEATS = 5
+TEXTS = ["status", "escape", "frobnicate", "move", "use_weapon gbe"]
+
+def best_time(function):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def if_elif_chain(game, command, colors):
+    """handle_command as it was before the registry: the verb compared against every
+    verb in turn. The benchmarked verbs keep their old bodies; the others are never
+    reached here and go to their handlers."""
+    parts = command.split()
+    if not parts:
+        return []
+
+    verb = parts[0]
+    if game.player.current_room.enemies and verb in ['move', 'scan', 'get']:
+        return [("You can't do that during combat!", colors.RED)]
+
+    if verb == "quit":
+        return game.handle_command(command, colors)
+    elif verb == "look":
+        return game.handle_command(command, colors)
+    elif verb == "move":
+        if len(parts) > 1:
+            return game.handle_command(command, colors)
+        else:
+            return [("Move where?", colors.YELLOW)]
+    elif verb == "get":
+        return game.handle_command(command, colors)
+    elif verb == "inventory" or verb == "inv":
+        return game.handle_command(command, colors)
+    elif verb == "status":
+        return [
+            (f"Health: {game.player.health}", colors.GREEN),
+            (f"Energy: {game.player.energy}", colors.YELLOW),
+            (f"Strength: {game.player.strength}", colors.CYAN),
+        ]
+    elif verb == "scan":
+        return game.handle_command(command, colors)
+    elif verb == "read":
+        return game.handle_command(command, colors)
+    elif verb == "install":
+        return game.handle_command(command, colors)
+    elif verb == "scavenge":
+        return game.handle_command(command, colors)
+    elif verb == "talk":
+        return game.handle_command(command, colors)
+    elif verb == "attack":
+        return game.handle_command(command, colors)
+    elif verb == "use_weapon":
+        if not game.current_attack_target:
+            return [(f"No target selected for attack.", colors.RED)]
+        return game.handle_command(command, colors)
+    elif verb == "escape":
+        if not game.player.current_room.enemies:
+            return [("You are not in combat.", colors.YELLOW)]
+        return game.handle_command(command, colors)
+    else:
+        return [(f"Unknown command: '{command}'", colors.RED)]
+
+def chained(game, texts, colors):
+    output = []
+    for text in texts:
+        output += if_elif_chain(game, text, colors)
+    return output
+
+def one_by_one(game, commands, colors):
+    """What callers did before handle_commands: one call per command, output combined."""
+    output = []
+    for command in commands:
+        output += game.handle_command(command, colors)
+    return output
+
+if __name__ == "__main__":
+    game = Game(seed=1)
+    game.player.current_room.enemies = [] # Out of combat, so escape is refused
+    colors = Colors()
+    print(f"{'':<16} {'if/elif':>10} {'text':>10} {'Command':>10} {'batch':>10}   (ns per command)")
+    for text in TEXTS:
+        texts = [text] * COUNT
+        commands = [Command.parse(text)] * COUNT
+        assert chained(game, texts[:1], colors) == one_by_one(game, texts[:1], colors)
+        timings = [
+            best_time(lambda: chained(game, texts, colors)),
+            best_time(lambda: one_by_one(game, texts, colors)),
+            best_time(lambda: one_by_one(game, commands, colors)),
+            best_time(lambda: game.handle_commands(commands, colors)),
+        ]
+        print(f"{text:<16} " + " ".join(f"{timing / COUNT * 1e9:10.0f}" for timing in timings))
+    assert game.turn == 0 and game.player.is_alive(), "a command took game time"
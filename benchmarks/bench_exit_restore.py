@@ -0,0 +1,37 @@
+"""Load time of saved exit masks against reconnecting every pair of adjacent rooms as
+saves without exits do. tests/test_exit_restore.py checks the exit graph survives saves.
+
+Run from the repository root with: python -m benchmarks.bench_exit_restore
+"""
+import time
+from src.game import Game, Player
+from src.savegame import game_to_json
+from src.world import Strata, generate_world
+
+WORLD = {"num_stratas": 2, "strata_size": [20, 20, 20]}
+
+def exit_masks(all_stratas):
+    return {(strata.strata_id, position): room.exit_mask for strata in all_stratas for position, room in strata.grid.items()}
+
+def without_exits(strata_data):
+    grid = {key: {name: value for name, value in room.items() if name != "exits"} for key, room in strata_data["grid"].items()}
+    return dict(strata_data, grid=grid)
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    starting_room, all_stratas = generate_world(seed=1, workers=1, **WORLD)
+    game = Game(all_stratas=all_stratas, player=Player(starting_room, all_stratas[0]), max_resident_stratas=WORLD["num_stratas"])
+    generated = exit_masks(game.all_stratas) # Builds every room
+    print(f"{len(generated)} rooms")
+
+    stratas_data = game_to_json(game)["stratas"]
+    saved_time, saved = timed(lambda: [Strata.from_json(strata_data) for strata_data in stratas_data])
+    legacy_data = [without_exits(strata_data) for strata_data in stratas_data]
+    legacy_time, legacy = timed(lambda: [Strata.from_json(strata_data) for strata_data in legacy_data])
+    changed = sum(1 for key, mask in exit_masks(legacy).items() if mask != generated[key])
+    print(f"Strata.from_json with saved exits    {saved_time * 1000:8.1f} ms")
+    print(f"Strata.from_json reconnecting rooms  {legacy_time * 1000:8.1f} ms ({changed} rooms get exits they were not generated with)")
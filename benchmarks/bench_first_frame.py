@@ -0,0 +1,43 @@
+"""Time from "Load Game" to the first "look" output, building only the player's strata
+versus every strata of the save, for seed-plus-delta and full saves.
+
+Run from the repository root with: python -m benchmarks.bench_first_frame
+"""
+import os
+import tempfile
+import time
+from benchmarks.bench_saves import WORLDS, play
+from src.colors import Colors
+from src.game import Game
+from src.savegame import load_game, save_game
+
+REPEATS = 3
+
+def first_frame(file_path, colors, load_all):
+    start = time.perf_counter()
+    game = load_game(file_path)
+    if load_all:
+        for strata in game.all_stratas:
+            pass
+    game.handle_command("look", colors)
+    elapsed = time.perf_counter() - start
+    game.all_stratas.close()
+    return elapsed
+
+if __name__ == "__main__":
+    colors = Colors()
+    print(f"{'world':>7} {'save':>6} {'size (KiB)':>11} {'every strata (ms)':>18} {'first frame (ms)':>17}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, world_options in WORLDS.items():
+            game = Game(seed=1, world_options=world_options)
+            play(game)
+            for save_name in ("delta", "full"):
+                if save_name == "full":
+                    game.seed = None # Saved in full, like a world that predates seeds
+                file_path = os.path.join(directory, f"{name}_{save_name}.sav")
+                save_game(game, file_path)
+                eager = min(first_frame(file_path, colors, load_all=True) for _ in range(REPEATS))
+                lazy = min(first_frame(file_path, colors, load_all=False) for _ in range(REPEATS))
+                size = os.path.getsize(file_path) / 1024
+                print(f"{name:>7} {save_name:>6} {size:>11.1f} {eager * 1000:>18.1f} {lazy * 1000:>17.1f}")
+            game.all_stratas.close()
@@ -0,0 +1,66 @@
+"""Walks a player back and forth along the same route and reports how often moving
+reused a room's cached look output, and the time per move with and without the cache.
+Enemies don't roam during the walk, so none of them blocks the route or changes a room.
+
+Run from the repository root with: python -m benchmarks.bench_look_cache
+"""
+import heapq
+import time
+from src.colors import Colors
+from src.commands import Command
+from src.game import Game
+from src.roaming import Roaming
+from src.world import get_opposite_direction
+
+ROUTE_LENGTH = 12
+TRIPS = 200
+
+def find_route(game, length):
+    """Directions of a walk from the player's room that never revisits a room and
+    never meets an obstacle or enemy, so it can be walked in both directions."""
+    room = game.player.current_room
+    seen = {id(room)}
+    route = []
+    while len(route) < length:
+        direction = next((direction for direction, neighbour in sorted(room.exits.items())
+                          if direction not in room.obstacles and get_opposite_direction(direction) not in neighbour.obstacles
+                          and id(neighbour) not in seen and not neighbour.enemies), None)
+        if direction is None:
+            break
+        room = room.exits[direction]
+        seen.add(id(room))
+        route.append(direction)
+    return route
+
+def walk(game, moves, colors, cached=True):
+    for move in moves:
+        if not cached:
+            move_room = game.player.current_room.exits[move.argument]
+            move_room.look_cache = None
+        game.handle_command(move, colors)
+
+if __name__ == "__main__":
+    game = Game(seed=1)
+    game.player.current_room.enemies = []
+    scheduler = game.scheduler
+    scheduler.queue = [entry for entry in scheduler.queue if not isinstance(entry[2], Roaming)]
+    heapq.heapify(scheduler.queue)
+    colors = Colors()
+    route = find_route(game, ROUTE_LENGTH)
+    there = [Command("move", direction) for direction in route]
+    back = [Command("move", get_opposite_direction(direction)) for direction in reversed(route)]
+    moves = (there + back) * TRIPS
+
+    start = time.perf_counter()
+    walk(game, moves, colors)
+    cached = (time.perf_counter() - start) / len(moves)
+    stats = dict(game.look_stats)
+    start = time.perf_counter()
+    walk(game, moves, colors, cached=False)
+    uncached = (time.perf_counter() - start) / len(moves)
+
+    hit_rate = stats["hits"] / (stats["hits"] + stats["misses"])
+    print(f"route of {len(route)} moves walked there and back {TRIPS} times ({len(moves)} moves)")
+    print(f"look cache: {stats['hits']} hits, {stats['misses']} misses, {hit_rate:.1%} hit rate")
+    print(f"per move: {cached * 1e6:.2f} us cached, {uncached * 1e6:.2f} us rendering every look")
+    assert stats["misses"] == len(route) + 1, "rooms rendered again without changing"
@@ -0,0 +1,62 @@
+"""Per-turn cost of moving roaming enemies across a strata with 1k, 10k and 100k of
+them: planning the moves as array operations, and the whole step that also moves the
+enemies that went somewhere between Room objects. The roaming window covers the whole
+strata, so every enemy roams. For comparison, the old way of moving enemies, one
+get_random_exit call per enemy per turn.
+
+Run from the repository root with: python -m benchmarks.bench_roaming
+"""
+import random
+import time
+import numpy as np
+from src.colors import Colors
+from src.gameobjects.enemies import Enemy
+from src.gameobjects.templates import content_templates
+from src.roaming import Roamers
+from src.world import Strata, LayoutGrid, generate_layout
+
+COUNTS = [1000, 10000, 100000]
+SHAPE = (64, 64, 32)
+TURNS = 20
+
+def crowded_strata(count, seed=1):
+    strata = Strata(*SHAPE, 0)
+    strata.grid = LayoutGrid(generate_layout(*SHAPE, rng=np.random.default_rng(seed)))
+    rng = random.Random(seed)
+    templates = content_templates("enemies")
+    for _ in range(count):
+        position = tuple(rng.randrange(size) for size in SHAPE)
+        strata.grid[position].add_enemy(Enemy(rng.choice(templates)))
+    return strata
+
+def per_turn(function, turns=TURNS):
+    start = time.perf_counter()
+    for _ in range(turns):
+        function()
+    return (time.perf_counter() - start) / turns * 1e3
+
+def one_by_one(strata):
+    """Every enemy takes a random exit, room by room."""
+    grid = strata.grid
+    for room in list(grid.rooms.values()):
+        for enemy in list(room.enemies):
+            direction = room.get_random_exit()
+            if direction:
+                room.remove_enemy(enemy)
+                room.neighbour(direction).add_enemy(enemy)
+
+if __name__ == "__main__":
+    colors = Colors()
+    print(f"{SHAPE[0]}x{SHAPE[1]}x{SHAPE[2]} strata, player in the middle")
+    print(f"{'enemies':>8} {'plan':>8} {'step':>8} {'moved':>8} {'one by one':>10}   (ms per turn)")
+    for count in COUNTS:
+        strata = crowded_strata(count)
+        roamers = Roamers(strata, np.random.default_rng(1), radius=max(SHAPE))
+        player_room = strata.grid[tuple(size // 2 for size in SHAPE)]
+        roamers.update_window(player_room)
+        plan = per_turn(lambda: roamers.plan(player_room))
+        moved = []
+        step = per_turn(lambda: moved.append(roamers.step(player_room, [], colors)))
+        naive = per_turn(lambda: one_by_one(strata), turns=2)
+        assert sum(len(room.enemies) for room in strata.grid.rooms.values()) == count
+        print(f"{count:>8} {plan:>8.2f} {step:>8.2f} {sum(moved) / len(moved):>8.0f} {naive:>10.2f}")
@@ -0,0 +1,31 @@
+"""Measures memory per room of a fully built strata, with and without its contents.
+
+Run from the repository root with: python -m benchmarks.bench_room_memory
+"""
+import gc
+import tracemalloc
+from src.world import LayoutGrid, generate_layout, generate_world
+
+SIZE = (15, 15, 15)
+
+def traced(build):
+    gc.collect()
+    tracemalloc.start()
+    grid = build()
+    rooms = list(grid.values())
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return total / len(rooms)
+
+def populated_strata():
+    starting_room, all_stratas = generate_world(strata_size=SIZE, seed=1, workers=1)
+    return all_stratas[0].grid
+
+def bare_strata():
+    return LayoutGrid(generate_layout(*SIZE))
+
+if __name__ == "__main__":
+    rooms = SIZE[0] * SIZE[1] * SIZE[2]
+    print(f"{rooms} rooms per strata")
+    print(f"populated strata: {traced(populated_strata):.0f} bytes per room")
+    print(f"bare strata:      {traced(bare_strata):.0f} bytes per room")
@@ -0,0 +1,40 @@
+"""Time to list a directory of saves with their details: decoding every save, building
+the catalog from save headers, and reading an up to date catalog.
+
+Run from the repository root with: python -m benchmarks.bench_save_list
+"""
+import os
+import shutil
+import tempfile
+import time
+from benchmarks.bench_saves import WORLDS, play
+from src.game import Game
+from src.savecatalog import list_saves, CATALOG_FILE
+from src.savegame import document_summary, read_document, save_game
+
+SAVE_COUNT = 2000
+
+def decode_every_save(directory):
+    return [document_summary(read_document(entry.path), entry.stat().st_mtime) for entry in os.scandir(directory)]
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as directory:
+        game = Game(seed=1, world_options=WORLDS["medium"])
+        play(game)
+        first = os.path.join(directory, "save_0.sav")
+        save_game(game, first)
+        for index in range(1, SAVE_COUNT):
+            shutil.copy(first, os.path.join(directory, f"save_{index}.sav"))
+
+        decode_time = timed(decode_every_save, directory)
+        build_time = timed(list_saves, directory)
+        cached_time = timed(list_saves, directory)
+        print(f"{SAVE_COUNT} saves of {os.path.getsize(first) / 1024:.1f} KiB, catalog {os.path.getsize(os.path.join(directory, CATALOG_FILE)) / 1024:.1f} KiB")
+        print(f"decode every save   {decode_time * 1000:8.1f} ms")
+        print(f"build catalog       {build_time * 1000:8.1f} ms")
+        print(f"read catalog        {cached_time * 1000:8.1f} ms")
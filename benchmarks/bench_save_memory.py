@@ -0,0 +1,59 @@
+"""Peak memory of saving and loading a full world, building the whole save document first
+versus streaming it room by room, measured with tracemalloc. tests/test_save_memory.py
+checks that streaming keeps the peaks close to the live world size.
+
+Run from the repository root with: python -m benchmarks.bench_save_memory
+"""
+import gc
+import os
+import tempfile
+import tracemalloc
+from src.binarysave import encode_document
+from src.game import Game, Player
+from src.savegame import game_summary, game_from_json, game_to_json, load_game, read_document, save_game
+from src.world import generate_world
+
+# No more stratas than a StrataStore keeps resident, so the whole world stays in memory
+WORLD = {"num_stratas": 3, "strata_size": [16, 16, 16]}
+
+def full_game():
+    """A game saved in full, like one loaded from a save that predates seeds."""
+    starting_room, all_stratas = generate_world(seed=1, workers=1, **WORLD)
+    for strata in all_stratas:
+        list(strata.grid.values()) # Build every room
+    return Game(all_stratas=all_stratas, player=Player(starting_room, all_stratas[0]))
+
+def save_document(game, file_path):
+    with open(file_path, "wb") as f:
+        f.write(encode_document(game_to_json(game), game_summary(game)))
+
+def load_document(file_path):
+    return game_from_json(read_document(file_path))
+
+def measure(function, *args):
+    """(peak bytes above the starting point, bytes still held afterwards, result)."""
+    gc.collect() # Rooms and grids reference each other, so dropped worlds wait for the collector
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    return peak - start, current - start, result
+
+def mib(size):
+    return f"{size / 2 ** 20:8.1f}"
+
+if __name__ == "__main__":
+    tracemalloc.start()
+    world_size, _, game = measure(full_game)
+    print(f"live world: {mib(world_size)} MiB")
+    print(f"{'':>16} {'peak (MiB)':>10} {'kept (MiB)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        file_path = os.path.join(directory, "save.sav")
+        for name, save, load in (("document", save_document, load_document), ("streaming", save_game, load_game)):
+            save_peak, _, _ = measure(save, game, file_path)
+            load_peak, loaded_size, loaded = measure(load, file_path)
+            loaded.all_stratas.close()
+            del loaded
+            print(f"{name + ' save':>16} {mib(save_peak):>10}")
+            print(f"{name + ' load':>16} {mib(load_peak):>10} {mib(loaded_size):>10}")
+
@@ -0,0 +1,83 @@
+"""Save size and save/load time for full and seed-plus-delta saves, as JSON and binary.
+
+Each world is a fresh game with every room of the first strata built and one room in
+twenty of it changed, so delta saves have something to write.
+
+Run from the repository root with: python -m benchmarks.bench_saves
+"""
+import json
+import os
+import tempfile
+import time
+from src.binarysave import encode_document, decode_document
+from src.game import Game
+from src.savegame import game_summary, game_from_json, game_to_json, save_game, load_game
+
+WORLDS = {
+    "small": {"num_stratas": 1, "strata_size": [10, 10, 10]},
+    "medium": {"num_stratas": 4, "strata_size": [15, 15, 15]},
+    "large": {"num_stratas": 8, "strata_size": [30, 30, 30]},
+}
+
+def full_document(game):
+    """The format GameGUI.save_game_state wrote before delta saves."""
+    return {
+        "seed": game.seed,
+        "player": game.player.to_json(),
+        "stratas": [strata.to_json() for strata in game.all_stratas]
+    }
+
+def save_full_json(game, file_path):
+    with open(file_path, "w") as f:
+        json.dump(full_document(game), f, indent=4)
+
+def load_json(file_path):
+    with open(file_path, "r") as f:
+        return game_from_json(json.load(f))
+
+def binary_saver(document, compression):
+    def save(game, file_path):
+        with open(file_path, "wb") as f:
+            f.write(encode_document(document(game), game_summary(game), compression))
+    return save
+
+def load_binary(file_path):
+    with open(file_path, "rb") as f:
+        return game_from_json(decode_document(f.read()))
+
+def save_delta_json(game, file_path):
+    with open(file_path, "w") as f:
+        json.dump(game_to_json(game), f, separators=(",", ":"))
+
+FORMATS = [
+    ("full json", save_full_json, load_json),
+    ("full sav", binary_saver(full_document, None), load_binary),
+    ("full zlib", binary_saver(full_document, "zlib"), load_binary),
+    ("full lzma", binary_saver(full_document, "lzma"), load_binary),
+    ("delta json", save_delta_json, load_json),
+    ("delta zlib", save_game, load_game),
+]
+
+def play(game):
+    strata = game.all_stratas[0]
+    for index, room in enumerate(strata.grid.values()):
+        if index % 20 == 0:
+            room.touch()
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    print(f"{'world':>7} {'format':>10} {'size (KiB)':>11} {'save (ms)':>10} {'load (ms)':>10}")
+    with tempfile.TemporaryDirectory() as directory:
+        for name, world_options in WORLDS.items():
+            game = Game(seed=1, world_options=world_options)
+            play(game)
+            for format_name, save, load in FORMATS:
+                file_path = os.path.join(directory, f"{name}_{format_name.replace(' ', '_')}")
+                save_time = timed(save, game, file_path)
+                load_time = timed(load, file_path)
+                size = os.path.getsize(file_path) / 1024
+                print(f"{name:>7} {format_name:>10} {size:>11.1f} {save_time * 1000:>10.1f} {load_time * 1000:>10.1f}")
@@ -0,0 +1,66 @@
+"""Cost of passing one turn of game time with Game.pass_time: with more and more events
+waiting for later turns, with more and more events due every turn, and next to visiting
+every room of a strata once per turn, which is what ticking the world would cost.
+
+Run from the repository root with: python -m benchmarks.bench_scheduler
+"""
+import time
+from src.colors import Colors
+from src.game import Game
+from src.scheduler import Event, Scheduler, schedule_survival
+
+TURNS = 20000
+PENDING = [0, 1000, 100000]
+DUE = [1, 10, 100]
+
+class Recurring(Event):
+    """Does nothing every turn."""
+    name = "bench_recurring"
+
+    def fire(self, game, output, colors):
+        return 1
+
+class Later(Event):
+    name = "bench_later"
+
+def per_turn(game, colors):
+    output = []
+    start = time.perf_counter()
+    for _ in range(TURNS):
+        game.pass_time(1, output, colors)
+    return (time.perf_counter() - start) / TURNS * 1e6
+
+def fresh_scheduler(game):
+    game.scheduler = Scheduler()
+    schedule_survival(game.scheduler)
+    game.player.hunger = game.player.thirst = 10 ** 6 # Needs never run out while timing
+
+if __name__ == "__main__":
+    game = Game(seed=1)
+    colors = Colors()
+
+    timings = {}
+    print(f"{'pending':>8} {'us/turn':>8}   (events waiting past the timed turns)")
+    for pending in PENDING:
+        fresh_scheduler(game)
+        for index in range(pending):
+            game.scheduler.schedule(TURNS * 2 + index, Later())
+        timings[pending] = per_turn(game, colors)
+        print(f"{pending:>8} {timings[pending]:>8.2f}")
+    assert timings[PENDING[-1]] < 3 * timings[PENDING[0]], "turn cost grows with events not due"
+
+    print(f"{'due':>8} {'us/turn':>8}   (events firing every turn)")
+    for due in DUE:
+        fresh_scheduler(game)
+        for _ in range(due):
+            game.scheduler.schedule(1, Recurring())
+        print(f"{due:>8} {per_turn(game, colors):>8.2f}")
+
+    strata = game.player.current_strata
+    positions = [(x, y, z) for x in range(strata.width) for y in range(strata.height) for z in range(strata.depth)]
+    rooms = [room for room in map(strata.grid.get, positions) if room is not None]
+    start = time.perf_counter()
+    for _ in range(100):
+        for room in rooms:
+            room.enemies
+    print(f"visiting every one of {len(rooms)} rooms: {(time.perf_counter() - start) / 100 * 1e6:.2f} us/turn")
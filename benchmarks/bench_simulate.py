@@ -0,0 +1,27 @@
+"""Games per second of the headless simulator with 1, 2, 4, ... worker processes up to
+the number of CPUs, against an ideal linear speed-up from one worker.
+
+Asserts that the outcomes don't depend on the number of workers.
+
+Run from the repository root with: python -m benchmarks.bench_simulate
+"""
+import os
+from src.simulate import run_simulations
+
+GAMES = 400
+MAX_TURNS = 300
+
+if __name__ == "__main__":
+    cpus = os.cpu_count() or 1
+    worker_counts = sorted({2 ** power for power in range(cpus.bit_length()) if 2 ** power <= cpus} | {cpus})
+    reference = None
+    print(f"{GAMES} games of up to {MAX_TURNS} turns, {cpus} CPUs")
+    print(f"{'workers':>8} {'games/s':>10} {'speed-up':>9} {'ideal':>6}")
+    for workers in worker_counts:
+        outcomes, seconds = run_simulations(GAMES, max_turns=MAX_TURNS, workers=workers)
+        if reference is None:
+            reference, single_rate = outcomes, GAMES / seconds
+        assert outcomes == reference, f"outcomes with {workers} workers differ from one worker"
+        rate = GAMES / seconds
+        print(f"{workers:>8} {rate:>10.1f} {rate / single_rate:>9.2f} {workers:>6}")
+    print("outcomes identical for every worker count")
@@ -0,0 +1,44 @@
+"""Start-up cost of importing src.game, alone and followed by the first access to the game
+content, with the compiled content cache up to date and with content.json recompiled as
+every start did before content was cached.
+
+Each case runs in a fresh interpreter; the best of REPEATS runs is reported.
+
+Run from the repository root with: python -m benchmarks.bench_startup
+"""
+import os
+import subprocess
+import sys
+import time
+from src.content import CONTENT_CACHE
+
+REPEATS = 10
+
+CASES = [
+    ("interpreter only", "pass", False),
+    ("import src.game", "import src.game", False),
+    ("+ content, cached", "import src.game; src.content.load_content()", False),
+    ("+ content, compiled", "import src.game; src.content.load_content()", True),
+    ("+ content only, cached", "import src.content; src.content.load_content()", False),
+]
+
+def remove_cache():
+    try:
+        os.remove(CONTENT_CACHE)
+    except FileNotFoundError:
+        pass
+
+def best_time(code, recompile):
+    best = float("inf")
+    for _ in range(REPEATS):
+        if recompile:
+            remove_cache()
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+if __name__ == "__main__":
+    best_time("import src.content; src.content.load_content()", False) # Warm the cache and the OS
+    for name, code, recompile in CASES:
+        print(f"{name:<24} {best_time(code, recompile) * 1000:7.1f} ms")
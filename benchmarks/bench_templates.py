@@ -0,0 +1,80 @@
+"""Save size and loaded memory of a world whose enemies, NPCs, implants, obstacles and
+items save their template id, against the same world with every record carrying its
+template's fields in full, as saves did before templates.
+
+Asserts that every loaded object shares its template with the other objects made from
+the same template, whichever shape its record had.
+
+Run from the repository root with: python -m benchmarks.bench_templates
+"""
+import gc
+import json
+import tracemalloc
+from benchmarks.bench_saves import full_document
+from src.binarysave import encode_document
+from src.game import Game, Player
+from src.gameobjects.enemies import Enemy
+from src.gameobjects.factory import class_from_json
+from src.gameobjects.templates import content_template
+from src.savegame import game_summary
+from src.world import Strata, generate_world
+
+WORLD = {"num_stratas": 3, "strata_size": [20, 20, 20]}
+
+def expand(record, cls):
+    """record with its template id replaced by the template's fields."""
+    if "template" not in record:
+        return record
+    expanded = content_template(cls.template_kind, record["template"]).fields_to_json(cls.template_fields)
+    expanded.update((key, value) for key, value in record.items() if key != "template")
+    return expanded
+
+def expand_room(room):
+    return dict(room,
+        items=[expand(item, class_from_json(item)) for item in room["items"]],
+        enemies=[expand(enemy, Enemy) for enemy in room["enemies"]],
+        obstacles={direction: expand(obstacle, class_from_json(obstacle)) for direction, obstacle in room["obstacles"].items()})
+
+def expand_document(document):
+    stratas = [dict(strata, grid={key: expand_room(room) for key, room in strata["grid"].items()}) for strata in document["stratas"]]
+    return dict(document, stratas=stratas)
+
+def loaded_world(document):
+    """(bytes kept by the loaded stratas, the stratas)."""
+    gc.collect()
+    start = tracemalloc.get_traced_memory()[0]
+    stratas = [Strata.from_json(strata_data) for strata_data in document["stratas"]]
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - start, stratas
+
+def objects(stratas):
+    for strata in stratas:
+        for room in strata.grid.values():
+            yield from room.entities
+            yield from room.enemies
+            yield from room.obstacles.values()
+
+def kib(size):
+    return f"{size / 1024:10.1f}"
+
+if __name__ == "__main__":
+    starting_room, all_stratas = generate_world(seed=1, workers=1, **WORLD)
+    game = Game(all_stratas=all_stratas, player=Player(starting_room, all_stratas[0]), max_resident_stratas=WORLD["num_stratas"])
+    templated = full_document(game)
+    documents = {"template ids": templated, "full fields": expand_document(templated)}
+    summary = game_summary(game)
+
+    print(f"{'':>14} {'json KiB':>10} {'sav KiB':>10} {'zlib KiB':>10} {'loaded KiB':>10}")
+    tracemalloc.start()
+    for name, document in documents.items():
+        json_size = len(json.dumps(document, separators=(",", ":")))
+        sav_size = len(encode_document(document, summary, None))
+        zlib_size = len(encode_document(document, summary, "zlib"))
+        loaded_size, stratas = loaded_world(document)
+        loaded = list(objects(stratas))
+        templates = {id(obj.template) for obj in loaded}
+        assert len(templates) <= 20, f"{len(loaded)} objects loaded from {name} records hold {len(templates)} templates"
+        print(f"{name:>14} {kib(json_size)} {kib(sav_size)} {kib(zlib_size)} {kib(loaded_size)}")
+        del stratas, loaded
+    tracemalloc.stop()
+    print("loaded objects share their templates")
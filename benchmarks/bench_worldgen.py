@@ -0,0 +1,81 @@
+"""Compares strata grid generation between the original nested-loop builder and the
+batched NumPy layout path, both with rooms built on demand and with every room built.
+
+Run from the repository root with: python -m benchmarks.bench_worldgen
+"""
+import random
+import time
+from collections import Counter
+from src.world import CONTENT, Room, Strata, LayoutGrid, generate_layout
+
+SIZES = [5, 10, 15, 25, 40]
+REPEATS = 3
+
+def legacy_build(size):
+    """The room creation and linking loops generate_world used before the layout arrays."""
+    strata = Strata(size, size, size, 0)
+    for x in range(size):
+        for y in range(size):
+            for z in range(size):
+                zone = random.choice(list(CONTENT["room_descriptions"]))
+                description = random.choice(CONTENT["room_descriptions"][zone])
+                room = Room(description, zone, x, y, z)
+                room.grid = strata.grid
+                strata.grid[(x, y, z)] = room
+    for x in range(size):
+        for y in range(size):
+            for z in range(size):
+                room = strata.grid[(x, y, z)]
+                if y > 0 and random.random() > 0.1:
+                    north_room = strata.grid[(x, y - 1, z)]
+                    room.add_exit("north", north_room)
+                    north_room.add_exit("south", room)
+                if x > 0 and random.random() > 0.1:
+                    west_room = strata.grid[(x - 1, y, z)]
+                    room.add_exit("west", west_room)
+                    west_room.add_exit("east", room)
+                if z > 0 and random.random() > 0.1:
+                    down_room = strata.grid[(x, y, z - 1)]
+                    room.add_exit("down", down_room)
+                    down_room.add_exit("up", room)
+    return strata
+
+def layout_build(size):
+    strata = Strata(size, size, size, 0)
+    strata.grid = LayoutGrid(generate_layout(size, size, size))
+    return strata
+
+def layout_build_all(size):
+    strata = layout_build(size)
+    for room in strata.grid.values():
+        pass
+    return strata
+
+def best_time(builder, size):
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        builder(size)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def summarize(strata):
+    """Link ratio and zone frequencies, to check both paths draw from the same distribution."""
+    size = strata.width
+    possible_links = 3 * size * size * (size - 1)
+    links = sum(len(room.exits) for room in strata.grid.values()) // 2
+    zones = Counter(room.zone for room in strata.grid.values())
+    total = len(strata.grid)
+    return links / possible_links, {zone: round(count / total, 3) for zone, count in sorted(zones.items())}
+
+if __name__ == "__main__":
+    print(f"{'size':>6} {'rooms':>8} {'legacy (ms)':>12} {'layout (ms)':>12} {'all rooms (ms)':>15} {'speedup':>8}")
+    for size in SIZES:
+        legacy = best_time(legacy_build, size)
+        layout = best_time(layout_build, size)
+        layout_all = best_time(layout_build_all, size)
+        print(f"{size:>6} {size ** 3:>8} {legacy * 1000:>12.1f} {layout * 1000:>12.1f} {layout_all * 1000:>15.1f} {legacy / layout:>7.1f}x")
+
+    print("\nDistribution at size 40 (link ratio, zone frequencies):")
+    print("legacy:", *summarize(legacy_build(40)))
+    print("layout:", *summarize(layout_build_all(40)))
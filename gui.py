@@ -2,14 +2,34 @@ import tkinter as tk
 from tkinter import scrolledtext, messagebox
 import os
 import platform
-import webbrowser
 import json
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
 from src.game import Game, Player
+from src.commands import Command
 from src.world import generate_world, get_opposite_direction, CONTENT, Room, Strata
 from src.colors import Colors
-from src.gameobjects.items import CyberneticImplant
-from src.gameobjects.enemies import NPC
+from src.savegame import save_game, load_game, migrate_json_saves
+from src.autosave import Autosaver
+from src.savecatalog import list_saves, record_save
+from src.gameobjects.items import CyberneticImplant, Item
+from src.combat import estimate_combat
+
+AUTOSAVE_FILE = "autosave.sav"
+ODDS_FIGHTS = 500 # Fights simulated for the odds shown in the attack menu, within a few percent
+
+def converted_json_save(file_path):
+    """Whether file_path is an old .json save kept next to its .sav conversion."""
+    return file_path.endswith(".json") and os.path.exists(os.path.splitext(file_path)[0] + ".sav")
+
+@lru_cache(maxsize=256)
+def win_odds(enemy_stats, strength, health, weapon):
+    """Chance of winning a fight against enemies given as (health, damage, durability)
+    in the order they are fought. Cached, since the attack menu opens again on the same
+    fight until something in it changes."""
+    enemies = [SimpleNamespace(health=h, damage=damage, durability=durability) for h, damage, durability in enemy_stats]
+    return estimate_combat(enemies, strength, health, weapon, fights=ODDS_FIGHTS)["win"]
 
 class GameGUI(tk.Tk):
     def __init__(self):
@@ -22,12 +42,26 @@ class GameGUI(tk.Tk):
         self.game = None
         self.text_speed = 1
         self.text_speed_options = [1, 2, 3]
+        self.autosaver = Autosaver(os.path.join("saves", AUTOSAVE_FILE))
+        self.protocol("WM_DELETE_WINDOW", self.exit_game)
 
         self.main_frame = tk.Frame(self)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
 
         self.apply_theme()
         self.create_main_menu()
+        self.after_idle(self.migrate_old_saves)
+
+    def migrate_old_saves(self):
+        """Converts old .json saves to .sav once at startup, deleting the originals only
+        if the player agrees."""
+        converted = migrate_json_saves("saves")
+        if converted and messagebox.askyesno("Old saves converted", f"{len(converted)} old .json saves are now also .sav saves. Delete the old .json files?"):
+            for file_path in converted:
+                try:
+                    os.remove(file_path)
+                except OSError:
+                    pass # Still listed; the .sav copy hides it
 
     def apply_theme(self):
         self.main_frame.config(bg=self.colors.BLACK)
@@ -62,7 +96,7 @@ class GameGUI(tk.Tk):
         settings_button = tk.Button(menu_frame, text="Settings", command=self.show_settings, bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
         settings_button.pack(pady=10)
 
-        exit_button = tk.Button(menu_frame, text="Exit", command=self.quit, bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+        exit_button = tk.Button(menu_frame, text="Exit", command=self.exit_game, bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
         exit_button.pack(pady=10)
 
     def start_new_game(self):
@@ -119,6 +153,8 @@ class GameGUI(tk.Tk):
 
         self.status_label = tk.Label(top_bar, text="", bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE)
         self.status_label.pack(side=tk.LEFT, padx=10)
+        self.status_key = None # What the labels show, to skip re-formatting them unchanged
+        self.location_key = None
 
         # Main content
         main_content = tk.Frame(self.main_frame, bg=self.colors.BLACK)
@@ -167,15 +203,23 @@ class GameGUI(tk.Tk):
             self.create_main_menu()
             return
 
+        player = self.game.player
+
         # Update status
-        status_text = f"HP: {self.game.player.health} | Hunger: {self.game.player.hunger} | Thirst: {self.game.player.thirst} | Energy: {self.game.player.energy}"
-        if self.game.player.ailments:
-            status_text += f" | Ailments: {', '.join(self.game.player.ailments)}"
-        self.status_label.config(text=status_text)
+        status_key = (player.health, player.hunger, player.thirst, player.energy, tuple(player.ailments))
+        if status_key != self.status_key:
+            self.status_key = status_key
+            status_text = f"HP: {player.health} | Hunger: {player.hunger} | Thirst: {player.thirst} | Energy: {player.energy}"
+            if player.ailments:
+                status_text += f" | Ailments: {', '.join(player.ailments)}"
+            self.status_label.config(text=status_text)
 
         # Update location
-        location_text = f"Location: {self.game.player.current_room.zone} ({self.game.player.x},{self.game.player.y},{self.game.player.z}) Strata: {self.game.player.current_strata.strata_id}"
-        self.location_label.config(text=location_text)
+        location_key = (player.current_room.zone_index, player.x, player.y, player.z, player.current_strata.strata_id)
+        if location_key != self.location_key:
+            self.location_key = location_key
+            location_text = f"Location: {player.current_room.zone} ({player.x},{player.y},{player.z}) Strata: {player.current_strata.strata_id}"
+            self.location_label.config(text=location_text)
 
         # Update message area
         self.message_area.config(state="normal")
@@ -198,40 +242,44 @@ class GameGUI(tk.Tk):
 
     def show_move_buttons(self):
         self.clear_action_buttons()
-        for direction in self.game.player.current_room.exits:
-            button = tk.Button(self.action_bar, text=direction, command=lambda d=direction: self.handle_command(f"move {d}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+        for direction in self.game.player.current_room.directions:
+            button = tk.Button(self.action_bar, text=direction, command=lambda d=direction: self.handle_command(Command("move", d)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
             button.pack(side=tk.LEFT, padx=5)
 
     def show_interact_buttons(self):
         self.clear_action_buttons()
-        interactable_items = [item for item in self.game.player.current_room.items if not isinstance(item, NPC)]
+        interactable_items = self.game.player.current_room.visible_items
         for item in interactable_items:
-            button = tk.Button(self.action_bar, text=f"get {item.name}", command=lambda i=item.name: self.handle_command(f"get {i}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+            button = tk.Button(self.action_bar, text=f"get {item.name}", command=lambda i=item.name: self.handle_command(Command("get", i)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+            button.pack(side=tk.LEFT, padx=5)
+        for item in self.game.player.current_room.terminals:
+            button = tk.Button(self.action_bar, text=f"scan {item.name}", command=lambda i=item.name: self.handle_command(Command("scan", i)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
             button.pack(side=tk.LEFT, padx=5)
-        for item in self.game.player.current_room.items:
-            if isinstance(item, Terminal):
-                button = tk.Button(self.action_bar, text=f"scan {item.name}", command=lambda i=item.name: self.handle_command(f"scan {i}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
-                button.pack(side=tk.LEFT, padx=5)
         for item in self.game.player.inventory:
             if isinstance(item, CyberneticImplant):
-                button = tk.Button(self.action_bar, text=f"install {item.name}", command=lambda i=item.name: self.handle_command(f"install {i}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
-                button.pack(side=tk.LEFT, padx=5)
-        for item in self.game.player.current_room.items:
-            if isinstance(item, NPC):
-                button = tk.Button(self.action_bar, text=f"talk {item.name}", command=lambda i=item.name: self.handle_command(f"talk {i}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+                button = tk.Button(self.action_bar, text=f"install {item.name}", command=lambda i=item.name: self.handle_command(Command("install", i)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
                 button.pack(side=tk.LEFT, padx=5)
+        for item in self.game.player.current_room.npcs:
+            button = tk.Button(self.action_bar, text=f"talk {item.name}", command=lambda i=item.name: self.handle_command(Command("talk", i)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+            button.pack(side=tk.LEFT, padx=5)
 
     def show_attack_buttons(self):
         self.clear_action_buttons()
-        for enemy in self.game.player.current_room.enemies:
-            button = tk.Button(self.action_bar, text=f"attack {enemy.name}", command=lambda e=enemy.name: self.handle_command(f"attack {e}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+        player = self.game.player
+        enemies = player.current_room.enemies
+        weapon = player.find_item_by_name("gbe")
+        stats = [(enemy.health, enemy.damage, enemy.durability) for enemy in enemies]
+        for k, enemy in enumerate(enemies):
+            # Odds of fighting the room with this enemy first, using the weapon the weapon menu offers
+            odds = win_odds(tuple([stats[k]] + stats[:k] + stats[k + 1:]), player.strength, player.health, weapon.name if weapon else "")
+            button = tk.Button(self.action_bar, text=f"attack {enemy.name} ({odds:.0%} win)", command=lambda e=enemy.name: self.handle_command(Command("attack", e)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
             button.pack(side=tk.LEFT, padx=5)
         for obstacle in self.game.player.current_room.obstacles.values():
-            button = tk.Button(self.action_bar, text=f"attack {obstacle.name}", command=lambda o=obstacle.name: self.handle_command(f"attack {o}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+            button = tk.Button(self.action_bar, text=f"attack {obstacle.name}", command=lambda o=obstacle.name: self.handle_command(Command("attack", o)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
             button.pack(side=tk.LEFT, padx=5)
 
     def escape_combat(self):
-        self.handle_command("escape")
+        self.handle_command(Command("escape"))
 
     def show_pause_menu(self):
         self.clear_frame()
@@ -255,8 +303,13 @@ class GameGUI(tk.Tk):
         exit_to_main_button = tk.Button(pause_frame, text="Exit to Main Menu", command=self.create_main_menu, bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
         exit_to_main_button.pack(pady=10)
 
+        if self.game.seed is not None:
+            seed_label = tk.Label(pause_frame, text=f"World seed: {self.game.seed}", bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE)
+            seed_label.pack(pady=10)
+
     def handle_command(self, command):
         self.game.message.extend(self.game.handle_command(command, self.colors))
+        self.autosaver.turn_taken(self.game)
         if self.game.current_attack_target:
             self.show_weapon_selection()
         else:
@@ -266,48 +319,38 @@ class GameGUI(tk.Tk):
         self.clear_action_buttons()
         for item in self.game.player.inventory:
             if isinstance(item, Item) and item.name.lower() == "gbe":
-                button = tk.Button(self.action_bar, text=item.name, command=lambda w=item.name: self.handle_command(f"use_weapon {w}"), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
+                button = tk.Button(self.action_bar, text=item.name, command=lambda w=item.name: self.handle_command(Command("use_weapon", w)), bg=self.colors.BLACK, fg=self.colors.BRIGHT_WHITE, highlightbackground=self.colors.BRIGHT_WHITE)
                 button.pack(side=tk.LEFT, padx=5)
 
     def get_save_files(self):
         if not os.path.exists("saves"):
             return []
         files = []
-        for f in os.listdir("saves"):
-            if f.endswith(".json"):
-                file_path = os.path.join("saves", f)
-                date_str = f.replace("save_", "").replace(".json", "")
-                try:
-                    date_obj = datetime.strptime(date_str, "%Y-%m-%d_%H-%M-%S")
-                    files.append((file_path, date_obj.strftime("%Y-%m-%d %H:%M:%S")))
-                except ValueError:
-                    continue
-        return sorted(files, key=lambda x: x[1], reverse=True)
+        for entry in list_saves("saves", where=lambda entry: not converted_json_save(entry["file_path"])):
+            date_str = datetime.fromtimestamp(entry["timestamp"]).strftime("%Y-%m-%d %H:%M:%S")
+            if os.path.basename(entry["file_path"]) == AUTOSAVE_FILE:
+                date_str += " (autosave)"
+            details = f"Strata {entry['strata_id']} ({entry['x']}, {entry['y']}, {entry['z']})"
+            if entry["zone"]:
+                details += f" {entry['zone']}"
+            details += f" - HP {entry['health']} - {entry['size'] / 1024:.1f} KiB"
+            files.append((entry["file_path"], f"{date_str}  {details}"))
+        return files
 
     def save_game_state(self):
         if not os.path.exists("saves"):
             os.makedirs("saves")
         
         now = datetime.now()
-        file_name = f"save_{now.strftime('%Y-%m-%d_%H-%M-%S')}.json"
+        file_name = f"save_{now.strftime('%Y-%m-%d_%H-%M-%S')}.sav"
         file_path = os.path.join("saves", file_name)
 
-        data = {
-            "player": self.game.player.to_json(),
-            "stratas": [strata.to_json() for strata in self.game.all_stratas]
-        }
-
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=4)
+        save_game(self.game, file_path)
+        record_save(file_path)
         messagebox.showinfo("Game Saved", "Game saved successfully!")
 
     def load_game_state(self, file_path):
-        with open(file_path, "r") as f:
-            data = json.load(f)
-        
-        all_stratas = [Strata.from_json(s_data) for s_data in data["stratas"]]
-        player = Player.from_json(data["player"], all_stratas)
-        self.game = Game(all_stratas=all_stratas, player=player)
+        self.game = load_game(file_path)
         self.game.message.extend(self.game.handle_command("look", self.colors))
         self.create_game_view()
 
@@ -324,7 +367,12 @@ class GameGUI(tk.Tk):
         self.text_speed = self.text_speed_options[next_index]
         self.text_speed_button.config(text=f"Text Speed: {self.text_speed}")
 
+    def exit_game(self):
+        self.autosaver.close() # Finish writing a pending autosave
+        self.quit()
+
     def open_github(self):
+        import webbrowser # Rarely used and slow to import
         webbrowser.open("https://github.com/iBobith/blame")
 
     def clear_frame(self):
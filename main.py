@@ -1,5 +1,10 @@
-from gui import GameGUI
+import sys
 
 if __name__ == "__main__":
-    app = GameGUI()
-    app.mainloop()
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == "--headless":
+        from src.headless import main
+        main(sys.argv[2:])
+    else:
+        from gui import GameGUI # Only the GUI needs tkinter
+        app = GameGUI()
+        app.mainloop()
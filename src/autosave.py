@@ -0,0 +1,96 @@
+"""Background autosaves."""
+import os
+import threading
+import time
+from src.binarysave import encode_document
+from src.savecatalog import record_save
+from src.savegame import game_summary, game_to_json, write_atomically
+
+class Autosaver:
+    """Saves a game to file_path every every_turns turns or, at the first turn after,
+    every every_seconds seconds (the game can't change between turns).
+
+    The main thread only snapshots the save document; a worker thread encodes it and
+    writes it atomically. Seeded worlds snapshot just the changed rooms, unseeded ones
+    every room. Encoding holds the GIL much of the time, so while the worker is busy
+    no new snapshot is taken: the save is skipped and retried at the next turn.
+    """
+    def __init__(self, file_path, every_turns=25, every_seconds=120, compression="zlib"):
+        self.file_path = file_path
+        self.every_turns = every_turns
+        self.every_seconds = every_seconds
+        self.compression = compression
+        self.turns = 0
+        self.last_save_time = time.monotonic()
+        self.condition = threading.Condition()
+        self.pending = None # Snapshot waiting for the worker
+        self.busy = False # Set from handing over a snapshot until it is written
+        self.closed = False
+        self.thread = None
+        self.pauses = [] # Seconds the main thread spent on each snapshot
+        self.written = 0
+        self.skipped = 0
+        self.last_error = None
+
+    def turn_taken(self, game):
+        self.turns += 1
+        if self.turns >= self.every_turns or time.monotonic() - self.last_save_time >= self.every_seconds:
+            self.save(game)
+
+    def save(self, game):
+        """Snapshots game and hands it to the worker thread, unless the worker is
+        still busy with the last one."""
+        with self.condition:
+            if self.busy:
+                self.skipped += 1
+                return
+        start = time.perf_counter()
+        snapshot = (game_to_json(game), game_summary(game))
+        with self.condition:
+            self.pending = snapshot
+            self.busy = True
+            self.condition.notify()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self.run, name="autosave", daemon=True)
+            self.thread.start()
+        self.turns = 0
+        self.last_save_time = time.monotonic()
+        self.pauses.append(time.perf_counter() - start)
+
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                (document, summary), self.pending = self.pending, None
+            try:
+                data = encode_document(document, summary, self.compression)
+                os.makedirs(os.path.dirname(os.path.abspath(self.file_path)), exist_ok=True)
+                write_atomically(self.file_path, lambda f: f.write(data))
+                record_save(self.file_path, summary)
+            except Exception as e: # A failed autosave mustn't kill the worker
+                self.last_error = e
+            else:
+                self.written += 1
+            finally:
+                with self.condition:
+                    self.busy = False
+
+    def close(self):
+        """Writes the pending snapshot, if any, and stops the worker thread."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def stats(self):
+        return {
+            "saves": len(self.pauses),
+            "written": self.written,
+            "skipped": self.skipped,
+            "mean_pause_ms": 1000 * sum(self.pauses) / len(self.pauses) if self.pauses else 0.0,
+            "max_pause_ms": 1000 * max(self.pauses, default=0.0),
+        }
@@ -0,0 +1,463 @@
+"""Binary save format.
+
+A save file is a fixed header, a series of blocks, each zlib or lzma compressed on its
+own, and an index of where every block starts:
+
+    header   magic b"BLAMESAV", uint16 format version, uint8 compression, uint8 layout
+    summary  float64 timestamp, uint64 seed, bool has seed, uint32 strata_id,
+             uint16 x, y, z, int32 health, 32 byte zone name, uint64 file size
+    blocks   meta, then per strata b"S" + uint32 strata_id, its rooms and b"E"
+    index    uint32 block count, then per block int32 strata_id (-1 for meta),
+             uint64 offset and uint64 length
+    trailer  uint64 offset of the index, b"BLAMEIDX"
+
+The summary describes the player's position and the save itself, so save lists can be
+filled in by reading the first few bytes of each file (read_summary). meta is a tagged
+value holding the whole save document except its rooms. Each room is b"R" and a
+fixed-width record (coordinates, zone, description, exit mask and entity counts)
+followed by its items, enemies and obstacles as tagged values. Strings are written in
+full the first time they appear and by index afterwards; every strata section starts a
+fresh string table, so a section can be decoded without the ones before it.
+
+The blocks are written and read one room at a time (SaveWriter, SaveReader), so encoding
+or decoding a save never holds more than one room's data, and the index lets a reader
+decode a single strata without touching the rest of the file. encode_document and
+decode_document convert whole JSON save documents as built by src.savegame, losslessly.
+"""
+import io
+import lzma
+import mmap
+import os
+import struct
+import weakref
+import zlib
+
+MAGIC = b"BLAMESAV"
+FORMAT_VERSION = 1
+
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSIONS = {None: COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lzma": COMPRESSION_LZMA}
+
+# Which save document the rooms belong to
+LAYOUT_FULL = 0 # "stratas": [{..., "grid": {"x,y,z": room}}]
+LAYOUT_DELTA = 1 # "changed_rooms": {"strata_id": {"x,y,z": room contents}}
+
+HEADER = struct.Struct("<8sHBB")
+SUMMARY = struct.Struct("<dQ?IHHHi32sQ")
+SUMMARY_SIZE_OFFSET = HEADER.size + SUMMARY.size - 8 # size is the last field, a uint64
+INDEX_ENTRY = struct.Struct("<iQQ") # strata_id, offset, length
+TRAILER = struct.Struct("<Q8s") # index offset, INDEX_MAGIC
+INDEX_MAGIC = b"BLAMEIDX"
+META_BLOCK = -1
+# x, y, z, zone, description, exit mask, item count, enemy count, obstacle count
+ROOM_RECORD = struct.Struct("<HHHIIBHHH")
+NO_EXITS = 0xFF # Exit mask of delta rooms, which only save contents
+NEW_STRING = 0xFFFFFFFE # Followed by the string's uint32 length and UTF-8 bytes
+NO_STRING = 0xFFFFFFFF # zone/description of delta rooms, which only save contents
+
+SECTION = b"S"
+ROOM = b"R"
+END_SECTION = b"E"
+
+BLOCK_SIZE = 64 * 1024
+
+UINT32 = struct.Struct("<I")
+UINT64 = struct.Struct("<Q")
+INT64 = struct.Struct("<q")
+FLOAT64 = struct.Struct("<d")
+
+def pack_summary(summary):
+    zone = summary["zone"].encode("utf-8")[:32]
+    seed = summary["seed"]
+    return SUMMARY.pack(summary["timestamp"], seed or 0, seed is not None, summary["strata_id"], summary["x"], summary["y"], summary["z"], summary["health"], zone, summary.get("size", 0))
+
+def unpack_summary(data):
+    timestamp, seed, has_seed, strata_id, x, y, z, health, zone, size = SUMMARY.unpack(data)
+    return {
+        "timestamp": timestamp,
+        "seed": seed if has_seed else None,
+        "strata_id": strata_id,
+        "x": x,
+        "y": y,
+        "z": z,
+        "zone": zone.rstrip(b"\0").decode("utf-8", "replace"),
+        "health": health,
+        "size": size,
+    }
+
+def read_summary(file):
+    """Summary of the save in a binary file object."""
+    magic, format_version, compression, layout = HEADER.unpack(file.read(HEADER.size))
+    check_header(magic, format_version)
+    return unpack_summary(file.read(SUMMARY.size))
+
+def check_header(magic, format_version):
+    if magic != MAGIC:
+        raise ValueError("Not a blame save file.")
+    if format_version != FORMAT_VERSION:
+        raise ValueError(f"Save format version {format_version} is not supported, this game reads version {FORMAT_VERSION}.")
+
+def new_compressor(compression):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compressobj()
+    if compression == COMPRESSION_LZMA:
+        return lzma.LZMACompressor()
+    return None
+
+def new_decompressor(compression):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompressobj()
+    if compression == COMPRESSION_LZMA:
+        return lzma.LZMADecompressor()
+    return None
+
+class SaveWriter:
+    """Writes a save to a binary file object, one room at a time.
+
+    Call write_meta once, then begin_section, write_room for each room and end_section
+    for every strata, then close. close does not close the file. summary is a dict with
+    the keys returned by read_summary; its size is filled in by close.
+    """
+    def __init__(self, file, summary, compression="zlib", layout=LAYOUT_DELTA):
+        self.file = file
+        self.compression = COMPRESSIONS[compression]
+        self.compressor = None
+        self.buffer = bytearray()
+        self.string_ids = {}
+        self.index = [] # (strata_id, offset, length) per block
+        self.block = None # (strata_id, offset) of the block being written
+        self.start = file.tell()
+        file.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.compression, layout))
+        file.write(pack_summary(summary))
+
+    def begin_block(self, strata_id):
+        self.block = (strata_id, self.file.tell())
+        self.compressor = new_compressor(self.compression)
+        self.string_ids = {}
+
+    def end_block(self):
+        self.flush()
+        if self.compressor:
+            self.file.write(self.compressor.flush())
+        strata_id, offset = self.block
+        self.index.append((strata_id, offset, self.file.tell() - offset))
+        self.block = None
+
+    def flush(self):
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        if self.compressor:
+            data = self.compressor.compress(data)
+        self.file.write(data)
+
+    def string_ref(self, string):
+        """(index written in place of string, bytes defining it if it is new)."""
+        string_id = self.string_ids.get(string)
+        if string_id is not None:
+            return string_id, b""
+        self.string_ids[string] = len(self.string_ids)
+        encoded = string.encode("utf-8")
+        return NEW_STRING, UINT32.pack(len(encoded)) + encoded
+
+    def write_string(self, string):
+        string_id, definition = self.string_ref(string)
+        self.buffer += UINT32.pack(string_id)
+        self.buffer += definition
+
+    def write_value(self, value):
+        out = self.buffer
+        if value is None:
+            out += b"N"
+        elif value is True:
+            out += b"T"
+        elif value is False:
+            out += b"F"
+        elif isinstance(value, int):
+            out += b"i"
+            out += INT64.pack(value)
+        elif isinstance(value, float):
+            out += b"d"
+            out += FLOAT64.pack(value)
+        elif isinstance(value, str):
+            out += b"s"
+            self.write_string(value)
+        elif isinstance(value, (list, tuple)):
+            out += b"l"
+            out += UINT32.pack(len(value))
+            for element in value:
+                self.write_value(element)
+        elif isinstance(value, dict):
+            out += b"m"
+            out += UINT32.pack(len(value))
+            for key, element in value.items():
+                self.write_string(key)
+                self.write_value(element)
+        else:
+            raise TypeError(f"Can't save value of type {type(value).__name__}: {value!r}")
+
+    def write_meta(self, meta):
+        self.begin_block(META_BLOCK)
+        self.write_value(meta)
+        self.end_block()
+
+    def begin_section(self, strata_id):
+        self.begin_block(strata_id)
+        self.buffer += SECTION
+        self.buffer += UINT32.pack(strata_id)
+
+    def write_room(self, position, room):
+        """Writes a room as returned by Room.to_json, or Room.contents_to_json for delta saves."""
+        x, y, z = position
+        zone, zone_definition = self.string_ref(room["zone"]) if "zone" in room else (NO_STRING, b"")
+        description, description_definition = self.string_ref(room["description"]) if "description" in room else (NO_STRING, b"")
+        self.buffer += ROOM
+        self.buffer += ROOM_RECORD.pack(x, y, z, zone, description, room.get("exits", NO_EXITS), len(room["items"]), len(room["enemies"]), len(room["obstacles"]))
+        self.buffer += zone_definition
+        self.buffer += description_definition
+        for item in room["items"]:
+            self.write_value(item)
+        for enemy in room["enemies"]:
+            self.write_value(enemy)
+        for direction, obstacle in room["obstacles"].items():
+            self.write_string(direction)
+            self.write_value(obstacle)
+        if len(self.buffer) >= BLOCK_SIZE:
+            self.flush()
+
+    def end_section(self):
+        self.buffer += END_SECTION
+        self.end_block()
+
+    def close(self):
+        index_offset = self.file.tell()
+        self.file.write(UINT32.pack(len(self.index)))
+        for entry in self.index:
+            self.file.write(INDEX_ENTRY.pack(*entry))
+        self.file.write(TRAILER.pack(index_offset, INDEX_MAGIC))
+        end = self.file.tell()
+        self.file.seek(self.start + SUMMARY_SIZE_OFFSET)
+        self.file.write(UINT64.pack(end - self.start))
+        self.file.seek(end)
+
+# Readers of files opened with SaveReader.open, so saving over one can detach it first
+open_readers = weakref.WeakSet()
+
+class SaveReader:
+    """Reads a save from a seekable binary file object, one room at a time.
+
+    Call read_meta, then either iterate sections() or decode single stratas with
+    section(strata_id); each section's rooms must be consumed before reading anything
+    else. Files opened with SaveReader.open are memory mapped, so only the blocks that
+    are read are ever loaded from disk.
+    """
+    def __init__(self, file, path=None):
+        self.file = file
+        self.path = path
+        magic, self.format_version, self.compression, self.layout = HEADER.unpack(file.read(HEADER.size))
+        check_header(magic, self.format_version)
+        self.summary = unpack_summary(file.read(SUMMARY.size))
+        self.decompressor = new_decompressor(self.compression)
+        self.block_end = None # End of the block being read
+        self.buffer = b""
+        self.offset = 0
+        self.strings = []
+        self.index = {} # strata_id -> (offset, length) of its block
+        self.read_index()
+
+    @classmethod
+    def open(cls, file_path):
+        with open(file_path, "rb") as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = cls(mapping, os.path.abspath(file_path))
+        open_readers.add(reader)
+        return reader
+
+    def read_index(self):
+        self.file.seek(-TRAILER.size, os.SEEK_END)
+        index_offset, index_magic = TRAILER.unpack(self.file.read(TRAILER.size))
+        if index_magic != INDEX_MAGIC:
+            raise ValueError("Corrupt save: index is missing, the file may be truncated.")
+        self.file.seek(index_offset)
+        (count,) = UINT32.unpack(self.file.read(UINT32.size))
+        for _ in range(count):
+            strata_id, offset, length = INDEX_ENTRY.unpack(self.file.read(INDEX_ENTRY.size))
+            self.index[strata_id] = (offset, length)
+
+    @property
+    def strata_ids(self):
+        """Ids of the stratas that have a section in this save."""
+        return [strata_id for strata_id in self.index if strata_id != META_BLOCK]
+
+    def open_block(self, strata_id):
+        offset, length = self.index[strata_id]
+        self.file.seek(offset)
+        self.block_end = offset + length
+        self.decompressor = new_decompressor(self.compression)
+        self.buffer = b""
+        self.offset = 0
+        self.strings = []
+
+    def fill(self, size):
+        """Makes sure at least size decoded bytes are buffered."""
+        while len(self.buffer) - self.offset < size:
+            data = self.file.read(min(BLOCK_SIZE, self.block_end - self.file.tell()))
+            if self.decompressor:
+                data = self.decompressor.decompress(data) if data else getattr(self.decompressor, "flush", bytes)()
+            if not data:
+                raise ValueError("Corrupt save: file ends early.")
+            self.buffer = self.buffer[self.offset:] + data
+            self.offset = 0
+
+    def read(self, size):
+        self.fill(size)
+        data = self.buffer[self.offset:self.offset + size]
+        self.offset += size
+        return data
+
+    def read_struct(self, structure):
+        self.fill(structure.size)
+        values = structure.unpack_from(self.buffer, self.offset)
+        self.offset += structure.size
+        return values
+
+    def read_uint32(self):
+        return self.read_struct(UINT32)[0]
+
+    def lookup_string(self, string_id):
+        if string_id == NEW_STRING:
+            string = str(self.read(self.read_uint32()), "utf-8")
+            self.strings.append(string)
+            return string
+        return self.strings[string_id]
+
+    def read_string(self):
+        return self.lookup_string(self.read_uint32())
+
+    def read_value(self):
+        tag = self.read(1)
+        if tag == b"N":
+            return None
+        if tag == b"T":
+            return True
+        if tag == b"F":
+            return False
+        if tag == b"i":
+            return self.read_struct(INT64)[0]
+        if tag == b"d":
+            return self.read_struct(FLOAT64)[0]
+        if tag == b"s":
+            return self.read_string()
+        if tag == b"l":
+            return [self.read_value() for _ in range(self.read_uint32())]
+        if tag == b"m":
+            result = {}
+            for _ in range(self.read_uint32()):
+                key = self.read_string()
+                result[key] = self.read_value()
+            return result
+        raise ValueError(f"Corrupt save: unknown value tag {tag!r}.")
+
+    def read_meta(self):
+        self.open_block(META_BLOCK)
+        return self.read_value()
+
+    def read_section_start(self):
+        tag = self.read(1)
+        if tag != SECTION:
+            raise ValueError(f"Corrupt save: expected a strata section, found {tag!r}.")
+        self.strings = []
+        return self.read_uint32()
+
+    def section(self, strata_id):
+        """Rooms of one strata's section, yielding ((x, y, z), room)."""
+        self.open_block(strata_id)
+        self.read_section_start()
+        return self.rooms()
+
+    def sections(self):
+        """Yields (strata_id, rooms) per strata, where rooms yields ((x, y, z), room)."""
+        for strata_id in self.strata_ids:
+            yield strata_id, self.section(strata_id)
+
+    def detach(self):
+        """Copies a memory mapped file into memory and closes the mapping, so the file
+        can be replaced on disk (which Windows refuses while it is mapped)."""
+        if isinstance(self.file, mmap.mmap):
+            position = self.file.tell()
+            mapping = self.file
+            self.file = io.BytesIO(mapping[:])
+            self.file.seek(position)
+            mapping.close()
+        open_readers.discard(self)
+
+    def close(self):
+        if isinstance(self.file, mmap.mmap):
+            self.file.close()
+        open_readers.discard(self)
+
+    def rooms(self):
+        while self.read(1) == ROOM:
+            x, y, z, zone, description, exits, item_count, enemy_count, obstacle_count = self.read_struct(ROOM_RECORD)
+            room = {}
+            if description != NO_STRING:
+                zone = self.lookup_string(zone)
+                room.update({"description": self.lookup_string(description), "zone": zone, "x": x, "y": y, "z": z})
+            if exits != NO_EXITS:
+                room["exits"] = exits
+            room["items"] = [self.read_value() for _ in range(item_count)]
+            room["enemies"] = [self.read_value() for _ in range(enemy_count)]
+            obstacles = {}
+            for _ in range(obstacle_count):
+                direction = self.read_string()
+                obstacles[direction] = self.read_value()
+            room["obstacles"] = obstacles
+            yield (x, y, z), room
+
+def encode_document(document, summary, compression="zlib"):
+    """Encodes a save document as built by src.savegame.game_to_json."""
+    out = io.BytesIO()
+    meta = dict(document)
+    if "changed_rooms" in meta:
+        writer = SaveWriter(out, summary, compression, LAYOUT_DELTA)
+        changed_rooms = meta.pop("changed_rooms")
+        writer.write_meta(meta)
+        for strata_id, rooms in changed_rooms.items():
+            writer.begin_section(int(strata_id))
+            for key, room in rooms.items():
+                writer.write_room(tuple(map(int, key.split(","))), room)
+            writer.end_section()
+    else:
+        writer = SaveWriter(out, summary, compression, LAYOUT_FULL)
+        meta["stratas"] = [{key: value for key, value in strata.items() if key != "grid"} for strata in document["stratas"]]
+        writer.write_meta(meta)
+        for strata in document["stratas"]:
+            writer.begin_section(strata["strata_id"])
+            for key, room in strata["grid"].items():
+                writer.write_room(tuple(map(int, key.split(","))), room)
+            writer.end_section()
+    writer.close()
+    return out.getvalue()
+
+def is_binary_save(data):
+    return data[:len(MAGIC)] == MAGIC
+
+def release_file(file_path):
+    """Detaches every open reader of file_path, before the file is replaced."""
+    file_path = os.path.abspath(file_path)
+    for reader in list(open_readers):
+        if reader.path == file_path:
+            reader.detach()
+
+def decode_document(data):
+    """Decodes a binary save back into the save document it was encoded from."""
+    reader = SaveReader(io.BytesIO(data))
+    document = reader.read_meta()
+    sections = ((strata_id, {f"{x},{y},{z}": room for (x, y, z), room in rooms}) for strata_id, rooms in reader.sections())
+    if reader.layout == LAYOUT_DELTA:
+        document["changed_rooms"] = {str(strata_id): rooms for strata_id, rooms in sections}
+    else:
+        for strata, (strata_id, rooms) in zip(document["stratas"], sections):
+            strata["grid"] = rooms
+    return document
@@ -0,0 +1,134 @@
+"""Combat rules, and a Monte Carlo estimate of how fights under them go.
+
+The use_weapon and escape commands and estimate_combat all take their numbers from the
+functions here, so the estimate can't drift from the game. The rule functions work on
+plain numbers and elementwise on numpy arrays alike.
+
+A fight as the game plays it: each turn the player either tries to escape, which
+succeeds with the escape command's success_chance, or hits the first enemy still
+standing with their weapon. Then every enemy still standing hits back for its damage,
+unless the player got away or the last enemy fell.
+
+Usage: python -m src.combat [--enemies NAME ...] [--group-size N] [--strength N]
+                            [--health N] [--weapon NAME] [--escape-below HP]
+                            [--escape-chance P] [--fights N] [--seed SEED] [--json]
+"""
+import argparse
+import json
+import numpy as np
+from src.gameobjects.templates import content_template, content_templates
+
+GBE_DAMAGE = 50
+ESCAPE_CHANCE = 0.5
+
+# Fight outcomes in estimate_combat, 0 while still fighting
+WON = 1
+DIED = 2
+ESCAPED = 3
+
+def weapon_damage(strength, weapon_name):
+    """Damage of one hit with the weapon called weapon_name, before enemy durability."""
+    return GBE_DAMAGE if weapon_name.lower() == "gbe" else strength
+
+def damage_dealt(hit, durability):
+    """What a hit takes off an enemy: the part of it that gets past its durability."""
+    difference = hit - durability
+    return difference * (difference > 0)
+
+def counter_damage(damage, standing):
+    """Health the player loses when the enemies with damage hit back; standing marks
+    which of them are still alive. Sums over the last axis."""
+    return (damage * standing).sum(axis=-1) if isinstance(damage, np.ndarray) else sum(d for d, s in zip(damage, standing) if s)
+
+def escapes(roll, chance):
+    """Whether an escape with a uniform [0, 1) roll gets away."""
+    return roll < chance
+
+def estimate_combat(enemies, strength=10, health=100, weapon="", fights=100000, group_size=None, escape_below=0, escape_chance=None, max_turns=200, rng=None):
+    """Plays fights fights at once as array operations and sums them up.
+
+    enemies are Enemy templates or Enemy objects (their current health is used). Without
+    group_size every fight is against all of them, in order; with it, every fight is
+    against group_size of them drawn at random. The player tries to escape instead of
+    attacking while their health is at or below escape_below. escape_chance defaults to
+    that of the escape command. Fights still going after max_turns count as stalemates.
+    """
+    if escape_chance is None:
+        from src.commands import COMMANDS # Imports this module
+        escape_chance = COMMANDS["escape"].success_chance
+    rng = rng or np.random.default_rng()
+    stats = np.array([(enemy.health, enemy.damage, enemy.durability) for enemy in enemies], dtype=np.int64)
+    if group_size:
+        stats = stats[rng.integers(0, len(stats), size=(fights, group_size))]
+    else:
+        stats = np.broadcast_to(stats, (fights,) + stats.shape)
+    enemy_health = stats[..., 0].copy()
+    damage = stats[..., 1]
+    dealt = damage_dealt(weapon_damage(strength, weapon), stats[..., 2])
+    player_health = np.full(fights, health, dtype=np.int64)
+    outcome = np.zeros(fights, dtype=np.int8)
+    turns = np.zeros(fights, dtype=np.int64)
+
+    for turn in range(1, max_turns + 1):
+        active = np.flatnonzero(outcome == 0)
+        if not active.size:
+            break
+        fleeing = player_health[active] <= escape_below
+        got_away = fleeing & escapes(rng.random(len(active)), escape_chance)
+        attackers = active[~fleeing]
+        target = (enemy_health[attackers] > 0).argmax(axis=1)
+        enemy_health[attackers, target] -= dealt[attackers, target]
+
+        standing = enemy_health[active] > 0
+        won = ~fleeing & ~standing.any(axis=1)
+        hit_back = ~won & ~got_away
+        player_health[active] -= counter_damage(damage[active], standing) * hit_back
+        died = hit_back & (player_health[active] <= 0)
+        outcome[active[won]] = WON
+        outcome[active[died]] = DIED
+        outcome[active[got_away]] = ESCAPED
+        turns[active] = turn
+
+    wins = outcome == WON
+    kill_turns = np.bincount(turns[wins])
+    return {
+        "fights": fights,
+        "win": float(wins.mean()),
+        "death": float((outcome == DIED).mean()),
+        "escape": float((outcome == ESCAPED).mean()),
+        "stalemate": float((outcome == 0).mean()),
+        "mean_hp_loss": float(np.minimum(health - player_health, health).mean()),
+        "turns_to_kill": {turn: count / fights for turn, count in enumerate(kill_turns.tolist()) if count},
+    }
+
+def format_estimate(estimate):
+    lines = [
+        f"{estimate['fights']} fights: won {estimate['win']:.1%}, died {estimate['death']:.1%}, "
+        f"escaped {estimate['escape']:.1%}, stalemate {estimate['stalemate']:.1%}",
+        f"health lost: mean {estimate['mean_hp_loss']:.1f}",
+        "turns to kill:",
+    ]
+    lines += [f"  {turn}: {share:.1%}" for turn, share in estimate["turns_to_kill"].items()]
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.combat", description="Estimate how fights go.")
+    parser.add_argument("--enemies", nargs="+", metavar="NAME", help="enemy templates (default: all)")
+    parser.add_argument("--group-size", type=int, help="fight this many enemies drawn from --enemies instead of all of them")
+    parser.add_argument("--strength", type=int, default=10)
+    parser.add_argument("--health", type=int, default=100)
+    parser.add_argument("--weapon", default="GBE")
+    parser.add_argument("--escape-below", type=int, default=0, help="try to escape at or below this health")
+    parser.add_argument("--escape-chance", type=float)
+    parser.add_argument("--fights", type=int, default=100000)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="print the estimate as JSON")
+    args = parser.parse_args(argv)
+
+    enemies = [content_template("enemies", name) for name in args.enemies] if args.enemies else content_templates("enemies")
+    estimate = estimate_combat(enemies, args.strength, args.health, args.weapon, args.fights, args.group_size,
+                               args.escape_below, args.escape_chance, rng=np.random.default_rng(args.seed))
+    print(json.dumps(estimate, indent=4) if args.json else format_estimate(estimate))
+
+if __name__ == "__main__":
+    main()
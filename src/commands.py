@@ -0,0 +1,364 @@
+"""Player commands: parsed Command objects and the registry of their handlers.
+
+Every CommandHandler subclass registers an instance under each of its verbs, so the
+game dispatches a command with one dictionary lookup. Handlers get the Command with its
+argument already split off; the GUI and scripts can build Commands directly instead of
+formatting strings for the game to parse again.
+"""
+from functools import lru_cache
+from src.combat import ESCAPE_CHANCE, counter_damage, damage_dealt, escapes, weapon_damage
+from src.gameobjects.enemies import Enemy
+from src.gameobjects.interactables import Obstacle, CyberneticTerminal
+from src.gameobjects.items import CyberneticImplant
+from src.gameobjects.templates import content_templates
+from src.scheduler import regenerate_later, respawn_later
+from src.world import get_opposite_direction
+
+# verb -> handler
+COMMANDS = {}
+
+class Command:
+    """A verb and everything after it, e.g. Command("get", "data-chip"). Commands are
+    not changed once made, so parsed ones are shared."""
+    __slots__ = ("verb", "argument")
+
+    def __init__(self, verb, argument=None):
+        self.verb = verb
+        self.argument = argument or None
+
+    @classmethod
+    def parse(cls, text):
+        """The Command typed as text, or None if it is blank."""
+        parts = text.split()
+        if not parts:
+            return None
+        return cls(parts[0], " ".join(parts[1:]))
+
+    def __str__(self):
+        return self.verb if self.argument is None else f"{self.verb} {self.argument}"
+
+    def __repr__(self):
+        return f"Command({self.verb!r}, {self.argument!r})"
+
+@lru_cache(maxsize=1024)
+def parse_command(text):
+    """Command.parse, cached since players and scripts repeat the same few commands."""
+    return Command.parse(text)
+
+class Refused(list):
+    """Output of a command that didn't happen, so no time passes for it."""
+
+class CommandHandler:
+    """Runs the commands of its verbs.
+
+    Commands blocked_in_combat are refused while the room has enemies. Commands with a
+    missing_argument message need an argument and get that message without one.
+    Commands that run take cost turns of game time; refused ones take none, and run
+    returns Refused output for commands that turn out not to happen.
+    """
+    verbs = ()
+    blocked_in_combat = False
+    missing_argument = None
+    cost = 1
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        handler = cls()
+        for verb in cls.verbs:
+            COMMANDS[verb] = handler
+
+    def handle(self, game, command, colors):
+        if self.blocked_in_combat and game.player.current_room.enemies:
+            return Refused([("You can't do that during combat!", colors.RED)])
+        if self.missing_argument and command.argument is None:
+            return Refused([(self.missing_argument, colors.YELLOW)])
+        output = self.run(game, command, colors)
+        if self.cost and not isinstance(output, Refused):
+            game.pass_time(self.cost, output, colors)
+        return output
+
+    def run(self, game, command, colors):
+        raise NotImplementedError
+
+def enemies_attack(game, output, colors):
+    enemies = game.player.current_room.enemies
+    for enemy in enemies:
+        game.player.last_damage_source = enemy.name
+        output.append((f"The {enemy.name} attacks you for {enemy.damage} damage.", colors.RED))
+    game.player.health -= counter_damage([enemy.damage for enemy in enemies], [enemy.is_alive() for enemy in enemies])
+
+class Quit(CommandHandler):
+    verbs = ("quit",)
+    cost = 0
+
+    def run(self, game, command, colors):
+        game.is_running = False
+        return [("Exiting.", colors.YELLOW)]
+
+class Look(CommandHandler):
+    """Describes the room. The description, contents and exits are rendered once per
+    room version and colour theme and kept on the room; the "Back:" line depends on the
+    player, not the room, so it is added to the cached lines on every look. Each game
+    counts its hits and misses in game.look_stats."""
+    verbs = ("look",)
+    cost = 0
+
+    def run(self, game, command, colors):
+        room = game.player.current_room
+        cached = room.look_cache
+        if cached is not None and cached[0] == room.version and cached[1] == colors.theme:
+            game.look_stats["hits"] += 1
+            output = list(cached[2])
+        else:
+            game.look_stats["misses"] += 1
+            output = self.render(room, colors)
+            room.look_cache = (room.version, colors.theme, tuple(output))
+
+        if game.player.last_direction_moved:
+            output.append(("\nBack: ", colors.BRIGHT_WHITE))
+            output.append((get_opposite_direction(game.player.last_direction_moved), colors.GREEN))
+
+        return output
+
+    def render(self, room, colors):
+        output = [(room.description, colors.BRIGHT_WHITE)]
+
+        actual_items = room.visible_items
+        npcs_in_room = room.npcs
+
+        if actual_items:
+            output.append(("\nYou see: ", colors.BRIGHT_WHITE))
+            output.append((", ".join([item.name for item in actual_items if item]), colors.YELLOW))
+        if npcs_in_room:
+            output.append(("\nFigures present: ", colors.BRIGHT_WHITE))
+            output.append((", ".join([npc.name for npc in npcs_in_room if npc]), colors.CYAN))
+        if room.enemies:
+            output.append(("\nHostiles: ", colors.BRIGHT_WHITE))
+            output.append((", ".join([f'{enemy.name} ({enemy.health} HP)' for enemy in room.enemies]), colors.RED))
+
+        exits_output = []
+        for direction in sorted(room.directions):
+            if direction in room.obstacles:
+                exits_output.append(f"{direction} (blocked by {room.obstacles[direction].name})")
+            else:
+                exits_output.append(direction)
+        output.append(("\nExits: ", colors.BRIGHT_WHITE))
+        output.append((", ".join(exits_output), colors.GREEN))
+        return output
+
+class Move(CommandHandler):
+    verbs = ("move",)
+    blocked_in_combat = True
+    missing_argument = "Move where?"
+
+    def run(self, game, command, colors):
+        player = game.player
+        direction = command.argument.split()[0]
+        if direction in player.current_room.obstacles:
+            obstacle = player.current_room.obstacles[direction]
+            if obstacle.name == "strata exit":
+                return Refused([("You stand before a massive pillar. It leads to another strata. You must ascend the partial megastructure in order to reach the next strata.", colors.YELLOW)])
+            return Refused([(f"The way {direction} is blocked by a {obstacle.name}.", colors.RED)])
+        if direction not in player.current_room.exits:
+            return Refused([("You can't go that way.", colors.RED)])
+        new_room = player.current_room.exits[direction]
+        player.current_room = new_room
+        player.x = new_room.x
+        player.y = new_room.y
+        player.z = new_room.z
+        player.last_direction_moved = direction
+        return [(f"You move {direction}.", colors.GREEN)] + COMMANDS["look"].run(game, command, colors)
+
+class Get(CommandHandler):
+    verbs = ("get",)
+    blocked_in_combat = True
+    missing_argument = "Get what?"
+
+    def run(self, game, command, colors):
+        item = game.player.current_room.find_visible_item(command.argument)
+        if not item:
+            return Refused([("You don't see that here.", colors.RED)])
+        game.player.add_item(item)
+        game.player.current_room.remove_item(item)
+        return [(f"You picked up the {item.name}.", colors.GREEN)]
+
+class Inventory(CommandHandler):
+    verbs = ("inventory", "inv")
+    cost = 0
+
+    def run(self, game, command, colors):
+        player = game.player
+        if not player.inventory:
+            return [("You are not carrying anything.", colors.YELLOW)]
+        output = [("You are carrying:", colors.BRIGHT_WHITE)]
+        for item in player.inventory:
+            log_indicator = " (log)" if item.log else ""
+            output.append((f"- {item.name}{log_indicator}: {item.description}", colors.YELLOW))
+        if player.installed_implants:
+            output.append(("\nInstalled Implants:", colors.BRIGHT_WHITE))
+            for implant in player.installed_implants:
+                output.append((f"- {implant.name}: {implant.description}", colors.CYAN))
+        return output
+
+class Status(CommandHandler):
+    verbs = ("status",)
+    cost = 0
+
+    def run(self, game, command, colors):
+        return [
+            (f"Health: {game.player.health}", colors.GREEN),
+            (f"Energy: {game.player.energy}", colors.YELLOW),
+            (f"Strength: {game.player.strength}", colors.CYAN),
+        ]
+
+class Scan(CommandHandler):
+    verbs = ("scan",)
+    blocked_in_combat = True
+    missing_argument = "Scan what?"
+
+    def run(self, game, command, colors):
+        terminal = game.player.current_room.find_terminal(command.argument)
+        if not terminal:
+            return Refused([("You can't scan that.", colors.RED)])
+        output = [(f"You scan the {terminal.name}...", colors.BRIGHT_WHITE), (terminal.lore_message, colors.BRIGHT_WHITE)]
+        if isinstance(terminal, CyberneticTerminal):
+            output.append(("This terminal can be used to install cybernetic implants. Use 'install [implant_name]'.", colors.BRIGHT_WHITE))
+        return output
+
+class Read(CommandHandler):
+    verbs = ("read",)
+    missing_argument = "Read what?"
+
+    def run(self, game, command, colors):
+        item = game.player.find_item_by_name(command.argument)
+        if not item or not item.log:
+            return Refused([("You can't read that.", colors.RED)])
+        return [(f"The log on the {item.name} reads:", colors.BRIGHT_WHITE), (f'"{item.log}"', colors.YELLOW)]
+
+class Install(CommandHandler):
+    verbs = ("install",)
+    cost = 2
+    missing_argument = "Install what?"
+
+    def run(self, game, command, colors):
+        implants = game.player.find_items_by_name(command.argument)
+        implant = next((item for item in implants if isinstance(item, CyberneticImplant)), None)
+        if not implant:
+            return Refused([("You don't have that implant in your inventory.", colors.RED)])
+        terminal = game.player.current_room.cybernetic_terminal
+        if not terminal:
+            return Refused([("There is no cybernetic terminal here to install implants.", colors.RED)])
+        message = terminal.install_implant(game.player, implant)
+        game.player.installed_implants.append(implant)
+        return [(message, colors.GREEN)]
+
+class Scavenge(CommandHandler):
+    verbs = ("scavenge",)
+    cost = 2
+    missing_argument = "Scavenge what?"
+    implant_chance = 0.4
+    infection_chance = 0.2
+    infection_turns = 50
+
+    def run(self, game, command, colors):
+        player = game.player
+        if not player.has_connection_implant:
+            return Refused([("You need a Neural Interface (connection implant) to scavenge corpses.", colors.RED)])
+        enemies = player.current_room.find_enemies(command.argument)
+        corpse = next((enemy for enemy in enemies if not enemy.is_alive()), None)
+        if not corpse:
+            return Refused([("There is no defeated enemy by that name to scavenge.", colors.RED)])
+
+        player.health -= 5
+        player.last_damage_source = "scavenging"
+        output = [(f"You attempt to scavenge the {corpse.name}'s corpse, taking 5 damage.", colors.YELLOW)]
+        if game.rng.random() < self.implant_chance:
+            found_implant = CyberneticImplant(game.rng.choice(content_templates("cybernetic_implants")))
+            player.add_item(found_implant)
+            output.append((f"You found a {found_implant.name} and added it to your inventory!", colors.GREEN))
+        else:
+            output.append(("You found nothing of value.", colors.YELLOW))
+        if game.rng.random() < self.infection_chance and "infected" not in player.ailments:
+            game.afflict("infected", self.infection_turns)
+            output.append(("The corpse's fluids get into the cut. You are infected.", colors.RED))
+        return output
+
+class Talk(CommandHandler):
+    verbs = ("talk",)
+    missing_argument = "Talk to whom?"
+
+    def run(self, game, command, colors):
+        npc = game.player.current_room.find_npc(command.argument)
+        if not npc:
+            return Refused([("There is no one here to talk to by that name.", colors.RED)])
+        return [(f"{npc.name} says: {game.rng.choice(npc.dialogue)}", colors.CYAN)]
+
+class Attack(CommandHandler):
+    verbs = ("attack",)
+    cost = 0
+    missing_argument = "Attack what?"
+
+    def run(self, game, command, colors):
+        room = game.player.current_room
+        target = room.find_enemy(command.argument) or room.find_obstacle(command.argument)
+        if not target:
+            return Refused([("There is nothing here to attack by that name.", colors.RED)])
+        game.current_attack_target = target
+        # This will trigger the GUI to show weapon selection
+        return [(f"You target the {target.name}. Choose a weapon.", colors.BRIGHT_WHITE)]
+
+class UseWeapon(CommandHandler):
+    verbs = ("use_weapon",)
+
+    def run(self, game, command, colors):
+        if not game.current_attack_target:
+            return Refused([("No target selected for attack.", colors.RED)])
+        if command.argument is None:
+            return Refused([("Use what weapon?", colors.YELLOW)])
+
+        player = game.player
+        weapon = player.find_item_by_name(command.argument)
+        if not weapon:
+            return Refused([(f"You don't have a {command.argument}.", colors.RED)])
+
+        player_damage = weapon_damage(player.strength, weapon.name)
+        output = []
+        room = player.current_room
+        target = game.current_attack_target
+        if isinstance(target, Enemy):
+            effective_damage = damage_dealt(player_damage, target.durability)
+            target.health -= effective_damage
+            room.touch()
+            output.append((f"You attack the {target.name} with {weapon.name} for {effective_damage} damage.", colors.GREEN))
+            if not target.is_alive():
+                output.append((f"The {target.name} is destroyed.", colors.GREEN))
+                room.remove_enemy(target)
+                respawn_later(game, room, target)
+            enemies_attack(game, output, colors) # All remaining enemies attack
+        elif isinstance(target, Obstacle):
+            target.health -= player_damage
+            room.touch()
+            output.append((f"You attack the {target.name} with {weapon.name} for {player_damage} damage.", colors.GREEN))
+            if target.is_destroyed():
+                output.append((f"The {target.name} is destroyed.", colors.GREEN))
+                room.remove_obstacle(room.obstacle_direction(target))
+            else:
+                regenerate_later(game, room, room.obstacle_direction(target))
+
+        game.current_attack_target = None # Clear target after attack
+        return output
+
+class Escape(CommandHandler):
+    verbs = ("escape",)
+    success_chance = ESCAPE_CHANCE
+
+    def run(self, game, command, colors):
+        room = game.player.current_room
+        if not room.enemies:
+            return Refused([("You are not in combat.", colors.YELLOW)])
+        if escapes(game.rng.random(), self.success_chance):
+            room.enemies = [] # Clear enemies
+            return [("You successfully escaped from combat!", colors.GREEN)]
+        output = [("You failed to escape!", colors.RED)]
+        enemies_attack(game, output, colors) # Enemies get a free attack
+        return output
@@ -0,0 +1,84 @@
+"""Connected components of a strata's exit graph.
+
+Rooms are numbered by their flat index in a [x, y, z] layout array. Obstacles never cut a
+link: they can be destroyed, so a blocked exit still connects two rooms, just at a cost.
+"""
+import numpy as np
+
+class UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+        self.components = size
+
+    def find(self, node):
+        parent = self.parent
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def union(self, a, b):
+        """Joins the components of a and b; returns False if they were already joined."""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+        self.components -= 1
+        return True
+
+def link_arrays(layout):
+    """(links, flat index offset to the linked room, cells that may hold a link) per direction."""
+    width, height, depth = layout.shape
+    inside = np.ones(layout.shape, dtype=bool)
+    north_inside, east_inside, up_inside = inside.copy(), inside.copy(), inside.copy()
+    north_inside[:, 0, :] = False
+    east_inside[-1, :, :] = False
+    up_inside[:, :, -1] = False
+    return [
+        (layout.north, -depth, north_inside),
+        (layout.east, height * depth, east_inside),
+        (layout.up, 1, up_inside),
+    ]
+
+def exit_graph(layout):
+    union_find = UnionFind(layout.zone_index.size)
+    for links, offset, inside in link_arrays(layout):
+        for a in np.flatnonzero(links & inside).tolist():
+            union_find.union(a, a + offset)
+    return union_find
+
+def component_labels(union_find, shape):
+    """Array of component ids, numbered from 0 in order of each component's first room."""
+    roots = np.array([union_find.find(node) for node in range(len(union_find.parent))])
+    unique_roots, first_seen, labels = np.unique(roots, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first_seen))
+    return order[labels].reshape(shape).astype(np.int32)
+
+def connect(layout, rng, positions=None):
+    """Adds missing links, in random order, until every room in positions shares a component
+    (or, without positions, until the layout is one component). Returns component ids."""
+    union_find = exit_graph(layout)
+    targets = [int(np.ravel_multi_index(position, layout.shape)) for position in positions or ()]
+
+    def joined():
+        if positions is None:
+            return union_find.components == 1
+        root = union_find.find(targets[0])
+        return all(union_find.find(target) == root for target in targets)
+
+    if not joined():
+        arrays = link_arrays(layout)
+        candidates = [(which, a) for which, (links, offset, inside) in enumerate(arrays)
+                      for a in np.flatnonzero(inside & ~links).tolist()]
+        for index in rng.permutation(len(candidates)).tolist():
+            which, a = candidates[index]
+            links, offset, inside = arrays[which]
+            if union_find.union(a, a + offset):
+                links.flat[a] = True
+                if joined():
+                    break
+    return component_labels(union_find, layout.shape)
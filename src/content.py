@@ -0,0 +1,141 @@
+"""Game content from data/content.json, loaded on first use.
+
+The JSON is validated and compiled into a CompiledContent (interned strings, zone
+tables, a tuple per category) that is pickled to CONTENT_CACHE and reused while
+content.json is unchanged. The cache records the file's mtime and size, and the
+SHA-256 of its bytes so a file that was only touched keeps its cache.
+"""
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from collections.abc import Mapping
+
+CONTENT_FILE = os.path.join(os.path.dirname(__file__), "data", "content.json")
+CONTENT_CACHE = os.path.join(os.path.dirname(__file__), "data", "content.cache")
+# Bump whenever CompiledContent changes, so older caches are rebuilt
+CACHE_VERSION = 1
+
+# Top-level keys of content.json and the type of each
+CATEGORIES = {
+    "room_descriptions": dict,
+    "lore_messages": list,
+    "item_logs": list,
+    "telemetry_dialogue": list,
+    "items": dict,
+    "enemies": list,
+    "obstacles": list,
+    "npcs": list,
+    "cybernetic_implants": list,
+}
+# Fields every entry of a category of game objects must have
+ENTRY_FIELDS = {
+    "items": ("name", "description"),
+    "enemies": ("name", "description", "health", "damage", "durability"),
+    "obstacles": ("name", "description", "strength_required"),
+    "npcs": ("name", "description", "dialogue"),
+    "cybernetic_implants": ("name", "description", "stat_bonus", "implant_type"),
+}
+
+def intern_strings(value):
+    """value with every string interned and every list turned into a tuple."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, list):
+        return tuple(intern_strings(item) for item in value)
+    if isinstance(value, dict):
+        return {sys.intern(key): intern_strings(item) for key, item in value.items()}
+    return value
+
+def validate(data):
+    for category, kind in CATEGORIES.items():
+        if not isinstance(data.get(category), kind):
+            raise ValueError(f"content.json: {category} must be a {kind.__name__}")
+    for zone, descriptions in data["room_descriptions"].items():
+        if not descriptions or not all(isinstance(description, str) for description in descriptions):
+            raise ValueError(f"content.json: zone {zone} needs a list of descriptions")
+    for category, fields in ENTRY_FIELDS.items():
+        entries = data[category].values() if isinstance(data[category], dict) else data[category]
+        names = set()
+        for entry in entries:
+            missing = [field for field in fields if field not in entry]
+            if missing:
+                raise ValueError(f"content.json: {category} entry {entry.get('name')} lacks {', '.join(missing)}")
+            if category != "items" and entry["name"] in names:
+                raise ValueError(f"content.json: two {category} entries are named {entry['name']}")
+            names.add(entry["name"])
+
+class CompiledContent:
+    """Validated content. data maps every category to its entries, with lists as tuples;
+    zones and room_descriptions list the zones and their descriptions in file order."""
+    def __init__(self, data):
+        validate(data)
+        self.data = intern_strings(data)
+        self.zones = tuple(self.data["room_descriptions"])
+        self.room_descriptions = tuple(self.data["room_descriptions"][zone] for zone in self.zones)
+
+def read_cache():
+    """The cache record, or None if there is no usable cache."""
+    try:
+        with open(CONTENT_CACHE, "rb") as f:
+            cache = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ValueError):
+        return None
+    return cache if cache.get("version") == CACHE_VERSION else None
+
+def write_cache(stat, sha256, content):
+    cache = {"version": CACHE_VERSION, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256, "content": content}
+    temp_path = f"{CONTENT_CACHE}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb") as f:
+            pickle.dump(cache, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, CONTENT_CACHE)
+    except OSError:
+        # A read-only install just compiles on every start
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+
+def compile_content():
+    """CompiledContent of content.json, from the cache when it is up to date."""
+    stat = os.stat(CONTENT_FILE)
+    cache = read_cache()
+    if cache is not None and (cache["mtime_ns"], cache["size"]) == (stat.st_mtime_ns, stat.st_size):
+        return cache["content"]
+    with open(CONTENT_FILE, "rb") as f:
+        raw = f.read()
+    sha256 = hashlib.sha256(raw).hexdigest()
+    if cache is not None and cache["sha256"] == sha256:
+        content = cache["content"] # Touched but unchanged
+    else:
+        content = CompiledContent(json.loads(raw))
+    write_cache(stat, sha256, content)
+    return content
+
+compiled = None
+compile_lock = threading.Lock()
+
+def load_content():
+    """The CompiledContent, compiled on first use."""
+    global compiled
+    if compiled is None:
+        with compile_lock:
+            if compiled is None:
+                compiled = compile_content()
+    return compiled
+
+class LazyContent(Mapping):
+    """Read-only view of the content categories that loads them on first access."""
+    def __getitem__(self, category):
+        return load_content().data[category]
+
+    def __iter__(self):
+        return iter(load_content().data)
+
+    def __len__(self):
+        return len(load_content().data)
+
+CONTENT = LazyContent()
@@ -1,41 +1,40 @@
-class Enemy:
-    def __init__(self, name, description, health, damage, durability):
-        self.name = name
-        self.description = description
-        self.health = health
-        self.damage = damage
-        self.durability = durability
+from src.gameobjects.templates import Templated
+
+class Enemy(Templated):
+    template_kind = "enemies"
+    template_fields = ("name", "description", "damage", "durability")
+    json_fields = ("health",)
+    home = None # Position of the room a roaming enemy belongs to, see src.roaming
+
+    def __init__(self, template, health=None):
+        self.template = template
+        self.health = template.health if health is None else health
 
     def is_alive(self):
         return self.health > 0
 
     def to_json(self):
-        return {
-            "name": self.name,
-            "description": self.description,
-            "health": self.health,
-            "damage": self.damage,
-            "durability": self.durability
-        }
+        data = self.template_to_json()
+        data["health"] = self.health
+        return data
 
     @classmethod
     def from_json(cls, data):
-        return cls(data["name"], data["description"], data["health"], data["damage"], data["durability"])
+        return cls(cls.template_from_json(data), data["health"])
+
+class NPC(Templated):
+    template_kind = "npcs"
+    template_fields = ("name", "description", "dialogue")
+    json_fields = ()
 
-class NPC:
-    def __init__(self, name, description, dialogue):
-        self.name = name
-        self.description = description
-        self.dialogue = dialogue
+    def __init__(self, template):
+        self.template = template
 
     def to_json(self):
-        return {
-            "name": self.name,
-            "description": self.description,
-            "dialogue": self.dialogue,
-            "__class__": self.__class__.__name__
-        }
+        data = self.template_to_json()
+        data["__class__"] = self.__class__.__name__
+        return data
 
     @classmethod
     def from_json(cls, data):
-        return cls(data["name"], data["description"], data["dialogue"])
\ No newline at end of file
+        return cls(cls.template_from_json(data))
@@ -1,24 +1,29 @@
+from src.gameobjects.registry import REGISTRY, BUILDERS
+# Imported so every game object class is registered
 from src.gameobjects.items import Item, CyberneticImplant
 from src.gameobjects.interactables import Terminal, CyberneticTerminal, Obstacle
-from src.gameobjects.enemies import NPC
+from src.gameobjects.enemies import Enemy, NPC
 
-def create_from_json(data):
+def class_from_json(data):
     class_name = data.get("__class__")
     if not class_name:
         if "dialogue" in data:
-            return NPC.from_json(data)
+            return NPC
         raise ValueError(f"No __class__ found in data: {data}")
+    cls = REGISTRY.get(class_name)
+    if cls is None:
+        raise ValueError(f"Unknown class name: {class_name}")
+    return cls
+
+def create_from_json(data):
+    return class_from_json(data).from_json(data)
 
-    if class_name == "CyberneticImplant":
-        return CyberneticImplant.from_json(data)
-    elif class_name == "Terminal":
-        return Terminal.from_json(data)
-    elif class_name == "CyberneticTerminal":
-        return CyberneticTerminal.from_json(data)
-    elif class_name == "Obstacle":
-        return Obstacle.from_json(data)
-    elif class_name == "NPC":
-        return NPC.from_json(data)
-    elif class_name == "Item":
-        return Item.from_json(data)
-    raise ValueError(f"Unknown class name: {class_name}")
\ No newline at end of file
+def create_many_from_json(records):
+    """Objects for a list of records of any registered classes, in order."""
+    objects = []
+    for data in records:
+        build = BUILDERS.get(data.get("__class__"))
+        if build is None:
+            build = BUILDERS[class_from_json(data).__name__]
+        objects.append(build(data))
+    return objects
@@ -1,8 +1,10 @@
 from src.gameobjects.items import Item, CyberneticImplant
 
 class Terminal(Item):
-    def __init__(self, name, description, lore_message):
-        super().__init__(name, description)
+    json_fields = ("log", "lore_message")
+
+    def __init__(self, template, lore_message):
+        super().__init__(template)
         self.lore_message = lore_message
 
     def to_json(self):
@@ -14,11 +16,13 @@ class Terminal(Item):
 
     @classmethod
     def from_json(cls, data):
-        return cls(data["name"], data["description"], data["lore_message"])
+        return cls(cls.template_from_json(data), data["lore_message"])
 
 class CyberneticTerminal(Terminal):
-    def __init__(self, name, description, lore_message):
-        super().__init__(name, description, lore_message)
+    json_fields = ("log", "lore_message")
+
+    def __init__(self, template, lore_message):
+        super().__init__(template, lore_message)
 
     def install_implant(self, player, implant):
         if implant.implant_type == "connection":
@@ -26,7 +30,7 @@ class CyberneticTerminal(Terminal):
         for stat, bonus in implant.stat_bonus.items():
             if hasattr(player, stat):
                 setattr(player, stat, getattr(player, stat) + bonus)
-        player.inventory.remove(implant)
+        player.remove_item(implant)
         return f"Successfully installed {implant.name}! Your stats have been updated."
 
     def to_json(self):
@@ -34,13 +38,16 @@ class CyberneticTerminal(Terminal):
 
     @classmethod
     def from_json(cls, data):
-        return cls(data["name"], data["description"], data["lore_message"])
+        return cls(cls.template_from_json(data), data["lore_message"])
 
 class Obstacle(Item):
-    def __init__(self, name, description, strength_required):
-        super().__init__(name, description)
-        self.strength_required = strength_required
-        self.health = strength_required
+    template_kind = "obstacles"
+    template_fields = ("name", "description", "strength_required")
+    json_fields = ("log", "health")
+
+    def __init__(self, template):
+        super().__init__(template)
+        self.health = template.strength_required
 
     def is_destroyed(self):
         return self.health <= 0
@@ -48,13 +55,13 @@ class Obstacle(Item):
     def to_json(self):
         data = super().to_json()
         data.update({
-            "strength_required": self.strength_required,
             "health": self.health
         })
         return data
 
     @classmethod
     def from_json(cls, data):
-        obstacle = cls(data["name"], data["description"], data["strength_required"])
+        obstacle = cls(cls.template_from_json(data))
+        obstacle.log = data["log"]
         obstacle.health = data["health"]
-        return obstacle
\ No newline at end of file
+        return obstacle
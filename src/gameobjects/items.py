@@ -1,35 +1,36 @@
-class Item:
-    def __init__(self, name, description, log=None):
-        self.name = name
-        self.description = description
+from src.gameobjects.templates import Templated
+
+class Item(Templated):
+    template_kind = "items"
+    template_fields = ("name", "description")
+    json_fields = ("log",)
+
+    def __init__(self, template, log=None):
+        self.template = template
         self.log = log
 
     def to_json(self):
-        return {
-            "name": self.name,
-            "description": self.description,
+        data = self.template_to_json()
+        data.update({
             "log": self.log,
             "__class__": self.__class__.__name__
-        }
+        })
+        return data
 
     @classmethod
     def from_json(cls, data):
-        return Item(data["name"], data["description"], data["log"])
+        return cls(cls.template_from_json(data), data["log"])
 
 class CyberneticImplant(Item):
-    def __init__(self, name, description, stat_bonus, implant_type):
-        super().__init__(name, description)
-        self.stat_bonus = stat_bonus
-        self.implant_type = implant_type
+    template_kind = "cybernetic_implants"
+    template_fields = ("name", "description", "stat_bonus", "implant_type")
+    json_fields = ("log",)
 
-    def to_json(self):
-        data = super().to_json()
-        data.update({
-            "stat_bonus": self.stat_bonus,
-            "implant_type": self.implant_type
-        })
-        return data
+    def __init__(self, template):
+        super().__init__(template)
 
     @classmethod
     def from_json(cls, data):
-        return cls(data["name"], data["description"], data["stat_bonus"], data["implant_type"])
\ No newline at end of file
+        implant = cls(cls.template_from_json(data))
+        implant.log = data["log"]
+        return implant
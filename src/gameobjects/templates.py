@@ -0,0 +1,120 @@
+"""Flyweight templates holding the fixed fields of game objects.
+
+Every enemy, NPC, implant, obstacle and item made from the same CONTENT entry shares
+one immutable Template with its name, description and other fixed fields, and keeps
+only its mutable state (health, logs, lore) itself. Objects made from a CONTENT
+template save just the template's id next to that state. Templates of objects that
+are not in CONTENT (strata exits, records of saves made before templates) are interned
+by their fields, so equal objects still share one, and their objects save the fields.
+"""
+import json
+from operator import attrgetter
+from types import MappingProxyType
+from src.content import load_content
+from src.gameobjects.registry import Serializable
+
+# CONTENT tables with a template per entry. Lists are keyed by each entry's name,
+# "items" by the entry's key.
+CONTENT_KINDS = ("items", "cybernetic_implants", "obstacles", "enemies", "npcs")
+
+# kind -> {template id -> Template}, built from CONTENT on first use
+content_table = {}
+# (kind, fields as JSON) -> Template not in CONTENT
+interned = {}
+
+def freeze(value):
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    return value
+
+def thaw(value):
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    return value
+
+class Template:
+    """Immutable fields of one kind of game object. id is None unless it is in CONTENT."""
+    def __init__(self, kind, template_id, fields):
+        self.__dict__.update({name: freeze(value) for name, value in fields.items()})
+        self.__dict__.update(kind=kind, id=template_id)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.kind} templates are immutable")
+
+    def __reduce__(self):
+        # Unpickles to the shared template instead of a copy
+        if self.id is not None:
+            return content_template, (self.kind, self.id)
+        return intern_template, (self.kind, self.fields_to_json(self.__dict__.keys() - {"kind", "id"}))
+
+    def fields_to_json(self, names):
+        return {name: thaw(getattr(self, name)) for name in names}
+
+    def matches(self, fields):
+        return all(getattr(self, name, None) == freeze(value) for name, value in fields.items())
+
+def load_content_templates():
+    data = load_content().data
+    for kind in CONTENT_KINDS:
+        entries = data[kind].items() if isinstance(data[kind], dict) else ((entry["name"], entry) for entry in data[kind])
+        content_table[kind] = {template_id: Template(kind, template_id, entry) for template_id, entry in entries}
+
+def content_templates(kind):
+    """Templates of a CONTENT table, in CONTENT order."""
+    if not content_table:
+        load_content_templates()
+    return tuple(content_table[kind].values())
+
+def content_template(kind, template_id):
+    if not content_table:
+        load_content_templates()
+    template = content_table[kind].get(template_id)
+    if template is None:
+        raise ValueError(f"Unknown {kind} template: {template_id}")
+    return template
+
+def intern_template(kind, fields):
+    """The shared template with these fields: the CONTENT one if an entry of the same
+    name has them, otherwise one interned for fields."""
+    if not content_table:
+        load_content_templates()
+    for template in content_table.get(kind, {}).values():
+        if template.name == fields.get("name") and template.matches(fields):
+            return template
+    key = (kind, json.dumps(fields, sort_keys=True))
+    template = interned.get(key)
+    if template is None:
+        template = interned[key] = Template(kind, None, fields)
+    return template
+
+class Templated(Serializable):
+    """Base of game objects made from a template of template_kind.
+
+    template_fields lists the fields read from the template, each exposed as a read-only
+    attribute; json_fields lists only the object's own state. to_json writes the
+    template's id, or the template_fields of templates that are not in CONTENT, and
+    records with either shape load.
+    """
+    template_kind = None
+    template_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        for field in cls.__dict__.get("template_fields", ()):
+            setattr(cls, field, property(attrgetter("template." + field)))
+        super().__init_subclass__(**kwargs)
+
+    def template_to_json(self):
+        if self.template.id is not None:
+            return {"template": self.template.id}
+        return self.template.fields_to_json(self.template_fields)
+
+    @classmethod
+    def template_from_json(cls, data):
+        template_id = data.get("template")
+        if template_id is not None:
+            return content_template(cls.template_kind, template_id)
+        return intern_template(cls.template_kind, {field: data[field] for field in cls.template_fields})
@@ -0,0 +1,67 @@
+"""Runs the game without a display: commands come one per line from a script file or
+stdin and the output is printed as plain text.
+
+Blank lines and lines starting with # are skipped. Input that is not a terminal is
+echoed after a "> " prompt, so the output of a script reads as a transcript.
+
+Usage: python -m src.headless [--seed SEED] [--stratas N] [--load SAVE_FILE] [SCRIPT]
+"""
+import argparse
+import sys
+from src.colors import Colors
+from src.game import Game
+from src.savegame import load_game
+
+def run_commands(game, lines, out=None, echo=False, colors=None):
+    """Feeds lines to game.handle_command until they run out, the player dies or quits.
+    Returns the number of commands run."""
+    out = out or sys.stdout
+    colors = colors or Colors()
+    count = 0
+    for line in lines:
+        command = line.strip()
+        if not command or command.startswith("#"):
+            continue
+        if echo:
+            out.write(f"> {command}\n")
+        for text, _ in game.handle_command(command, colors):
+            out.write(text + "\n")
+        count += 1
+        if not game.is_running:
+            break
+        if not game.player.is_alive():
+            out.write("You have died.\n")
+            break
+    return count
+
+def prompted_lines(stream, out):
+    while True:
+        out.write("> ")
+        out.flush()
+        line = stream.readline()
+        if not line:
+            return
+        yield line
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.headless", description="Play without a display.")
+    parser.add_argument("script", nargs="?", help="file of commands, one per line (default: stdin)")
+    parser.add_argument("--seed", type=int, help="world seed of a new game")
+    parser.add_argument("--stratas", type=int, default=1, help="number of stratas of a new game")
+    parser.add_argument("--load", metavar="SAVE_FILE", help="continue a saved game instead")
+    args = parser.parse_args(argv)
+
+    game = load_game(args.load) if args.load else Game(seed=args.seed, world_options={"num_stratas": args.stratas})
+    colors = Colors()
+    run_commands(game, ["look"], colors=colors)
+    if args.script:
+        with open(args.script, "r") as f:
+            run_commands(game, f, echo=True, colors=colors)
+    elif sys.stdin.isatty():
+        run_commands(game, prompted_lines(sys.stdin, sys.stdout), colors=colors)
+    else:
+        run_commands(game, sys.stdin, echo=True, colors=colors)
+    game.all_stratas.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Case-folded name lookups over collections of named game objects."""
+
+class NameIndex:
+    """Case-folded name -> the objects with that name, in the order they were added, so
+    find returns the same object a front-to-back scan of the collection would."""
+    __slots__ = ("names",)
+
+    def __init__(self, objects=()):
+        self.names = {}
+        for obj in objects:
+            self.add(obj)
+
+    def add(self, obj):
+        key = obj.name.casefold()
+        objects = self.names.get(key)
+        if objects is None:
+            self.names[key] = [obj]
+        else:
+            objects.append(obj)
+
+    def remove(self, obj):
+        key = obj.name.casefold()
+        objects = self.names[key]
+        objects.remove(obj)
+        if not objects:
+            del self.names[key]
+
+    def find(self, name):
+        """The first object called name in any case, or None."""
+        objects = self.names.get(name.casefold())
+        return objects[0] if objects else None
+
+    def find_all(self, name):
+        return self.names.get(name.casefold(), ())
+
+    def __len__(self):
+        return sum(len(objects) for objects in self.names.values())
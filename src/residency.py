@@ -0,0 +1,184 @@
+"""Keeps only recently used stratas in memory and spills the rest to a cache file."""
+import pickle
+import tempfile
+from collections import OrderedDict
+from collections.abc import Sequence
+from src.world import LayoutGrid, ChunkedGrid
+
+# Rough cost of one built room with its contents, see benchmarks/bench_room_memory.py
+ROOM_SIZE_ESTIMATE = 700
+
+def estimate_strata_size(strata):
+    """Approximate bytes held by a strata: its layout arrays plus every built room."""
+    grid = strata.grid
+    if isinstance(grid, LayoutGrid):
+        layouts = [grid.layout]
+    elif isinstance(grid, ChunkedGrid):
+        layouts = list(grid.layouts.values())
+    else:
+        return len(grid) * ROOM_SIZE_ESTIMATE
+    array_bytes = sum(array.nbytes for layout in layouts for array in (layout.zone_index, layout.description_index, layout.north, layout.east, layout.up))
+    rooms = grid.rooms if isinstance(grid, (LayoutGrid, ChunkedGrid)) else grid
+    return array_bytes + len(rooms) * ROOM_SIZE_ESTIMATE
+
+class StrataStore(Sequence):
+    """All stratas of a world, indexed by strata_id, with at most max_resident in memory.
+
+    The current strata and the `neighbours` stratas on each side of it are kept resident
+    and prefetched. Other stratas are evicted least recently used first whenever more than
+    max_resident are loaded or their estimated size exceeds memory_budget bytes; if the
+    budget still does not fit, protected neighbours are evicted too, but never the current
+    strata. Evicted stratas are pickled to a cache file and paged back in on access, so
+    callers should keep strata ids rather than Strata objects across turns.
+
+    With a loader, the world has count stratas of which only those passed in stratas
+    exist yet; the rest are built by loader.load(strata_id) the first time they are
+    accessed, and loader.changed_rooms(strata_id) reports their changes for saving.
+    """
+    def __init__(self, stratas=(), current_id=None, max_resident=3, neighbours=1, memory_budget=None, cache_path=None, count=0, loader=None):
+        self.max_resident = max_resident
+        self.neighbours = neighbours
+        self.memory_budget = memory_budget
+        self.resident = OrderedDict() # strata_id -> Strata, least recently used first
+        self.sizes = {} # strata_id -> estimated bytes of resident stratas
+        self.spilled = {} # strata_id -> (offset, length) in the cache file
+        self.spilled_changes = {} # strata_id -> changed rooms of spilled stratas, for saving
+        self.count = count
+        self.loader = loader
+        self.unloaded = set(range(count)) if loader else set() # strata_ids the loader has yet to build
+        self.current_id = current_id
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if cache_path:
+            self.cache_file = open(cache_path, "w+b")
+        else:
+            self.cache_file = tempfile.TemporaryFile(prefix="blame-stratas-")
+        for strata in stratas:
+            self.add(strata)
+
+    def add(self, strata):
+        self.count = max(self.count, strata.strata_id + 1)
+        self.unloaded.discard(strata.strata_id)
+        self.resident[strata.strata_id] = strata
+        self.sizes[strata.strata_id] = estimate_strata_size(strata)
+        self.enforce_limits()
+
+    def get(self, strata_id):
+        strata = self.resident.get(strata_id)
+        if strata is not None:
+            self.hits += 1
+            self.resident.move_to_end(strata_id)
+            # Lazily built rooms make a strata grow while it is being explored
+            self.sizes[strata_id] = estimate_strata_size(strata)
+            return strata
+        if strata_id in self.unloaded:
+            self.misses += 1
+            strata = self.loader.load(strata_id)
+            self.add(strata)
+            if not self.unloaded:
+                self.loader.close()
+            return strata
+        if strata_id not in self.spilled:
+            return None
+        self.misses += 1
+        strata = self.page_in(strata_id)
+        self.enforce_limits()
+        return strata
+
+    def set_current(self, strata_id):
+        """Marks the player's strata and prefetches its neighbours."""
+        self.current_id = strata_id
+        for neighbour_id in self.protected_ids():
+            if neighbour_id not in self.resident and neighbour_id in self.spilled:
+                self.page_in(neighbour_id)
+        strata = self.get(strata_id)
+        self.enforce_limits()
+        return strata
+
+    def protected_ids(self):
+        if self.current_id is None:
+            return []
+        ids = range(self.current_id - self.neighbours, self.current_id + self.neighbours + 1)
+        return [strata_id for strata_id in ids if 0 <= strata_id < self.count]
+
+    def page_in(self, strata_id):
+        offset, length = self.spilled.pop(strata_id)
+        del self.spilled_changes[strata_id]
+        self.cache_file.seek(offset)
+        strata = pickle.loads(self.cache_file.read(length))
+        self.resident[strata_id] = strata
+        self.sizes[strata_id] = estimate_strata_size(strata)
+        return strata
+
+    def evict(self, strata_id):
+        strata = self.resident.pop(strata_id)
+        del self.sizes[strata_id]
+        data = pickle.dumps(strata, protocol=pickle.HIGHEST_PROTOCOL)
+        self.cache_file.seek(0, 2)
+        self.spilled[strata_id] = (self.cache_file.tell(), len(data))
+        self.cache_file.write(data)
+        self.spilled_changes[strata_id] = strata.changed_rooms_to_json()
+        self.evictions += 1
+
+    def over_limits(self):
+        if len(self.resident) > self.max_resident:
+            return True
+        return self.memory_budget is not None and self.resident_size > self.memory_budget
+
+    def enforce_limits(self):
+        protected = set(self.protected_ids())
+        for strata_id in list(self.resident):
+            if not self.over_limits():
+                return
+            if strata_id not in protected:
+                self.evict(strata_id)
+        # The budget is hard: give up neighbours before going over it, but keep the current strata
+        for strata_id in list(self.resident):
+            if not self.over_limits():
+                return
+            if strata_id != self.current_id:
+                self.evict(strata_id)
+
+    def changed_rooms(self):
+        """(strata_id, changed rooms) for every strata, without paging spilled ones in."""
+        for strata_id in range(self.count):
+            if strata_id in self.resident:
+                yield strata_id, self.resident[strata_id].changed_rooms_to_json()
+            elif strata_id in self.unloaded:
+                yield strata_id, self.loader.changed_rooms(strata_id)
+            else:
+                yield strata_id, self.spilled_changes[strata_id]
+
+    @property
+    def resident_size(self):
+        return sum(self.sizes.values())
+
+    def stats(self):
+        return {
+            "resident": len(self.resident),
+            "spilled": len(self.spilled),
+            "unloaded": len(self.unloaded),
+            "resident_bytes": self.resident_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        strata = self.get(index)
+        if strata is None:
+            raise IndexError(index)
+        return strata
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.cache_file.close()
+        if self.loader and self.unloaded:
+            self.loader.close()
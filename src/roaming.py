@@ -0,0 +1,328 @@
+"""Enemies that wander a strata and hunt the player.
+
+Roaming is one batched step over arrays: every roaming enemy is a flat room index, and
+an ExitTable lists the neighbours of each room in a window around the player, so
+choosing where thousands of enemies go is a handful of numpy operations. Enemies within
+NEAR_RADIUS rooms of the player move every turn and head for the player; the rest of
+the window patrols at random and only every FAR_INTERVAL turns, a different slice of
+them each turn. Enemies outside the window wait until the player comes closer. Only the
+enemies that actually moved are then taken out of one Room and put into the next.
+
+The window covers only rooms of chunks that are already populated, so roaming never
+generates any part of the world. Enemies move through exits whatever obstacles stand
+in them, and never leave the player's room once they are in it. Enemies that are
+destroyed or escaped from are dropped the next time they are due to move.
+
+Moving doesn't count as a change to either room (Room.arrive, Room.leave), so roaming
+leaves delta saves as small as it finds them. Instead every roaming enemy keeps the
+room it belongs to as its home, rooms don't save the roaming enemies in them, and the
+Roamers save where theirs are (to_json, restore).
+"""
+from itertools import product
+import numpy as np
+from src.gameobjects.enemies import Enemy
+from src.scheduler import Event
+from src.world import DIRECTIONS, DIRECTION_OFFSETS, LayoutGrid, ChunkedGrid
+
+NEAR_RADIUS = 2 # Rooms (x + y + z steps) within which enemies hunt the player every turn
+FAR_INTERVAL = 4 # Turns between moves of enemies further away
+HUNT_CHANCE = 0.25
+PATROL_CHANCE = 0.5
+WINDOW_RADIUS = 12 # Rooms along each axis from the player that enemies roam in
+
+class ExitTable:
+    """Rooms of a box of a strata by local flat index, with their coordinates in the
+    strata and their neighbours within the box.
+
+    neighbours[i, :degree[i]] are the rooms room i has exits to, in DIRECTIONS order,
+    and -1 after them. Rooms of chunks that aren't populated have no exits, and no exits
+    lead to them.
+    """
+    def __init__(self, strata, low, high):
+        self.low = np.array(low)
+        self.high = np.array(high)
+        self.shape = tuple(int(size) for size in self.high - self.low)
+        mask, self.allowed = self.box_exit_mask(strata)
+        count = mask.size
+        flat_mask = mask.reshape(-1)
+        local = np.stack(np.unravel_index(np.arange(count), self.shape), axis=1).astype(np.int32)
+        neighbours = np.full((count, len(DIRECTIONS)), -1, dtype=np.int32)
+        for bit, direction in enumerate(DIRECTIONS):
+            target = local + np.array(DIRECTION_OFFSETS[direction], dtype=np.int32)
+            has_exit = ((flat_mask >> bit) & 1).astype(bool) & (target >= 0).all(axis=1) & (target < self.shape).all(axis=1)
+            target_index = np.ravel_multi_index(target[has_exit].T, self.shape)
+            has_exit[has_exit] = self.allowed.reshape(-1)[target_index]
+            neighbours[has_exit, bit] = np.ravel_multi_index(target[has_exit].T, self.shape)
+        # Pack each row's exits to the front so a random exit is neighbours[i, r * degree]
+        order = np.argsort(neighbours < 0, axis=1, kind="stable")
+        self.neighbours = np.take_along_axis(neighbours, order, axis=1)
+        self.degree = (neighbours >= 0).sum(axis=1)
+        self.coordinates = local + self.low.astype(np.int32)
+
+    def box_exit_mask(self, strata):
+        """(exit mask of every room of the box, which of them roamers may enter)."""
+        grid = strata.grid
+        low, high = self.low, self.high
+        if isinstance(grid, LayoutGrid):
+            mask = grid.layout.exit_mask[low[0]:high[0], low[1]:high[1], low[2]:high[2]]
+            return mask, np.ones(self.shape, dtype=bool)
+        mask = np.zeros(self.shape, dtype=np.uint8)
+        allowed = np.zeros(self.shape, dtype=bool)
+        if isinstance(grid, ChunkedGrid):
+            size = grid.chunk_size
+            chunk_ranges = [range(start // size, (end - 1) // size + 1) for start, end in zip(low, high)]
+            for chunk in product(*chunk_ranges):
+                if chunk not in grid.populated:
+                    continue
+                chunk_mask = grid.chunk_exit_mask(chunk)
+                origin = np.array(grid.chunk_origin(chunk))
+                start = np.maximum(origin, low)
+                end = np.minimum(origin + chunk_mask.shape, high)
+                box = tuple(slice(s, e) for s, e in zip(start - low, end - low))
+                mask[box] = chunk_mask[tuple(slice(s, e) for s, e in zip(start - origin, end - origin))]
+                allowed[box] = True
+        else: # Stratas of full saves keep every room
+            for (x, y, z), room in grid.items():
+                if low[0] <= x < high[0] and low[1] <= y < high[1] and low[2] <= z < high[2]:
+                    mask[x - low[0], y - low[1], z - low[2]] = room.exit_mask
+                    allowed[x - low[0], y - low[1], z - low[2]] = True
+        return mask, allowed
+
+    def contains(self, x, y, z):
+        position = (x, y, z)
+        return all(self.low[axis] <= position[axis] < self.high[axis] for axis in range(3))
+
+    def local(self, coordinates):
+        """Local indices of the rooms at [n, 3] strata coordinates, -1 for those outside
+        the box or in rooms roamers may not enter."""
+        offset = coordinates - self.low
+        inside = (offset >= 0).all(axis=1) & (offset < self.shape).all(axis=1)
+        index = np.full(len(coordinates), -1, dtype=np.int64)
+        index[inside] = np.ravel_multi_index(offset[inside].T, self.shape)
+        index[inside] = np.where(self.allowed.reshape(-1)[index[inside]], index[inside], -1)
+        return index
+
+class Roamers:
+    """The roaming enemies of one strata: enemies[k] is in the Room rooms[k], at flat
+    strata index at[k], or at[k] is -1 once the enemy has been lost track of. homes[k]
+    is the position of the room the enemy belongs to, and moved[k] whether it may have
+    left it since the room was generated. gone holds homes whose generated enemy was
+    lost track of in an earlier game, to be left out when the room is regenerated.
+    """
+    def __init__(self, strata, rng, radius=WINDOW_RADIUS):
+        self.strata = strata
+        self.shape = (strata.width, strata.height, strata.depth)
+        self.rng = rng
+        self.radius = radius
+        self.turn = 0
+        self.table = None
+        self.center = None
+        self.populated_chunks = 0
+        self.enemies = []
+        self.rooms = []
+        self.homes = []
+        self.at = np.zeros(0, dtype=np.int64)
+        self.moved = np.zeros(0, dtype=bool)
+        self.tracked = set() # ids of the enemies
+        self.gone = set()
+
+    def index(self, x, y, z):
+        return (x * self.shape[1] + y) * self.shape[2] + z
+
+    def position(self, index):
+        x, rest = divmod(index, self.shape[1] * self.shape[2])
+        y, z = divmod(rest, self.shape[2])
+        return (x, y, z)
+
+    def track(self, room, enemy, home=None, moved=False):
+        """Adds an enemy in room. An enemy without a home belongs to room from now on; one
+        that has a home already may have roamed, so it counts as moved."""
+        position = (room.x, room.y, room.z)
+        if home is not None:
+            enemy.home = home
+        elif enemy.home is None:
+            enemy.home = position
+        else:
+            moved = True
+        self.enemies.append(enemy)
+        self.rooms.append(room)
+        self.homes.append(enemy.home)
+        self.at = np.append(self.at, self.index(*position))
+        self.moved = np.append(self.moved, moved)
+        self.tracked.add(id(enemy))
+
+    def update_window(self, player_room):
+        """Rebuilds the ExitTable around the player when they near its edge, or when a
+        chunk was populated, and tracks the enemies of the rooms it newly covers."""
+        grid = self.strata.grid
+        populated_chunks = len(grid.populated) if isinstance(grid, ChunkedGrid) else 0
+        player = (player_room.x, player_room.y, player_room.z)
+        if self.table is not None and populated_chunks == self.populated_chunks and \
+                max(abs(axis - center) for axis, center in zip(player, self.center)) <= self.radius // 2:
+            return
+        self.center = player
+        self.populated_chunks = populated_chunks
+        low = [max(0, axis - self.radius) for axis in player]
+        high = [min(size, axis + self.radius + 1) for axis, size in zip(player, self.shape)]
+        self.table = table = ExitTable(self.strata, low, high)
+
+        built = grid.rooms if isinstance(grid, (LayoutGrid, ChunkedGrid)) else grid
+        if len(built) > table.allowed.size:
+            rooms = ((position, built.get(position)) for position in product(*(range(l, h) for l, h in zip(low, high))))
+        else:
+            rooms = built.items()
+        tracked = self.tracked
+        for position, room in rooms:
+            if room is None or not room.enemies or not table.contains(*position):
+                continue
+            if isinstance(grid, ChunkedGrid) and grid.chunk_of(position) not in grid.populated:
+                continue
+            for enemy in room.enemies:
+                if id(enemy) not in tracked:
+                    self.track(room, enemy)
+
+    def plan(self, player_room):
+        """(which enemies move, the flat strata indices they move to) for one turn,
+        without moving them."""
+        table = self.table
+        count = len(self.at)
+        tracked = self.at >= 0
+        positions = np.stack(np.unravel_index(np.where(tracked, self.at, 0), self.shape), axis=1)
+        rooms = np.where(tracked, table.local(positions), -1)
+        player = np.array([player_room.x, player_room.y, player_room.z])
+        player_index = table.local(player[None])[0]
+        distance = np.abs(positions - player).sum(axis=1)
+        roaming = (rooms >= 0) & (rooms != player_index)
+        near = roaming & (distance <= NEAR_RADIUS)
+        far = roaming & ~near & (np.arange(count) % FAR_INTERVAL == self.turn % FAR_INTERVAL)
+        self.turn += 1
+
+        chances = self.rng.random(count)
+        hunting = np.flatnonzero(near & (chances < HUNT_CHANCE))
+        patrolling = np.flatnonzero(far & (chances < PATROL_CHANCE))
+        targets = np.full(count, -1, dtype=np.int64)
+
+        # Patrols take a random exit
+        degree = table.degree[rooms[patrolling]]
+        patrolling = patrolling[degree > 0]
+        picks = (self.rng.random(len(patrolling)) * degree[degree > 0]).astype(np.int64)
+        targets[patrolling] = table.neighbours[rooms[patrolling], picks]
+
+        # Hunters take the exit that brings them closest to the player, ties broken at random
+        options = table.neighbours[rooms[hunting]]
+        option_distance = np.abs(table.coordinates[np.maximum(options, 0)] - player).sum(axis=2).astype(np.float64)
+        option_distance += self.rng.random(option_distance.shape) * 0.5
+        option_distance[options < 0] = np.inf
+        best = option_distance.argmin(axis=1)
+        closer = option_distance[np.arange(len(hunting)), best] < distance[hunting]
+        targets[hunting[closer]] = options[closer, best[closer]]
+
+        movers = np.flatnonzero(targets >= 0)
+        target_positions = table.coordinates[targets[movers]]
+        return movers, np.ravel_multi_index(target_positions.T, self.shape)
+
+    def step(self, player_room, output, colors):
+        """Moves the enemies due this turn. Returns how many moved."""
+        self.update_window(player_room)
+        grid = self.strata.grid
+        movers, targets = self.plan(player_room)
+        player_index = self.index(player_room.x, player_room.y, player_room.z)
+        moved = 0
+        enemies = self.enemies
+        rooms = self.rooms
+        at = self.at
+        for k, target in zip(movers.tolist(), targets.tolist()):
+            enemy = enemies[k]
+            room = rooms[k]
+            if enemy not in room.enemies: # Destroyed, or escaped from
+                at[k] = -1
+                continue
+            room.leave(enemy)
+            room = rooms[k] = grid[self.position(target)]
+            room.arrive(enemy)
+            at[k] = target
+            self.moved[k] = True
+            moved += 1
+            if target == player_index:
+                output.append((f"A {enemy.name} arrives.", colors.RED))
+        return moved
+
+    def release(self):
+        """Hands the enemies back to their rooms when these Roamers are replaced: they
+        lose their homes, so their rooms save them again, and every room a roamer left
+        or arrived in counts as changed, so a load keeps it as it is instead of
+        regenerating it."""
+        grid = self.strata.grid
+        for home in self.gone:
+            grid[home].touch()
+        for k, enemy in enumerate(self.enemies):
+            room = self.rooms[k]
+            present = self.at[k] >= 0 and enemy in room.enemies
+            if present:
+                enemy.home = None
+            if self.moved[k]:
+                grid[self.homes[k]].touch()
+                if present:
+                    room.touch()
+
+    def to_json(self, full=False):
+        """Where the roaming enemies are, for a save that regenerates clean rooms, or keeps
+        every room if full. "enemies" lists [position, home, enemy] for every enemy its
+        room won't bring back, "gone" the homes to take the generated enemy out of."""
+        dirty = self.strata.grid.dirty
+        enemies = []
+        gone = set() if full else {home for home in self.gone if home not in dirty}
+        for k, enemy in enumerate(self.enemies):
+            home = self.homes[k]
+            regenerated = not full and home not in dirty
+            if self.moved[k] and regenerated:
+                gone.add(home)
+            if self.at[k] >= 0 and enemy in self.rooms[k].enemies and (self.moved[k] or not regenerated):
+                room = self.rooms[k]
+                enemies.append([[room.x, room.y, room.z], list(home), enemy.to_json()])
+        return {"strata_id": self.strata.strata_id, "enemies": enemies, "gone": [list(home) for home in sorted(gone)]}
+
+    @classmethod
+    def restore(cls, strata, data, rng):
+        """Roamers of a loaded strata, putting the enemies of a save made by to_json back
+        where they were."""
+        roamers = cls(strata, rng)
+        grid = strata.grid
+        for home in data["gone"]:
+            room = grid[tuple(home)]
+            generated = next((enemy for enemy in room.enemies if enemy.home is None), None)
+            if generated is not None:
+                room.leave(generated)
+            roamers.gone.add(tuple(home))
+        for position, home, enemy_data in data["enemies"]:
+            enemy = Enemy.from_json(enemy_data)
+            room = grid[tuple(position)]
+            room.arrive(enemy)
+            roamers.track(room, enemy, tuple(home), moved=True)
+        return roamers
+
+class Roaming(Event):
+    """Steps the roaming enemies of the player's strata every turn. The Roamers are
+    gathered the first time and again whenever the strata object changes, releasing
+    the previous ones (Roamers.release) so the strata left behind saves its enemies
+    itself; saves keep the Roamers apart from the schedule."""
+    name = "roaming"
+    interval = 1
+
+    def fire(self, game, output, colors):
+        roamers = game.roamers
+        strata = game.player.current_strata
+        if roamers is None or roamers.strata is not strata:
+            if roamers is not None:
+                roamers.release()
+            roamers = game.roamers = Roamers(strata, np.random.default_rng(game.rng.getrandbits(63)))
+        roamers.step(game.player.current_room, output, colors)
+        return self.interval
+
+def roamers_to_json(game, full=False):
+    return game.roamers.to_json(full) if game.roamers is not None else None
+
+def restore_roamers(game, data):
+    """Puts the roaming enemies of a save back, see Roamers.to_json."""
+    strata = game.all_stratas[data["strata_id"]]
+    game.roamers = Roamers.restore(strata, data, np.random.default_rng(game.rng.getrandbits(63)))
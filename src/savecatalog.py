@@ -0,0 +1,84 @@
+"""Catalog of the saves in a directory, so save lists never have to open save bodies.
+
+The catalog is a JSON file next to the saves mapping each save's file name to its
+summary (see src.binarysave.read_summary) plus the file's modification time. Saving
+records the new file; refresh picks up saves that were added, replaced or deleted
+behind the catalog's back by reading only their headers.
+"""
+import json
+import os
+import threading
+from src.savegame import read_save_summary, write_atomically
+
+CATALOG_FILE = "catalog.json"
+SAVE_EXTENSIONS = (".sav", ".json")
+
+# Autosaves record themselves from a worker thread
+catalog_lock = threading.Lock()
+
+class SaveCatalog:
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, CATALOG_FILE)
+        self.entries = {} # file name -> summary, "mtime" and "file_path"
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {} # Missing or damaged, refresh rebuilds it
+
+    def save(self):
+        os.makedirs(self.directory, exist_ok=True)
+        write_atomically(self.path, lambda f: json.dump(self.entries, f), "w")
+
+    def record(self, file_path, summary=None):
+        """Adds or updates the entry of a save file, reading its summary if none is given."""
+        stat = os.stat(file_path)
+        entry = dict(summary or read_save_summary(file_path))
+        entry.update({"size": stat.st_size, "mtime": stat.st_mtime, "file_path": file_path})
+        self.entries[os.path.basename(file_path)] = entry
+
+    def refresh(self):
+        """Brings the catalog in line with the directory. Returns True if anything changed."""
+        changed = False
+        names = set()
+        if os.path.isdir(self.directory):
+            for dir_entry in os.scandir(self.directory):
+                if dir_entry.name == CATALOG_FILE or not dir_entry.name.endswith(SAVE_EXTENSIONS) or dir_entry.name.startswith("."):
+                    continue
+                names.add(dir_entry.name)
+                entry = self.entries.get(dir_entry.name)
+                stat = dir_entry.stat()
+                if entry is None or entry["mtime"] != stat.st_mtime or entry["size"] != stat.st_size:
+                    try:
+                        self.record(dir_entry.path)
+                    except (OSError, ValueError, KeyError):
+                        continue # Not a save we can read, leave it out of the list
+                    changed = True
+        for name in set(self.entries) - names:
+            del self.entries[name]
+            changed = True
+        return changed
+
+    def list(self, sort_key="timestamp", reverse=True, where=None):
+        """Catalog entries sorted by one of their keys, optionally filtered by where(entry)."""
+        entries = [entry for entry in self.entries.values() if where is None or where(entry)]
+        return sorted(entries, key=lambda entry: entry[sort_key], reverse=reverse)
+
+def record_save(file_path, summary=None):
+    """Records a save that was just written in the catalog of its directory."""
+    with catalog_lock:
+        catalog = SaveCatalog(os.path.dirname(file_path) or ".")
+        catalog.record(file_path, summary)
+        catalog.save()
+
+def list_saves(directory, sort_key="timestamp", reverse=True, where=None):
+    """Entries of every save in directory, refreshing the catalog first."""
+    with catalog_lock:
+        catalog = SaveCatalog(directory)
+        if catalog.refresh():
+            catalog.save()
+    return catalog.list(sort_key, reverse, where)
@@ -0,0 +1,321 @@
+"""Reading and writing save files.
+
+A world generated from a seed is saved as that seed, the generate_world arguments, the
+player and the contents of only the rooms that changed since generation. Loading
+regenerates the world and applies those rooms on top. Worlds that cannot be regenerated
+(loaded from a save that predates seeds) are saved in full, in the original format.
+
+Either document is written in the binary format of src.binarysave (.sav files). Older
+.json saves still load, and migrate_json_save converts them; export_json turns a binary
+save back into JSON for debugging:
+
+    python -m src.savegame export saves/save_2024-01-01_12-00-00.sav
+
+Binary saves are streamed room by room (write_game, read_game), so saving or loading
+never holds a second copy of the world. Loading builds only the player's strata; the
+save file stays memory mapped and the other stratas are built from it, or regenerated
+from the seed, when first accessed.
+"""
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from src.binarysave import SaveWriter, SaveReader, encode_document, decode_document, is_binary_save, read_summary, release_file, MAGIC, LAYOUT_FULL, LAYOUT_DELTA
+from src.game import Game, Player
+from src.residency import StrataStore
+from src.roaming import restore_roamers, roamers_to_json
+from src.scheduler import Scheduler
+from src.world import Room, Strata, generate_world, generate_strata, GENERATOR_VERSION
+
+logger = logging.getLogger(__name__)
+
+# 1: full world dump, 2: seed plus changed rooms
+SAVE_VERSION = 2
+
+def parse_position(key):
+    return tuple(map(int, key.split(",")))
+
+def game_to_json(game):
+    if game.seed is None or game.world_options is None:
+        return {
+            "seed": game.seed,
+            "player": game.player.to_json(),
+            "schedule": game.scheduler.to_json(),
+            "roamers": roamers_to_json(game, full=True),
+            "stratas": [strata.to_json() for strata in game.all_stratas]
+        }
+    return {
+        "version": SAVE_VERSION,
+        "generator_version": GENERATOR_VERSION,
+        "seed": game.seed,
+        "world_options": game.world_options,
+        "player": game.player.to_json(),
+        "schedule": game.scheduler.to_json(),
+        "roamers": roamers_to_json(game),
+        "changed_rooms": {str(strata_id): rooms for strata_id, rooms in game.all_stratas.changed_rooms() if rooms}
+    }
+
+def check_generator_version(data):
+    if data["generator_version"] != GENERATOR_VERSION:
+        raise ValueError(f"Save was made by world generator version {data['generator_version']}, this is version {GENERATOR_VERSION}.")
+
+def regenerate_world(data):
+    check_generator_version(data)
+    starting_room, all_stratas = generate_world(seed=data["seed"], **data["world_options"])
+    return all_stratas
+
+def apply_changed_rooms(all_stratas, changed_rooms):
+    """Loads saved contents into the regenerated world. changed_rooms yields
+    (strata_id, rooms) and rooms yields ((x, y, z), contents)."""
+    for strata_id, rooms in changed_rooms:
+        grid = all_stratas[strata_id].grid
+        for position, contents in rooms:
+            grid[position].load_contents(contents)
+
+def load_stratas(headers, sections):
+    """Rebuilds saved stratas one room at a time. sections yields (strata_id, rooms) in
+    the order of headers and rooms yields ((x, y, z), room data)."""
+    all_stratas = []
+    for header, (strata_id, rooms) in zip(headers, sections):
+        strata = Strata.from_json_header(header)
+        reconnect = False
+        for position, room_data in rooms:
+            strata.restore_room(position, Room.from_json(room_data))
+            reconnect = reconnect or "exits" not in room_data
+        strata.finish_loading(reconnect)
+        all_stratas.append(strata)
+    return all_stratas
+
+def finish_game(data, all_stratas):
+    player = Player.from_json(data["player"], all_stratas)
+    if data.get("version", 1) < 2:
+        game = Game(all_stratas=all_stratas, player=player, seed=data.get("seed"))
+    else:
+        game = Game(all_stratas=all_stratas, player=player, seed=data["seed"], world_options=data["world_options"])
+    if "schedule" in data: # Saves made before game time start again at turn 0
+        game.scheduler = Scheduler.from_json(data["schedule"])
+    if data.get("roamers"):
+        restore_roamers(game, data["roamers"])
+    return game
+
+def game_summary(game):
+    """Summary stored in the header of a binary save, see src.binarysave.read_summary."""
+    player = game.player
+    return {
+        "timestamp": time.time(),
+        "seed": game.seed,
+        "strata_id": player.current_strata.strata_id,
+        "x": player.x,
+        "y": player.y,
+        "z": player.z,
+        "zone": player.current_room.zone,
+        "health": player.health,
+    }
+
+def document_summary(data, timestamp):
+    """Summary of a save document. Delta saves don't store the player's zone unless the
+    player's room changed, so it may be empty."""
+    player = data["player"]
+    key = f"{player['x']},{player['y']},{player['z']}"
+    if "changed_rooms" in data:
+        room = data["changed_rooms"].get(str(player["strata_id"]), {}).get(key, {})
+    else:
+        room = next((strata["grid"].get(key, {}) for strata in data["stratas"] if strata["strata_id"] == player["strata_id"]), {})
+    return {
+        "timestamp": timestamp,
+        "seed": data.get("seed"),
+        "strata_id": player["strata_id"],
+        "x": player["x"],
+        "y": player["y"],
+        "z": player["z"],
+        "zone": room.get("zone", ""),
+        "health": player["health"],
+    }
+
+def read_save_summary(file_path):
+    """Summary of a save file, from its header when it has one and otherwise from its body."""
+    with open(file_path, "rb") as f:
+        binary = is_binary_save(f.read(len(MAGIC)))
+        f.seek(0)
+        summary = read_summary(f) if binary else None
+    if summary is None:
+        summary = document_summary(read_document(file_path), os.path.getmtime(file_path))
+        summary["size"] = os.path.getsize(file_path)
+    return summary
+
+def game_from_json(data):
+    if data.get("version", 1) < 2:
+        all_stratas = [Strata.from_json(strata_data) for strata_data in data["stratas"]]
+        return finish_game(data, all_stratas)
+
+    all_stratas = regenerate_world(data)
+    apply_changed_rooms(all_stratas, ((int(strata_id), ((parse_position(key), contents) for key, contents in rooms.items()))
+                                      for strata_id, rooms in data["changed_rooms"].items()))
+    return finish_game(data, all_stratas)
+
+def write_game(game, file, compression="zlib"):
+    """Streams a game to a binary save one room at a time, without building the save document."""
+    if game.seed is None or game.world_options is None:
+        writer = SaveWriter(file, game_summary(game), compression, LAYOUT_FULL)
+        writer.write_meta({
+            "seed": game.seed,
+            "player": game.player.to_json(),
+            "schedule": game.scheduler.to_json(),
+            "roamers": roamers_to_json(game, full=True),
+            "stratas": [strata.header_to_json() for strata in game.all_stratas]
+        })
+        for strata in game.all_stratas:
+            writer.begin_section(strata.strata_id)
+            for position, room in strata.saved_rooms():
+                writer.write_room(position, room.to_json())
+            writer.end_section()
+    else:
+        writer = SaveWriter(file, game_summary(game), compression, LAYOUT_DELTA)
+        writer.write_meta({
+            "version": SAVE_VERSION,
+            "generator_version": GENERATOR_VERSION,
+            "seed": game.seed,
+            "world_options": game.world_options,
+            "player": game.player.to_json(),
+            "schedule": game.scheduler.to_json(),
+            "roamers": roamers_to_json(game),
+        })
+        for strata_id, rooms in game.all_stratas.changed_rooms():
+            if rooms:
+                writer.begin_section(strata_id)
+                for key, contents in rooms.items():
+                    writer.write_room(parse_position(key), contents)
+                writer.end_section()
+    writer.close()
+
+class SaveLoader:
+    """Builds the stratas of an indexed save one at a time, for a StrataStore."""
+    def __init__(self, reader, data):
+        self.reader = reader
+        self.data = data
+        if reader.layout == LAYOUT_FULL:
+            self.headers = {header["strata_id"]: header for header in data["stratas"]}
+        else:
+            check_generator_version(data)
+
+    @property
+    def count(self):
+        if self.reader.layout == LAYOUT_FULL:
+            return len(self.headers)
+        return self.data["world_options"]["num_stratas"]
+
+    def rooms(self, strata_id):
+        if strata_id not in self.reader.index:
+            return ()
+        return self.reader.section(strata_id)
+
+    def load(self, strata_id):
+        if self.reader.layout == LAYOUT_FULL:
+            return load_stratas([self.headers[strata_id]], [(strata_id, self.rooms(strata_id))])[0]
+        world_options = self.data["world_options"]
+        strata = generate_strata(self.data["seed"], strata_id, world_options["num_stratas"], world_options.get("strata_size"), world_options.get("chunk_size"))
+        apply_changed_rooms({strata_id: strata}, [(strata_id, self.rooms(strata_id))])
+        return strata
+
+    def changed_rooms(self, strata_id):
+        return {f"{x},{y},{z}": contents for (x, y, z), contents in self.rooms(strata_id)}
+
+    def close(self):
+        self.reader.close()
+
+def read_game(reader):
+    """Loads a game from a binary save opened with SaveReader. Only the player's strata
+    is built here; the others are built the first time they are accessed."""
+    data = reader.read_meta()
+    loader = SaveLoader(reader, data)
+    all_stratas = StrataStore(current_id=data["player"]["strata_id"], count=loader.count, loader=loader)
+    return finish_game(data, all_stratas)
+
+def write_atomically(file_path, write, mode="wb"):
+    """Calls write(file) on a temporary file next to file_path and then renames it over
+    file_path, so a crash in the middle of a save never leaves a truncated save behind."""
+    directory = os.path.dirname(os.path.abspath(file_path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        release_file(file_path)
+        os.replace(temp_path, file_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+def save_game(game, file_path, compression="zlib"):
+    """Writes a binary save, or a JSON one if file_path ends in .json."""
+    if file_path.endswith(".json"):
+        write_atomically(file_path, lambda f: json.dump(game_to_json(game), f, separators=(",", ":")), "w")
+    else:
+        write_atomically(file_path, lambda f: write_game(game, f, compression))
+
+def read_document(file_path):
+    """The save document of a binary or JSON save file."""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    if is_binary_save(data):
+        return decode_document(data)
+    return json.loads(data)
+
+def load_game(file_path):
+    with open(file_path, "rb") as f:
+        binary = is_binary_save(f.read(len(MAGIC)))
+    if binary:
+        return read_game(SaveReader.open(file_path))
+    with open(file_path, "r") as f:
+        return game_from_json(json.load(f))
+
+def export_json(file_path, json_path=None):
+    """Writes a save as indented JSON next to it, or to json_path. Returns the JSON path."""
+    json_path = json_path or os.path.splitext(file_path)[0] + ".export.json"
+    with open(json_path, "w") as f:
+        json.dump(read_document(file_path), f, indent=4)
+    return json_path
+
+def migrate_json_save(file_path, compression="zlib", keep_original=False):
+    """Converts a .json save to a .sav one and, unless keep_original, removes the
+    original once the new file reads back identically. Returns the path of the .sav file."""
+    document = read_document(file_path)
+    sav_path = os.path.splitext(file_path)[0] + ".sav"
+    data = encode_document(document, document_summary(document, os.path.getmtime(file_path)), compression)
+    if decode_document(data) != document:
+        raise ValueError(f"Could not migrate {file_path}: binary save does not round trip.")
+    write_atomically(sav_path, lambda f: f.write(data))
+    if not keep_original:
+        os.remove(file_path)
+    return sav_path
+
+def migrate_json_saves(directory, compression="zlib"):
+    """Converts every save_*.json in directory that has no .sav yet, keeping the
+    originals. Saves that can't be read or converted are logged and skipped. Returns
+    the .json saves that now have a .sav, converted earlier or just now."""
+    converted = []
+    if not os.path.isdir(directory):
+        return converted
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith("save_") and name.endswith(".json")):
+            continue
+        file_path = os.path.join(directory, name)
+        if not os.path.exists(os.path.splitext(file_path)[0] + ".sav"):
+            try:
+                migrate_json_save(file_path, compression, keep_original=True)
+            except (OSError, ValueError, KeyError, TypeError):
+                logger.warning("Could not migrate %s, leaving it as it is.", file_path, exc_info=True)
+                continue
+        converted.append(file_path)
+    return converted
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3 or sys.argv[1] not in ("export", "migrate"):
+        sys.exit("usage: python -m src.savegame export|migrate SAVE_FILE")
+    if sys.argv[1] == "export":
+        print(export_json(sys.argv[2]))
+    else:
+        print(migrate_json_save(sys.argv[2]))
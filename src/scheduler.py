@@ -0,0 +1,191 @@
+"""Game time: turns pass as the player acts and timed effects run when they fall due.
+
+Each command costs some turns (CommandHandler.cost). Effects are Events queued in a
+heap by the turn they are due, so passing time only looks at the events that are due
+instead of at every room or entity in the world. An event's fire method may return a
+number of turns to run again after, which is how hunger keeps decaying.
+
+Events that concern a room name it by strata id and position, since stratas may be
+spilled to disk and paged back in as other objects. If the strata isn't resident when
+such an event is due it is retried later rather than paging the strata in.
+"""
+import heapq
+from src.gameobjects.enemies import Enemy
+
+# Name -> event class, filled by Event subclasses
+EVENTS = {}
+
+class Event:
+    """Something that happens at a turn. Subclasses with a name register under it and
+    save the attributes listed in json_fields."""
+    name = None
+    json_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.name is not None:
+            EVENTS[cls.name] = cls
+
+    def fire(self, game, output, colors):
+        """Applies the event, adding any messages to output. Returns the turns until it
+        fires again, or None."""
+        raise NotImplementedError
+
+    def to_json(self):
+        data = {field: getattr(self, field) for field in self.json_fields}
+        data["event"] = self.name
+        return data
+
+    @classmethod
+    def from_json(cls, data):
+        event = cls.__new__(cls)
+        for field in cls.json_fields:
+            setattr(event, field, data[field])
+        return event
+
+class Scheduler:
+    """A turn counter and a heap of (due turn, sequence number, event); the sequence
+    number keeps events due on the same turn in the order they were scheduled."""
+    def __init__(self, turn=0):
+        self.turn = turn
+        self.queue = []
+        self.sequence = 0
+        self.fired = 0
+
+    def schedule(self, delay, event):
+        heapq.heappush(self.queue, (self.turn + delay, self.sequence, event))
+        self.sequence += 1
+
+    def advance(self, game, turns, output, colors):
+        """Passes turns turns, firing every event due by then in turn order."""
+        end = self.turn + turns
+        queue = self.queue
+        while queue and queue[0][0] <= end:
+            due, _, event = heapq.heappop(queue)
+            self.turn = due
+            self.fired += 1
+            delay = event.fire(game, output, colors)
+            if delay is not None:
+                self.schedule(delay, event)
+        self.turn = end
+
+    def __len__(self):
+        return len(self.queue)
+
+    def to_json(self):
+        return {
+            "turn": self.turn,
+            "events": [[due, event.to_json()] for due, _, event in sorted(self.queue)]
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        scheduler = cls(data["turn"])
+        for due, event_data in data["events"]:
+            scheduler.schedule(due - scheduler.turn, EVENTS[event_data["event"]].from_json(event_data))
+        return scheduler
+
+def resident_room(game, strata_id, position):
+    """The room at position if its strata is in memory, otherwise None."""
+    strata = game.all_stratas.resident.get(strata_id)
+    return strata.grid.get(tuple(position)) if strata is not None else None
+
+class NeedDecay(Event):
+    """Lowers one of the player's needs by one every interval turns, down to zero.
+    Nothing restores needs yet, so running out warns the player but doesn't hurt."""
+    need = None
+    interval = None
+    warning = None
+
+    def fire(self, game, output, colors):
+        player = game.player
+        value = getattr(player, self.need)
+        if value > 0:
+            setattr(player, self.need, value - 1)
+            if value - 1 == 0:
+                output.append((self.warning, colors.RED))
+        return self.interval
+
+class HungerDecay(NeedDecay):
+    name = "hunger"
+    need = "hunger"
+    interval = 10
+    warning = "You are starving."
+
+class ThirstDecay(NeedDecay):
+    name = "thirst"
+    need = "thirst"
+    interval = 6
+    warning = "You are parched."
+
+class AilmentExpiry(Event):
+    """Ends an ailment of the player's."""
+    name = "ailment"
+    json_fields = ("ailment",)
+
+    def __init__(self, ailment):
+        self.ailment = ailment
+
+    def fire(self, game, output, colors):
+        if self.ailment in game.player.ailments:
+            game.player.ailments.remove(self.ailment)
+            output.append((f"You are no longer {self.ailment}.", colors.GREEN))
+
+class ObstacleRegeneration(Event):
+    """Restores a damaged obstacle to full strength."""
+    name = "obstacle_regeneration"
+    json_fields = ("strata_id", "position", "direction")
+    delay = 30
+    retry = 20
+
+    def __init__(self, strata_id, position, direction):
+        self.strata_id = strata_id
+        self.position = position
+        self.direction = direction
+
+    def fire(self, game, output, colors):
+        room = resident_room(game, self.strata_id, self.position)
+        if room is None:
+            return self.retry
+        obstacle = room.obstacles.get(self.direction)
+        if obstacle is not None and obstacle.health < obstacle.strength_required:
+            obstacle.health = obstacle.strength_required
+            room.touch()
+
+class EnemyRespawn(Event):
+    """Brings a destroyed enemy back at full health, once the player isn't there to see it."""
+    name = "enemy_respawn"
+    json_fields = ("strata_id", "position", "enemy")
+    delay = 100
+    retry = 20
+
+    def __init__(self, strata_id, position, enemy):
+        self.strata_id = strata_id
+        self.position = position
+        self.enemy = enemy # Enemy JSON
+
+    def fire(self, game, output, colors):
+        room = resident_room(game, self.strata_id, self.position)
+        if room is None or room is game.player.current_room:
+            return self.retry
+        enemy = Enemy.from_json(self.enemy)
+        room.add_enemy(enemy)
+        if game.roamers is not None and game.roamers.strata.grid is room.grid:
+            game.roamers.track(room, enemy)
+
+def regenerate_later(game, room, direction):
+    """Schedules the damaged obstacle in direction of the player's room to heal."""
+    event = ObstacleRegeneration(game.player.current_strata.strata_id, [room.x, room.y, room.z], direction)
+    game.scheduler.schedule(event.delay, event)
+
+def respawn_later(game, room, enemy):
+    """Schedules a destroyed enemy of the player's room to come back."""
+    data = enemy.to_json()
+    data["health"] = enemy.template.health
+    event = EnemyRespawn(game.player.current_strata.strata_id, [room.x, room.y, room.z], data)
+    game.scheduler.schedule(event.delay, event)
+
+def schedule_survival(scheduler):
+    """Queues the needs that decay for as long as the game runs."""
+    scheduler.schedule(HungerDecay.interval, HungerDecay())
+    scheduler.schedule(ThirstDecay.interval, ThirstDecay())
@@ -0,0 +1,208 @@
+"""Plays many headless games with policy agents to tune the game's numbers.
+
+Every game gets its own world seed and command RNG seed, so a run is repeatable. Games
+are spread over a process pool and their outcomes summarised: how long players survive,
+what kills them, how many strata exits they reach and how many implants they end with.
+
+Usage: python -m src.simulate [--games N] [--policy NAME] [--max-turns N] [--workers N]
+                              [--seed SEED] [--stratas N] [--escape-chance P]
+                              [--scavenge-chance P] [--json]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import time
+from collections import Counter
+from functools import partial
+from src.colors import Colors
+from src.combat import weapon_damage
+from src.commands import COMMANDS, Command
+from src.game import Game
+from src.gameobjects.items import CyberneticImplant
+
+# Name -> policy class, filled by Policy subclasses
+POLICIES = {}
+
+class Policy:
+    """Chooses the next Command for a game. Subclasses register under their name."""
+    name = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        POLICIES[cls.name] = cls
+
+    def __init__(self, rng):
+        self.rng = rng
+
+    def choose(self, game):
+        raise NotImplementedError
+
+class RandomPolicy(Policy):
+    """Any command that makes sense in the room, uniformly."""
+    name = "random"
+
+    def choose(self, game):
+        room = game.player.current_room
+        if game.current_attack_target and game.player.inventory:
+            return Command("use_weapon", self.rng.choice(game.player.inventory).name)
+        options = [Command("move", direction) for direction in room.exits]
+        options += [Command("get", item.name) for item in room.visible_items]
+        options += [Command("talk", npc.name) for npc in room.npcs]
+        options += [Command("attack", enemy.name) for enemy in room.enemies]
+        options += [Command("attack", obstacle.name) for obstacle in room.obstacles.values()]
+        if room.enemies:
+            options.append(Command("escape"))
+        return self.rng.choice(options) if options else Command("look")
+
+class ExplorerPolicy(Policy):
+    """Picks everything up, installs implants where it can, fights with the best weapon
+    it carries or escapes without one, and otherwise heads for rooms it hasn't seen."""
+    name = "explorer"
+
+    def __init__(self, rng):
+        super().__init__(rng)
+        self.visited = set()
+
+    def weapon(self, game):
+        inventory = game.player.inventory
+        return next((item for item in inventory if item.name.lower() == "gbe"), inventory[0] if inventory else None)
+
+    def choose(self, game):
+        player = game.player
+        room = player.current_room
+        self.visited.add((player.current_strata.strata_id, room.x, room.y, room.z))
+        weapon = self.weapon(game)
+        if game.current_attack_target:
+            return Command("use_weapon", weapon.name)
+        if room.enemies:
+            target = min(room.enemies, key=lambda enemy: enemy.health)
+            hurts = weapon is not None and weapon_damage(player.strength, weapon.name) > target.durability
+            if not hurts or player.health <= sum(enemy.damage for enemy in room.enemies):
+                return Command("escape")
+            return Command("attack", target.name)
+        if room.visible_items:
+            return Command("get", room.visible_items[0].name)
+        if room.cybernetic_terminal:
+            implant = next((item for item in player.inventory if isinstance(item, CyberneticImplant)), None)
+            if implant:
+                return Command("install", implant.name)
+        open_exits = [direction for direction in room.exits if direction not in room.obstacles]
+        if not open_exits:
+            if weapon and room.obstacles:
+                return Command("attack", self.rng.choice(list(room.obstacles.values())).name)
+            return Command("look")
+        unseen = [direction for direction in open_exits if self.unvisited(player, room.exits[direction])]
+        return Command("move", self.rng.choice(unseen or open_exits))
+
+    def unvisited(self, player, room):
+        return (player.current_strata.strata_id, room.x, room.y, room.z) not in self.visited
+
+def strata_exit_here(room):
+    return any(obstacle.name == "strata exit" for obstacle in room.obstacles.values())
+
+def implant_count(player):
+    return len(player.installed_implants) + sum(1 for item in player.inventory if isinstance(item, CyberneticImplant))
+
+def simulate_game(seed, policy="explorer", max_turns=500, world_options=None):
+    """Plays one game with a policy and returns its outcome."""
+    world_options = dict(world_options or {"num_stratas": 1}, workers=1) # Already in a worker
+    game = Game(seed=seed, world_options=world_options, max_resident_stratas=world_options["num_stratas"])
+    game.rng.seed(seed)
+    agent = POLICIES[policy](random.Random(seed))
+    colors = Colors()
+    exits_reached = set()
+    turns = 0
+    while turns < max_turns and game.is_running and game.player.is_alive():
+        game.handle_command(agent.choose(game), colors)
+        turns += 1
+        room = game.player.current_room
+        if strata_exit_here(room):
+            exits_reached.add((game.player.current_strata.strata_id, room.x, room.y, room.z))
+    game.all_stratas.close()
+    alive = game.player.is_alive()
+    return {
+        "seed": seed,
+        "turns": turns,
+        "died": not alive,
+        "cause": None if alive else game.player.last_damage_source,
+        "exits_reached": len(exits_reached),
+        "implants": implant_count(game.player),
+        "health": game.player.health,
+    }
+
+def set_chances(escape_chance, scavenge_chance):
+    """Pool initializer applying the tuned chances in every worker."""
+    if escape_chance is not None:
+        COMMANDS["escape"].success_chance = escape_chance
+    if scavenge_chance is not None:
+        COMMANDS["scavenge"].implant_chance = scavenge_chance
+
+def run_simulations(games, policy="explorer", max_turns=500, world_options=None, workers=None, seed=0, escape_chance=None, scavenge_chance=None):
+    """(outcomes of games games with seeds seed, seed + 1, ..., seconds taken)."""
+    workers = workers or os.cpu_count() or 1
+    play = partial(simulate_game, policy=policy, max_turns=max_turns, world_options=world_options)
+    seeds = range(seed, seed + games)
+    start = time.perf_counter()
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_chances, initargs=(escape_chance, scavenge_chance)) as executor:
+            outcomes = list(executor.map(play, seeds, chunksize=max(1, games // (workers * 8))))
+    else:
+        chances = (COMMANDS["escape"].success_chance, COMMANDS["scavenge"].implant_chance)
+        set_chances(escape_chance, scavenge_chance)
+        try:
+            outcomes = list(map(play, seeds))
+        finally:
+            set_chances(*chances)
+    return outcomes, time.perf_counter() - start
+
+def summarize(outcomes, seconds):
+    turns = [outcome["turns"] for outcome in outcomes]
+    deaths = [outcome for outcome in outcomes if outcome["died"]]
+    return {
+        "games": len(outcomes),
+        "seconds": seconds,
+        "games_per_second": len(outcomes) / seconds if seconds else 0.0,
+        "mean_turns": statistics.mean(turns),
+        "median_turns": statistics.median(turns),
+        "death_rate": len(deaths) / len(outcomes),
+        "mean_death_turn": statistics.mean(outcome["turns"] for outcome in deaths) if deaths else None,
+        "death_causes": dict(Counter(outcome["cause"] for outcome in deaths).most_common()),
+        "mean_exits_reached": statistics.mean(outcome["exits_reached"] for outcome in outcomes),
+        "reached_an_exit": sum(1 for outcome in outcomes if outcome["exits_reached"]) / len(outcomes),
+        "mean_implants": statistics.mean(outcome["implants"] for outcome in outcomes),
+    }
+
+def format_summary(summary):
+    lines = [
+        f"{summary['games']} games in {summary['seconds']:.1f} s ({summary['games_per_second']:.1f} games/s)",
+        f"turns survived: mean {summary['mean_turns']:.1f}, median {summary['median_turns']:.1f}",
+        f"died: {summary['death_rate']:.1%}" + (f", at turn {summary['mean_death_turn']:.1f} on average" if summary["mean_death_turn"] is not None else ""),
+    ]
+    lines += [f"  {cause}: {count}" for cause, count in summary["death_causes"].items()]
+    lines.append(f"strata exits reached: mean {summary['mean_exits_reached']:.2f}, at least one in {summary['reached_an_exit']:.1%} of games")
+    lines.append(f"implants held at the end: mean {summary['mean_implants']:.2f}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.simulate", description="Play many headless games and summarise them.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="explorer")
+    parser.add_argument("--max-turns", type=int, default=500)
+    parser.add_argument("--workers", type=int, help="processes (default: one per CPU)")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument("--stratas", type=int, default=1)
+    parser.add_argument("--escape-chance", type=float, help="override the escape command's success chance")
+    parser.add_argument("--scavenge-chance", type=float, help="override the scavenge command's implant chance")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    outcomes, seconds = run_simulations(args.games, args.policy, args.max_turns, {"num_stratas": args.stratas},
+                                        args.workers, args.seed, args.escape_chance, args.scavenge_chance)
+    summary = summarize(outcomes, seconds)
+    print(json.dumps(summary, indent=4) if args.json else format_summary(summary))
+
+if __name__ == "__main__":
+    main()
@@ -1,263 +1,1004 @@
 import random
-import json
 import os
+from collections.abc import Mapping
+from functools import lru_cache
+from itertools import product, repeat
+import numpy as np
 from src.gameobjects.items import Item, CyberneticImplant
 from src.gameobjects.interactables import Terminal, Obstacle, CyberneticTerminal
 from src.gameobjects.enemies import Enemy, NPC
-from src.gameobjects.factory import create_from_json
+from src.gameobjects.factory import create_many_from_json
+from src.gameobjects.templates import content_template, content_templates, intern_template
+from src.content import CONTENT, load_content
+from src.nameindex import NameIndex
+from src.connectivity import connect, component_labels, exit_graph
 
-# Load content from JSON file
-script_dir = os.path.dirname(__file__)
-file_path = os.path.join(script_dir, "data", "content.json")
-with open(file_path, "r") as f:
-    CONTENT = json.load(f)
+# Bump whenever the same seed would generate a different world, so seed-based saves
+# made by another generator are rejected instead of loading into the wrong rooms
+GENERATOR_VERSION = 1
+
+class EmptyMapping(Mapping):
+    """Immutable empty mapping; pickles back to the shared EMPTY_MAPPING instance."""
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self):
+        return 0
+
+    def __reduce__(self):
+        return "EMPTY_MAPPING"
+
+# Shared by every room until it gets its first item, enemy or obstacle
+EMPTY_LIST = ()
+EMPTY_MAPPING = EmptyMapping()
 
 class Room:
+    """A single cell of a strata.
+
+    Zone and description are stored as indices into the CONTENT tables and exits as a
+    bitmask with one bit per entry of DIRECTIONS; neighbouring rooms are looked up in
+    the strata grid by coordinates when an exit is followed.
+
+    Entities are kept in one bucket per kind: items, terminals (including cybernetic
+    terminals) and NPCs. add_item and remove_item route any of them to its bucket.
+    The find_ methods look contents up by name through RoomNames, built on the first
+    lookup and kept in sync by the mutators.
+
+    version counts the room's mutations: anything rendered from the room, like the
+    look output kept in look_cache, is current while the version it was made at is.
+    """
+    __slots__ = ("x", "y", "z", "zone_index", "description_index", "exit_mask", "grid",
+                 "_items", "_terminals", "_npcs", "cybernetic_terminal", "_enemies", "_obstacles", "_names",
+                 "version", "look_cache")
+
     def __init__(self, description, zone, x, y, z):
-        self.description = description
-        self.zone = zone
+        self.zone_index, self.description_index = description_key(zone, description)
         self.x = x
         self.y = y
         self.z = z
-        self.exits = {}
-        self.items = []
-        self.enemies = []
-        self.obstacles = {}
+        self.exit_mask = 0
+        self.grid = None # The strata grid this room belongs to
+        self._items = EMPTY_LIST
+        self._terminals = EMPTY_LIST
+        self._npcs = EMPTY_LIST
+        self.cybernetic_terminal = None
+        self._enemies = EMPTY_LIST
+        self._obstacles = EMPTY_MAPPING
+        self._names = None
+        self.version = 0
+        self.look_cache = None
+
+    @classmethod
+    def from_indices(cls, zone_index, description_index, x, y, z, exit_mask, grid):
+        room = cls.__new__(cls)
+        room.zone_index = zone_index
+        room.description_index = description_index
+        room.x = x
+        room.y = y
+        room.z = z
+        room.exit_mask = exit_mask
+        room.grid = grid
+        room._items = EMPTY_LIST
+        room._terminals = EMPTY_LIST
+        room._npcs = EMPTY_LIST
+        room.cybernetic_terminal = None
+        room._enemies = EMPTY_LIST
+        room._obstacles = EMPTY_MAPPING
+        room._names = None
+        room.version = 0
+        room.look_cache = None
+        return room
+
+    def __getstate__(self):
+        # Spilled stratas are pickled, and look output is cheap to render again
+        state = {name: getattr(self, name) for name in Room.__slots__}
+        state["look_cache"] = None
+        return None, state
+
+    @property
+    def zone(self):
+        return description_tables().zone_names[self.zone_index]
+
+    @property
+    def description(self):
+        return description_tables().descriptions[self.zone_index][self.description_index]
+
+    @property
+    def exits(self):
+        return ExitView(self)
+
+    @property
+    def directions(self):
+        """Directions the player can try to leave by, in DIRECTIONS order: the exits, plus
+        any direction only an obstacle stands in, like a strata exit out of the strata."""
+        if not self._obstacles:
+            return MASK_DIRECTIONS[self.exit_mask]
+        exits = MASK_DIRECTIONS[self.exit_mask]
+        return tuple(direction for direction in DIRECTIONS if direction in exits or direction in self._obstacles)
+
+    @property
+    def items(self):
+        """Items that are neither terminals nor NPCs."""
+        return self._items
+
+    @property
+    def terminals(self):
+        return self._terminals
+
+    @property
+    def npcs(self):
+        return self._npcs
+
+    @property
+    def has_terminal(self):
+        return bool(self._terminals)
+
+    @property
+    def has_npc(self):
+        return bool(self._npcs)
+
+    @property
+    def has_cybernetic_terminal(self):
+        return self.cybernetic_terminal is not None
+
+    @property
+    def visible_items(self):
+        """Items and terminals, everything 'look' lists as seen in the room."""
+        return [*self._items, *self._terminals]
+
+    @property
+    def entities(self):
+        """Every item, terminal and NPC in the room."""
+        return [*self._items, *self._terminals, *self._npcs]
+
+    @property
+    def enemies(self):
+        return self._enemies
+
+    @enemies.setter
+    def enemies(self, enemies):
+        self._enemies = enemies or EMPTY_LIST
+        self._names = None
+        self.touch()
+
+    @property
+    def obstacles(self):
+        return self._obstacles
+
+    @obstacles.setter
+    def obstacles(self, obstacles):
+        self._obstacles = obstacles or EMPTY_MAPPING
+        self._names = None
+        self.touch()
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = RoomNames(self)
+        return self._names
+
+    def find_visible_item(self, name):
+        """The item or, failing that, the terminal called name, as 'get' picks them."""
+        names = self.names
+        return names.items.find(name) or names.terminals.find(name)
+
+    def find_terminal(self, name):
+        return self.names.terminals.find(name)
+
+    def find_npc(self, name):
+        return self.names.npcs.find(name)
+
+    def find_enemy(self, name):
+        return self.names.enemies.find(name)
+
+    def find_enemies(self, name):
+        return self.names.enemies.find_all(name)
+
+    def find_obstacle(self, name):
+        return self.names.obstacles.find(name)
+
+    def obstacle_direction(self, obstacle):
+        return self.names.obstacle_directions.get(obstacle)
+
+    def touch(self):
+        """Records that the room's contents no longer match what the generator produced.
+
+        Called by every mutator; callers that change an entity in place (damaging an
+        enemy or obstacle) call it themselves. Also moves the room on to a new version.
+        """
+        self.version += 1
+        if self.grid is not None:
+            self.grid.dirty.add((self.x, self.y, self.z))
+
+    def neighbour(self, direction):
+        dx, dy, dz = DIRECTION_OFFSETS[direction]
+        return self.grid[(self.x + dx, self.y + dy, self.z + dz)]
 
     def add_exit(self, direction, room):
-        self.exits[direction] = room
+        # Neighbours are resolved from coordinates, room is always the one at that offset
+        self.exit_mask |= 1 << DIRECTION_BITS[direction]
+        self.version += 1
 
     def add_item(self, item):
-        self.items.append(item)
+        if isinstance(item, NPC):
+            if self._npcs is EMPTY_LIST:
+                self._npcs = []
+            self._npcs.append(item)
+            if self._names is not None:
+                self._names.npcs.add(item)
+        elif isinstance(item, Terminal):
+            if self._terminals is EMPTY_LIST:
+                self._terminals = []
+            self._terminals.append(item)
+            if self.cybernetic_terminal is None and isinstance(item, CyberneticTerminal):
+                self.cybernetic_terminal = item
+            if self._names is not None:
+                self._names.terminals.add(item)
+        else:
+            if self._items is EMPTY_LIST:
+                self._items = []
+            self._items.append(item)
+            if self._names is not None:
+                self._names.items.add(item)
+        self.touch()
 
     def remove_item(self, item):
-        self.items.remove(item)
+        if isinstance(item, NPC):
+            self._npcs.remove(item)
+            if self._names is not None:
+                self._names.npcs.remove(item)
+        elif isinstance(item, Terminal):
+            self._terminals.remove(item)
+            if item is self.cybernetic_terminal:
+                self.cybernetic_terminal = next((terminal for terminal in self._terminals if isinstance(terminal, CyberneticTerminal)), None)
+            if self._names is not None:
+                self._names.terminals.remove(item)
+        else:
+            self._items.remove(item)
+            if self._names is not None:
+                self._names.items.remove(item)
+        self.touch()
 
     def add_enemy(self, enemy):
-        self.enemies.append(enemy)
+        self.arrive(enemy)
+        self.touch()
 
     def remove_enemy(self, enemy):
-        self.enemies.remove(enemy)
+        self.leave(enemy)
+        self.touch()
+
+    def arrive(self, enemy):
+        """add_enemy for an enemy roaming in: the room moves on to a new version but isn't
+        changed since generation, as the Roamers save where their enemies are."""
+        if self._enemies is EMPTY_LIST:
+            self._enemies = []
+        self._enemies.append(enemy)
+        if self._names is not None:
+            self._names.enemies.add(enemy)
+        self.version += 1
+
+    def leave(self, enemy):
+        """remove_enemy for an enemy roaming out, see arrive."""
+        self._enemies.remove(enemy)
+        if self._names is not None:
+            self._names.enemies.remove(enemy)
+        self.version += 1
 
     def add_obstacle(self, direction, obstacle):
-        self.obstacles[direction] = obstacle
+        if self._obstacles is EMPTY_MAPPING:
+            self._obstacles = {}
+        if self._names is not None:
+            if direction in self._obstacles:
+                self._names = None # The replacement keeps its direction's place, rebuild
+            else:
+                self._names.add_obstacle(direction, obstacle)
+        self._obstacles[direction] = obstacle
+        self.touch()
 
     def remove_obstacle(self, direction):
-        if direction in self.obstacles:
-            del self.obstacles[direction]
+        if direction in self._obstacles:
+            if self._names is not None:
+                self._names.remove_obstacle(self._obstacles[direction])
+            del self._obstacles[direction]
+            self.touch()
 
     def get_random_exit(self):
-        if not self.exits:
+        if not self.exit_mask:
             return None
-        return random.choice(list(self.exits.keys()))
+        return random.choice(MASK_DIRECTIONS[self.exit_mask])
 
-    def to_json(self):
+    def contents_to_json(self):
         return {
+            "items": [item.to_json() for item in self.entities],
+            "enemies": [enemy.to_json() for enemy in self.enemies if enemy.home is None], # Roamers save roaming ones
+            "obstacles": {direction: obstacle.to_json() for direction, obstacle in self.obstacles.items()}
+        }
+
+    def load_contents(self, data):
+        """Replaces the room's items, terminals, NPCs, enemies and obstacles."""
+        self._items = self._terminals = self._npcs = EMPTY_LIST
+        self.cybernetic_terminal = None
+        self._names = None
+        if data["items"]:
+            for item in create_many_from_json(data["items"]):
+                self.add_item(item)
+        self._enemies = Enemy.from_json_many(data["enemies"]) or EMPTY_LIST
+        obstacles = data["obstacles"]
+        self._obstacles = dict(zip(obstacles, Obstacle.from_json_many(obstacles.values()))) if obstacles else EMPTY_MAPPING
+        self.touch()
+
+    def to_json(self):
+        data = {
             "description": self.description,
             "zone": self.zone,
             "x": self.x,
             "y": self.y,
             "z": self.z,
-            "items": [item.to_json() for item in self.items],
-            "enemies": [enemy.to_json() for enemy in self.enemies],
-            "obstacles": {direction: obstacle.to_json() for direction, obstacle in self.obstacles.items()}
+            "exits": self.exit_mask,
         }
+        data.update(self.contents_to_json())
+        return data
 
     @classmethod
     def from_json(cls, data):
         room = cls(data["description"], data["zone"], data["x"], data["y"], data["z"])
-        room.items = [create_from_json(item_data) for item_data in data["items"]]
-        room.enemies = [Enemy.from_json(enemy_data) for enemy_data in data["enemies"]]
-        room.obstacles = {direction: Obstacle.from_json(obstacle_data) for direction, obstacle_data in data["obstacles"].items()}
+        room.exit_mask = data.get("exits", 0) # Saves made before exits were saved reconnect them in Strata.finish_loading
+        room.load_contents(data)
         return room
 
+class RoomNames:
+    """Name indexes of a room's items, terminals, NPCs, enemies and obstacles, plus the
+    direction of every obstacle."""
+    __slots__ = ("items", "terminals", "npcs", "enemies", "obstacles", "obstacle_directions")
+
+    def __init__(self, room):
+        self.items = NameIndex(room._items)
+        self.terminals = NameIndex(room._terminals)
+        self.npcs = NameIndex(room._npcs)
+        self.enemies = NameIndex(room._enemies)
+        self.obstacles = NameIndex(room._obstacles.values())
+        self.obstacle_directions = {obstacle: direction for direction, obstacle in room._obstacles.items()}
+
+    def add_obstacle(self, direction, obstacle):
+        self.obstacles.add(obstacle)
+        self.obstacle_directions[obstacle] = direction
+
+    def remove_obstacle(self, obstacle):
+        self.obstacles.remove(obstacle)
+        del self.obstacle_directions[obstacle]
+
+class ExitView(Mapping):
+    """Read-only direction -> Room view over a room's exit bitmask."""
+    __slots__ = ("room",)
+
+    def __init__(self, room):
+        self.room = room
+
+    def __getitem__(self, direction):
+        bit = DIRECTION_BITS.get(direction)
+        if bit is None or not self.room.exit_mask & (1 << bit):
+            raise KeyError(direction)
+        return self.room.neighbour(direction)
+
+    def __contains__(self, direction):
+        bit = DIRECTION_BITS.get(direction)
+        return bit is not None and bool(self.room.exit_mask & (1 << bit))
+
+    def __iter__(self):
+        return iter(MASK_DIRECTIONS[self.room.exit_mask])
+
+    def __len__(self):
+        return len(MASK_DIRECTIONS[self.room.exit_mask])
+
+class RoomGrid(dict):
+    """(x, y, z) -> Room grid with every room in memory, as rebuilt from a full save."""
+    def __init__(self):
+        super().__init__()
+        self.dirty = set() # Positions of rooms changed since generation
+
 class Strata:
     def __init__(self, width, height, depth, strata_id):
         self.width = width
         self.height = height
         self.depth = depth
         self.strata_id = strata_id
-        self.grid = {} # (x, y, z) -> Room object
+        self.grid = RoomGrid() # (x, y, z) -> Room object
         self.exits_to_next_strata = [] # List of (Room, direction) tuples
-
-    def to_json(self):
-        return {
+        self.components = None # Array of connected component ids, indexed [x, y, z]
+
+    @property
+    def is_chunked(self):
+        return isinstance(self.grid, ChunkedGrid)
+
+    def changed_rooms_to_json(self):
+        """Contents of every room changed since generation, keyed by "x,y,z"."""
+        return {f"{x},{y},{z}": self.grid[(x, y, z)].contents_to_json() for (x, y, z) in sorted(self.grid.dirty)}
+
+    def component_of(self, position):
+        """Id of the connected component of the exit graph the room at position belongs to."""
+        if self.is_chunked:
+            return 0 # Chunked stratas are generated fully connected
+        if self.components is None:
+            self.components = component_labels(exit_graph(self.link_layout()), (self.width, self.height, self.depth))
+        return int(self.components[position])
+
+    def is_reachable(self, start, end):
+        return self.component_of(start) == self.component_of(end)
+
+    def link_layout(self):
+        """StrataLayout of the rooms' current exits, for grids that are not backed by one."""
+        if isinstance(self.grid, LayoutGrid):
+            return self.grid.layout
+        shape = (self.width, self.height, self.depth)
+        mask = np.zeros(shape, dtype=np.uint8)
+        for position, room in self.grid.items():
+            mask[position] = room.exit_mask
+        north, east, up = ((mask >> DIRECTION_BITS[direction]) & 1 == 1 for direction in ("north", "east", "up"))
+        return StrataLayout(np.zeros(shape, dtype=np.int8), np.zeros(shape, dtype=np.int8), north, east, up)
+
+    def header_to_json(self):
+        """Everything to_json saves except the rooms."""
+        data = {
             "width": self.width,
             "height": self.height,
             "depth": self.depth,
             "strata_id": self.strata_id,
-            "grid": {f"{x},{y},{z}": room.to_json() for (x, y, z), room in self.grid.items()}
         }
+        if self.is_chunked:
+            data.update({
+                "seed": self.grid.seed,
+                "chunk_size": self.grid.chunk_size,
+                "has_gbe": self.grid.has_gbe
+            })
+        return data
+
+    def saved_rooms(self):
+        """(position, Room) of every room to_json saves."""
+        if self.is_chunked:
+            # Only rooms that were built are saved, the rest is regenerated from the seed
+            return self.grid.rooms.items()
+        return self.grid.items()
+
+    def to_json(self):
+        data = self.header_to_json()
+        data["grid"] = {f"{x},{y},{z}": room.to_json() for (x, y, z), room in self.saved_rooms()}
+        return data
 
     @classmethod
-    def from_json(cls, data):
+    def from_json_header(cls, data):
+        """Empty strata to add saved rooms to with restore_room, then finish_loading."""
         strata = cls(data["width"], data["height"], data["depth"], data["strata_id"])
-        for key, room_data in data["grid"].items():
-            x, y, z = map(int, key.split(","))
-            strata.grid[(x, y, z)] = Room.from_json(room_data)
-        
+        if "chunk_size" in data:
+            strata.grid = ChunkedGrid(strata, data["seed"], data["chunk_size"], data["has_gbe"])
+        return strata
+
+    def restore_room(self, position, room):
+        if self.is_chunked:
+            self.grid.restore(room)
+        else:
+            room.grid = self.grid
+            self.grid[position] = room
+
+    def finish_loading(self, reconnect=False):
+        """Completes a strata built with restore_room. Rooms carry their saved exits;
+        reconnect links every pair of adjacent rooms instead, for saves that predate that."""
+        if self.is_chunked or not reconnect:
+            return # Chunked stratas take their exits from the regenerated chunk layouts
+
         # Reconnect exits after all rooms are created
-        for (x, y, z), room in strata.grid.items():
+        for (x, y, z), room in self.grid.items():
             # Connect North/South
             if y > 0:
-                north_room = strata.grid.get((x, y - 1, z))
+                north_room = self.grid.get((x, y - 1, z))
                 if north_room:
                     room.add_exit("north", north_room)
                     north_room.add_exit("south", room)
             # Connect East/West
             if x > 0:
-                west_room = strata.grid.get((x - 1, y, z))
+                west_room = self.grid.get((x - 1, y, z))
                 if west_room:
                     room.add_exit("west", west_room)
                     west_room.add_exit("east", room)
             # Connect Up/Down
             if z > 0:
-                down_room = strata.grid.get((x, y, z - 1))
+                down_room = self.grid.get((x, y, z - 1))
                 if down_room:
                     room.add_exit("down", down_room)
                     down_room.add_exit("up", room)
+
+    @classmethod
+    def from_json(cls, data):
+        strata = cls.from_json_header(data)
+        reconnect = False
+        for key, room_data in data["grid"].items():
+            strata.restore_room(tuple(map(int, key.split(","))), Room.from_json(room_data))
+            reconnect = reconnect or "exits" not in room_data
+        strata.finish_loading(reconnect)
         return strata
 
 DIRECTIONS = ["north", "south", "east", "west", "up", "down"]
+DIRECTION_OFFSETS = {
+    "north": (0, -1, 0),
+    "south": (0, 1, 0),
+    "east": (1, 0, 0),
+    "west": (-1, 0, 0),
+    "up": (0, 0, 1),
+    "down": (0, 0, -1),
+}
 
 def get_opposite_direction(direction):
     opposites = {"north": "south", "south": "north", "east": "west", "west": "east", "up": "down", "down": "up"}
     return opposites.get(direction)
 
-def generate_world(num_stratas=1):
-    """Creates a network of rooms with different zones and stratas."""
-    all_stratas = []
-    starting_room = None
-
-    for strata_id in range(num_stratas):
-        # Randomly determine strata dimensions
-        strata_width = random.randint(5, 15)
-        strata_height = random.randint(5, 15)
-        strata_depth = random.randint(5, 15)
-
-        current_strata = Strata(strata_width, strata_height, strata_depth, strata_id)
-        all_stratas.append(current_strata)
-
-        zones = list(CONTENT["room_descriptions"].keys())
-        
-        # Create rooms for the current strata
-        for x in range(strata_width):
-            for y in range(strata_height):
-                for z in range(strata_depth):
-                    zone = random.choice(zones)
-                    description = random.choice(CONTENT["room_descriptions"][zone])
-                    room = Room(description, zone, x, y, z)
-                    current_strata.grid[(x, y, z)] = room
-
-        # Connect adjacent rooms within the strata
-        for x in range(strata_width):
-            for y in range(strata_height):
-                for z in range(strata_depth):
-                    room = current_strata.grid[(x, y, z)]
-
-                    # Connect North/South
-                    if y > 0 and random.random() > 0.1: # 10% chance to not connect
-                        north_room = current_strata.grid[(x, y - 1, z)]
-                        room.add_exit("north", north_room)
-                        north_room.add_exit("south", room)
-                    
-                    # Connect East/West
-                    if x > 0 and random.random() > 0.1: # 10% chance to not connect
-                        west_room = current_strata.grid[(x - 1, y, z)]
-                        room.add_exit("west", west_room)
-                        west_room.add_exit("east", room)
-
-                    # Connect Up/Down
-                    if z > 0 and random.random() > 0.1: # 10% chance to not connect
-                        down_room = current_strata.grid[(x, y, z - 1)]
-                        room.add_exit("down", down_room)
-                        down_room.add_exit("up", room)
-        
-        # Place Strata Exits
-        possible_exit_rooms = []
-        for x in range(strata_width):
-            for y in range(strata_height):
-                # Exits to next strata (up)
-                room_up = current_strata.grid[(x, y, strata_depth - 1)]
-                if "up" in room_up.exits: # Only if there's an 'up' exit
-                    possible_exit_rooms.append((room_up, "up"))
-                # Exits to previous strata (down)
-                room_down = current_strata.grid[(x, y, 0)]
-                if "down" in room_down.exits: # Only if there's a 'down' exit
-                    possible_exit_rooms.append((room_down, "down"))
-
-        num_exits = random.randint(1, 3)
-        random.shuffle(possible_exit_rooms)
-        
-        for i in range(min(num_exits, len(possible_exit_rooms))):
-            exit_room, exit_direction = possible_exit_rooms[i]
-            # Create a special obstacle for strata exit
-            strata_exit_obstacle = Obstacle("strata exit", f"A massive portal leading {exit_direction} to another strata.", 50) # High strength required
-            exit_room.add_obstacle(exit_direction, strata_exit_obstacle)
-            current_strata.exits_to_next_strata.append((exit_room, exit_direction))
-        
-        # Set starting room for the first strata
-        if strata_id == 0:
-            starting_room = current_strata.grid[(0, 0, 0)]
-
-        # Add game elements to rooms in the current strata
-        all_rooms_in_strata = list(current_strata.grid.values())
-
-        # Add the GBE (only once in the entire world, in the last strata)
-        if strata_id == num_stratas - 1:
-            gbe_room = random.choice(all_rooms_in_strata)
-            gbe_data = CONTENT["items"]["gbe"]
-            gbe = Item(gbe_data["name"], gbe_data["description"])
-            gbe_room.add_item(gbe)
-
-        # Add some random items with logs
-        for _ in range(len(all_rooms_in_strata) // 10):
-            item_room = random.choice(all_rooms_in_strata)
-            log = random.choice(CONTENT["item_logs"])
-            item = Item("data-chip", "A small, discarded data chip.", log)
-            item_room.add_item(item)
-
-        # Add some cybernetic implants
-        for _ in range(len(all_rooms_in_strata) // 15):
-            implant_room = random.choice(all_rooms_in_strata)
-            implant_data = random.choice(CONTENT["cybernetic_implants"])
-            implant = CyberneticImplant(implant_data["name"], implant_data["description"], implant_data["stat_bonus"], implant_data["implant_type"])
-            implant_room.add_item(implant)
-
-        # Add some terminals with lore and cybernetic terminals
-        for _ in range(len(all_rooms_in_strata) // 8):
-            terminal_room = random.choice(all_rooms_in_strata)
-            if not any(isinstance(item, Terminal) for item in terminal_room.items):
-                if random.random() < 0.3: # 30% chance for a CyberneticTerminal
-                    lore = random.choice(CONTENT["lore_messages"])
-                    terminal = CyberneticTerminal("cybernetic terminal", "A terminal with advanced interfaces for cybernetic modifications.", lore)
-                else:
-                    lore = random.choice(CONTENT["lore_messages"])
-                    terminal = Terminal("terminal", "A dusty, forgotten terminal.", lore)
-                terminal_room.add_item(terminal)
-
-        # Add some enemies
-        for _ in range(len(all_rooms_in_strata) // 6):
-            enemy_room = random.choice(all_rooms_in_strata)
-            if not enemy_room.enemies:
-                enemy_data = random.choice(CONTENT["enemies"])
-                enemy = Enemy(enemy_data["name"], enemy_data["description"], enemy_data["health"], enemy_data["damage"], enemy_data["durability"])
-                enemy_room.add_enemy(enemy)
-
-        # Add some NPCs
-        for _ in range(len(all_rooms_in_strata) // 10):
-            npc_room = random.choice(all_rooms_in_strata)
-            if not any(isinstance(item, NPC) for item in npc_room.items): # Avoid placing multiple NPCs in one room
-                npc_data = random.choice(CONTENT["npcs"])
-                npc = NPC(npc_data["name"], npc_data["description"], npc_data["dialogue"])
-                npc_room.items.append(npc) # NPCs are treated as items in the room for simplicity
-
-        # Add some obstacles
-        for room in all_rooms_in_strata:
-            for direction in room.exits:
-                if random.random() < 0.1: # 10% chance to block an exit
-                    obstacle_data = random.choice(CONTENT["obstacles"])
-                    obstacle = Obstacle(obstacle_data["name"], obstacle_data["description"], obstacle_data["strength_required"])
-                    room.add_obstacle(direction, obstacle)
+LINK_CHANCE = 0.9 # 10% chance for two adjacent rooms to not connect
+OBSTACLE_CHANCE = 0.1 # 10% chance to block an exit
+# Exit directions for every possible exit bitmask
+MASK_DIRECTIONS = [tuple(d for bit, d in enumerate(DIRECTIONS) if mask & (1 << bit)) for mask in range(64)]
+
+# Bit of each direction in an exit mask
+DIRECTION_BITS = {direction: bit for bit, direction in enumerate(DIRECTIONS)}
+CHUNK_SIZE = 16
+
+class DescriptionTables:
+    """Lookup tables behind Room.zone_index and Room.description_index. Generation only draws
+    from the CONTENT entries (counts holds how many each zone has); text from saves that is
+    no longer in CONTENT is appended."""
+    def __init__(self, content):
+        self.zone_names = list(content.zones)
+        self.descriptions = [list(descriptions) for descriptions in content.room_descriptions]
+        self.keys = {(zone, description): (zone_index, description_index)
+                     for zone_index, zone in enumerate(self.zone_names)
+                     for description_index, description in enumerate(self.descriptions[zone_index])}
+        self.counts = np.array([len(descriptions) for descriptions in content.room_descriptions])
+
+@lru_cache(maxsize=None)
+def description_tables():
+    return DescriptionTables(load_content())
+
+def description_key(zone, description):
+    """(zone_index, description_index) of a room description, registering unknown text."""
+    tables = description_tables()
+    key = tables.keys.get((zone, description))
+    if key is None:
+        if zone not in tables.zone_names:
+            tables.zone_names.append(zone)
+            tables.descriptions.append([])
+        zone_index = tables.zone_names.index(zone)
+        tables.descriptions[zone_index].append(description)
+        key = tables.keys[(zone, description)] = (zone_index, len(tables.descriptions[zone_index]) - 1)
+    return key
+
+class StrataLayout:
+    """Zone, description and connectivity arrays for a strata, all indexed [x, y, z].
+
+    north/east/up mark whether a room connects to its neighbour in that direction,
+    so every link between two rooms is stored exactly once.
+    """
+    def __init__(self, zone_index, description_index, north, east, up):
+        self.zone_index = zone_index
+        self.description_index = description_index
+        self.north = north
+        self.east = east
+        self.up = up
+        self._exit_mask = None
+
+    @property
+    def shape(self):
+        return self.zone_index.shape
+
+    def exit_array(self, direction):
+        """Boolean array marking which rooms have an exit in the given direction."""
+        if direction == "north":
+            return self.north
+        if direction == "east":
+            return self.east
+        if direction == "up":
+            return self.up
+        exits = np.zeros(self.shape, dtype=bool)
+        if direction == "south":
+            exits[:, :-1, :] = self.north[:, 1:, :]
+        elif direction == "west":
+            exits[1:, :, :] = self.east[:-1, :, :]
+        elif direction == "down":
+            exits[:, :, 1:] = self.up[:, :, :-1]
+        return exits
+
+    @property
+    def exit_mask(self):
+        """Per-room bitmask of exits, one bit per entry of DIRECTIONS."""
+        if self._exit_mask is None:
+            mask = np.zeros(self.shape, dtype=np.uint8)
+            for bit, direction in enumerate(DIRECTIONS):
+                mask |= self.exit_array(direction).astype(np.uint8) << bit
+            self._exit_mask = mask
+        return self._exit_mask
+
+    def contains(self, x, y, z):
+        width, height, depth = self.shape
+        return 0 <= x < width and 0 <= y < height and 0 <= z < depth
+
+    def build_room(self, grid, local_position, position, exit_mask=None):
+        """Builds the room at local_position of this layout, which sits at position in grid."""
+        if exit_mask is None:
+            exit_mask = self.exit_mask
+        return Room.from_indices(self.zone_index.item(local_position), self.description_index.item(local_position), *position, exit_mask.item(local_position), grid)
+
+def generate_layout(width, height, depth, rng=None, open_faces=()):
+    """Draws the zones, descriptions and links of a whole strata in a few batched calls.
+
+    Links leaving the layout are dropped, except through the faces named in open_faces
+    ("north", "east" or "up"), which chunks use to connect to their neighbours.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    shape = (width, height, depth)
+    counts = description_tables().counts
+    zone_index = rng.integers(0, len(counts), size=shape, dtype=np.int8)
+    description_index = rng.integers(0, counts[zone_index]).astype(np.int8)
+
+    links = rng.random((3,) + shape) < LINK_CHANCE
+    north, east, up = links
+    if "north" not in open_faces:
+        north[:, 0, :] = False # y - 1 is out of bounds
+    if "east" not in open_faces:
+        east[-1, :, :] = False # x + 1 is out of bounds
+    if "up" not in open_faces:
+        up[:, :, -1] = False # z + 1 is out of bounds
+    return StrataLayout(zone_index, description_index, north, east, up)
+
+class LayoutGrid(Mapping):
+    """Strata grid backed by a StrataLayout. Room objects are only built the first time
+    their cell is accessed; iterating the grid builds every room."""
+    def __init__(self, layout):
+        self.layout = layout
+        self.rooms = {}
+        self.dirty = set() # Positions of rooms changed since generation
+
+    def __getitem__(self, position):
+        room = self.rooms.get(position)
+        if room is None:
+            if not self.layout.contains(*position):
+                raise KeyError(position)
+            room = self.layout.build_room(self, position, position)
+            self.rooms[position] = room
+        return room
+
+    def __setitem__(self, position, room):
+        self.rooms[position] = room
+
+    def __contains__(self, position):
+        return self.layout.contains(*position)
+
+    def __iter__(self):
+        width, height, depth = self.layout.shape
+        return product(range(width), range(height), range(depth))
+
+    def __len__(self):
+        return self.layout.zone_index.size
+
+    @property
+    def loaded(self):
+        return len(self.rooms)
+
+class ChunkedGrid(Mapping):
+    """Strata grid split into cubic chunks of chunk_size rooms per axis.
+
+    A chunk's layout, rooms and population are generated from a seed derived from
+    (seed, strata_id, chunk coordinates) the first time one of its rooms is accessed, so a
+    strata only costs what the player has visited. Iterating the grid visits every room of
+    the strata; use rooms for the ones built so far.
+    """
+    def __init__(self, strata, seed, chunk_size=CHUNK_SIZE, has_gbe=False):
+        self.strata = strata
+        self.seed = seed
+        self.chunk_size = chunk_size
+        self.has_gbe = has_gbe
+        self.rooms = {}
+        self.layouts = {} # chunk -> StrataLayout
+        self.exit_masks = {} # chunk -> exit mask including links to neighbouring chunks
+        self.populated = set()
+        self.dirty = set() # Positions of rooms changed since their chunk was populated
+        # Strata-wide placements are decided up front and added when their chunk is populated
+        self.pending_items = {} # (x, y, z) -> [Item]
+        self.pending_exits = {} # (x, y, z) -> direction
+        self.plan_placements()
+
+    def plan_placements(self):
+        rng = random.Random(self.seed)
+        strata = self.strata
+        for _ in range(rng.randint(1, 3)):
+            exit_direction = rng.choice(["up", "down"])
+            layer = strata.depth - 1 if exit_direction == "up" else 0
+            self.pending_exits[(rng.randrange(strata.width), rng.randrange(strata.height), layer)] = exit_direction
+        if self.has_gbe:
+            position = (rng.randrange(strata.width), rng.randrange(strata.height), rng.randrange(strata.depth))
+            self.pending_items.setdefault(position, []).append(Item(content_template("items", "gbe")))
+
+    def contains(self, x, y, z):
+        return 0 <= x < self.strata.width and 0 <= y < self.strata.height and 0 <= z < self.strata.depth
+
+    def chunk_of(self, position):
+        return tuple(axis // self.chunk_size for axis in position)
+
+    def chunk_origin(self, chunk):
+        return tuple(axis * self.chunk_size for axis in chunk)
+
+    def chunk_seed(self, chunk, stream):
+        return np.random.SeedSequence([self.seed, self.strata.strata_id, *chunk, stream])
+
+    def chunk_layout(self, chunk):
+        layout = self.layouts.get(chunk)
+        if layout is None:
+            strata = self.strata
+            origin = self.chunk_origin(chunk)
+            extent = [min(self.chunk_size, size - start) for start, size in zip(origin, (strata.width, strata.height, strata.depth))]
+            open_faces = []
+            if origin[1] > 0:
+                open_faces.append("north")
+            if origin[0] + extent[0] < strata.width:
+                open_faces.append("east")
+            if origin[2] + extent[2] < strata.depth:
+                open_faces.append("up")
+            rng = np.random.default_rng(self.chunk_seed(chunk, 0))
+            layout = generate_layout(*extent, rng=rng, open_faces=open_faces)
+            # Every chunk is one component with at least one link through each open face,
+            # which keeps the whole strata connected without looking past the chunk
+            connect(layout, rng)
+            for face in open_faces:
+                links = getattr(layout, face)
+                face_links = {"north": links[:, 0, :], "east": links[-1, :, :], "up": links[:, :, -1]}[face]
+                if not face_links.any():
+                    face_links.flat[rng.integers(face_links.size)] = True
+            self.layouts[chunk] = layout
+        return layout
+
+    def chunk_exit_mask(self, chunk):
+        """Exit mask of a chunk, completed with the links owned by the neighbouring chunks."""
+        mask = self.exit_masks.get(chunk)
+        if mask is None:
+            mask = self.chunk_layout(chunk).exit_mask.copy()
+            cx, cy, cz = chunk
+            origin = self.chunk_origin(chunk)
+            if origin[1] + mask.shape[1] < self.strata.height:
+                south = self.chunk_layout((cx, cy + 1, cz)).north[:, 0, :]
+                mask[:, -1, :] |= south.astype(np.uint8) << DIRECTION_BITS["south"]
+            if cx > 0:
+                west = self.chunk_layout((cx - 1, cy, cz)).east[-1, :, :]
+                mask[0, :, :] |= west.astype(np.uint8) << DIRECTION_BITS["west"]
+            if cz > 0:
+                down = self.chunk_layout((cx, cy, cz - 1)).up[:, :, -1]
+                mask[:, :, 0] |= down.astype(np.uint8) << DIRECTION_BITS["down"]
+            self.exit_masks[chunk] = mask
+        return mask
+
+    def build_room(self, position):
+        chunk = self.chunk_of(position)
+        origin = self.chunk_origin(chunk)
+        local_position = tuple(axis - start for axis, start in zip(position, origin))
+        room = self.chunk_layout(chunk).build_room(self, local_position, position, self.chunk_exit_mask(chunk))
+        self.rooms[position] = room
+        return room
+
+    def populate_chunk(self, chunk):
+        self.populated.add(chunk)
+        dirty = set(self.dirty)
+        seed_sequence = self.chunk_seed(chunk, 1)
+        rng = random.Random(int(seed_sequence.generate_state(1, np.uint64)[0]))
+        origin = self.chunk_origin(chunk)
+        exit_mask = self.chunk_exit_mask(chunk)
+        populate_region(self, origin, exit_mask, rng, np.random.default_rng(seed_sequence))
+
+        for position, exit_direction in self.pending_exits.items():
+            if self.chunk_of(position) != chunk:
+                continue
+            add_strata_exit(self.strata, self[position], exit_direction)
+        for position, items in self.pending_items.items():
+            if self.chunk_of(position) == chunk:
+                for item in items:
+                    self[position].add_item(item)
+        self.dirty = dirty
+
+    def restore(self, room):
+        """Adds a saved room, taking its exits from the regenerated chunk layout."""
+        position = (room.x, room.y, room.z)
+        chunk = self.chunk_of(position)
+        self.populated.add(chunk)
+        local_position = tuple(axis - start for axis, start in zip(position, self.chunk_origin(chunk)))
+        room.exit_mask = self.chunk_exit_mask(chunk).item(local_position)
+        room.grid = self
+        self.rooms[position] = room
+        self.dirty.add(position)
+
+    def __getitem__(self, position):
+        room = self.rooms.get(position)
+        if room is not None:
+            return room
+        if not self.contains(*position):
+            raise KeyError(position)
+        chunk = self.chunk_of(position)
+        if chunk not in self.populated:
+            self.populate_chunk(chunk)
+            room = self.rooms.get(position)
+            if room is not None:
+                return room
+        return self.build_room(position)
+
+    def __contains__(self, position):
+        return self.contains(*position)
+
+    def __iter__(self):
+        return product(range(self.strata.width), range(self.strata.height), range(self.strata.depth))
+
+    def __len__(self):
+        return self.strata.width * self.strata.height * self.strata.depth
+
+    @property
+    def loaded(self):
+        return len(self.rooms)
+
+def add_strata_exit(strata, exit_room, exit_direction):
+    # Create a special obstacle for strata exit
+    strata_exit_obstacle = Obstacle(intern_template("obstacles", {
+        "name": "strata exit",
+        "description": f"A massive portal leading {exit_direction} to another strata.",
+        "strength_required": 50 # High strength required
+    }))
+    exit_room.add_obstacle(exit_direction, strata_exit_obstacle)
+    strata.exits_to_next_strata.append((exit_room, exit_direction))
+
+def populate_region(grid, origin, exit_mask, rng, np_rng):
+    """Adds data-chips, implants, terminals, enemies, NPCs and obstacles to a box of rooms.
+
+    The box starts at origin and has the shape of exit_mask. rng is anything with the
+    random module's interface and np_rng anything with numpy's random(shape).
+    """
+    ox, oy, oz = origin
+    width, height, depth = exit_mask.shape
+    room_count = exit_mask.size
+
+    def random_room():
+        return grid[(ox + rng.randrange(width), oy + rng.randrange(height), oz + rng.randrange(depth))]
+
+    # Add some random items with logs
+    for _ in range(room_count // 10):
+        item_room = random_room()
+        log = rng.choice(CONTENT["item_logs"])
+        item = Item(content_template("items", "data_chip"), log)
+        item_room.add_item(item)
+
+    # Add some cybernetic implants
+    for _ in range(room_count // 15):
+        implant_room = random_room()
+        implant = CyberneticImplant(rng.choice(content_templates("cybernetic_implants")))
+        implant_room.add_item(implant)
+
+    # Add some terminals with lore and cybernetic terminals
+    for _ in range(room_count // 8):
+        terminal_room = random_room()
+        if not terminal_room.has_terminal:
+            if rng.random() < 0.3: # 30% chance for a CyberneticTerminal
+                lore = rng.choice(CONTENT["lore_messages"])
+                terminal = CyberneticTerminal(content_template("items", "cybernetic_terminal"), lore)
+            else:
+                lore = rng.choice(CONTENT["lore_messages"])
+                terminal = Terminal(content_template("items", "terminal"), lore)
+            terminal_room.add_item(terminal)
+
+    # Add some enemies
+    for _ in range(room_count // 6):
+        enemy_room = random_room()
+        if not enemy_room.enemies:
+            enemy = Enemy(rng.choice(content_templates("enemies")))
+            enemy_room.add_enemy(enemy)
+
+    # Add some NPCs
+    for _ in range(room_count // 10):
+        npc_room = random_room()
+        if not npc_room.has_npc: # Avoid placing multiple NPCs in one room
+            npc = NPC(rng.choice(content_templates("npcs")))
+            npc_room.add_item(npc)
+
+    # Add some obstacles, drawn for every exit of the region at once
+    for bit, direction in enumerate(DIRECTIONS):
+        blocked = ((exit_mask >> bit) & 1).astype(bool) & (np_rng.random(exit_mask.shape) < OBSTACLE_CHANCE)
+        for x, y, z in zip(*(axis.tolist() for axis in np.nonzero(blocked))):
+            obstacle = Obstacle(rng.choice(content_templates("obstacles")))
+            grid[(ox + x, oy + y, oz + z)].add_obstacle(direction, obstacle)
+
+def python_rng(seed_sequence):
+    """random.Random seeded from a numpy SeedSequence."""
+    return random.Random(int(seed_sequence.generate_state(1, np.uint64)[0]))
+
+def strata_seed_sequence(seed, strata_id):
+    """Independent RNG stream of one strata, derived from the master world seed."""
+    return np.random.SeedSequence(seed, spawn_key=(strata_id,))
+
+def generate_strata(seed, strata_id, num_stratas, strata_size=None, chunk_size=None):
+    """Generates one strata using only the RNG stream derived from (seed, strata_id)."""
+    seed_sequence = strata_seed_sequence(seed, strata_id)
+    rng = python_rng(seed_sequence)
+    np_rng = np.random.default_rng(seed_sequence)
+
+    # Randomly determine strata dimensions
+    if strata_size:
+        strata_width, strata_height, strata_depth = strata_size
+    else:
+        strata_width = rng.randint(5, 15)
+        strata_height = rng.randint(5, 15)
+        strata_depth = rng.randint(5, 15)
+
+    strata = Strata(strata_width, strata_height, strata_depth, strata_id)
+
+    if chunk_size:
+        strata.grid = ChunkedGrid(strata, rng.getrandbits(63), chunk_size, has_gbe=strata_id == num_stratas - 1)
+        return strata
 
+    # Draw zones and connections for the whole strata; rooms are built on first access
+    layout = generate_layout(strata_width, strata_height, strata_depth, np_rng)
+    grid = LayoutGrid(layout)
+    strata.grid = grid
+
+    # Place Strata Exits, on the top layer leading up and on the bottom layer leading down
+    possible_exits = [((x, y, strata_depth - 1), "up") for x in range(strata_width) for y in range(strata_height)]
+    possible_exits += [((x, y, 0), "down") for x in range(strata_width) for y in range(strata_height)]
+    num_exits = rng.randint(1, 3)
+    strata_exits = rng.sample(possible_exits, num_exits)
+
+    required_positions = [(0, 0, 0)] + [position for position, direction in strata_exits]
+
+    # The GBE is placed only once in the entire world, in the last strata
+    has_gbe = strata_id == num_stratas - 1
+    if has_gbe:
+        gbe_position = (rng.randrange(strata_width), rng.randrange(strata_height), rng.randrange(strata_depth))
+        required_positions.append(gbe_position)
+
+    # Make sure the starting room can reach every strata exit and the GBE before any room is built
+    strata.components = connect(layout, np_rng, required_positions)
+    for exit_position, exit_direction in strata_exits:
+        add_strata_exit(strata, grid[exit_position], exit_direction)
+
+    # Add the GBE
+    if has_gbe:
+        gbe = Item(content_template("items", "gbe"))
+        grid[gbe_position].add_item(gbe)
+
+    # Add game elements to rooms in the current strata
+    populate_region(grid, (0, 0, 0), layout.exit_mask, rng, np_rng)
+    grid.dirty.clear() # Nothing has changed since generation yet
+    return strata
+
+def new_world_seed():
+    return random.SystemRandom().getrandbits(63)
+
+def generate_world(num_stratas=1, strata_size=None, chunk_size=None, seed=None, workers=None):
+    """Creates a network of rooms with different zones and stratas.
+
+    Every strata draws from its own RNG stream derived from seed, so the same seed always
+    builds the same world however many worker processes generate it. workers defaults to
+    one process per CPU; with more than one, stratas are generated in a process pool.
+    strata_size fixes the (width, height, depth) of every strata instead of rolling them.
+    With chunk_size, stratas are split into chunks that are generated on first access.
+    """
+    if seed is None:
+        seed = new_world_seed()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = min(workers, num_stratas)
+
+    strata_ids = range(num_stratas)
+    arguments = (repeat(seed), strata_ids, repeat(num_stratas), repeat(strata_size), repeat(chunk_size))
+    if workers > 1 and not chunk_size:
+        from concurrent.futures import ProcessPoolExecutor # Only worth its import time here
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            all_stratas = list(executor.map(generate_strata, *arguments))
+    else:
+        all_stratas = list(map(generate_strata, *arguments))
+
+    # Set starting room for the first strata
+    starting_room = all_stratas[0].grid[(0, 0, 0)]
     return starting_room, all_stratas
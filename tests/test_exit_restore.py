@@ -0,0 +1,24 @@
+"""Every room of a loaded world has exactly the exits it was generated with."""
+import pytest
+from src.game import Game, Player
+from src.savegame import load_game, save_game
+from src.world import generate_world
+
+WORLD = {"num_stratas": 2, "strata_size": [12, 12, 12]}
+
+def exit_masks(all_stratas):
+    return {(strata.strata_id, position): room.exit_mask for strata in all_stratas for position, room in strata.grid.items()}
+
+@pytest.mark.parametrize("extension", [".json", ".sav"])
+def test_full_save_keeps_exit_graph(tmp_path, extension):
+    starting_room, all_stratas = generate_world(seed=1, workers=1, **WORLD)
+    game = Game(all_stratas=all_stratas, player=Player(starting_room, all_stratas[0]), max_resident_stratas=WORLD["num_stratas"])
+    generated = exit_masks(game.all_stratas) # Builds every room
+
+    file_path = tmp_path / ("world" + extension)
+    save_game(game, str(file_path))
+    loaded = load_game(str(file_path))
+    try:
+        assert exit_masks(loaded.all_stratas) == generated
+    finally:
+        loaded.all_stratas.close()
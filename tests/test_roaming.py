@@ -0,0 +1,35 @@
+"""Roaming enemies stay where they roamed to across a save and load, including those of
+Roamers that were replaced and saved by their rooms instead."""
+from src.colors import Colors
+from src.game import Game
+from src.savegame import load_game, save_game
+
+WORLD = {"num_stratas": 1, "strata_size": [12, 12, 12]}
+TURNS = 300
+
+def enemies(game):
+    grid = game.player.current_strata.grid
+    return sorted((position, enemy.name, enemy.health) for position, room in grid.items() for enemy in room.enemies)
+
+def played_game():
+    game = Game(seed=3, world_options=WORLD)
+    game.player.health = game.player.hunger = game.player.thirst = 10**6
+    game.pass_time(TURNS, [], Colors())
+    assert game.roamers.moved.any()
+    return game
+
+def saved_and_loaded(game, file_path):
+    save_game(game, file_path)
+    loaded = load_game(file_path)
+    loaded.all_stratas.close()
+    return loaded
+
+def test_roamers_saved(tmp_path):
+    game = played_game()
+    assert enemies(saved_and_loaded(game, str(tmp_path / "save.sav"))) == enemies(game)
+
+def test_released_roamers_saved_by_their_rooms(tmp_path):
+    game = played_game()
+    game.roamers.release()
+    game.roamers = None
+    assert enemies(saved_and_loaded(game, str(tmp_path / "save.sav"))) == enemies(game)
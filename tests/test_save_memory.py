@@ -0,0 +1,47 @@
+"""Streaming saves keep peak memory close to the live world size, measured with
+tracemalloc: saving allocates at most SAVE_OVERHEAD of the world on top of it, and
+loading peaks at most LOAD_OVERHEAD above the world it builds."""
+import gc
+import tracemalloc
+import pytest
+from src.game import Game, Player
+from src.savegame import load_game, save_game
+from src.world import generate_world
+
+# No more stratas than a StrataStore keeps resident, so the whole world stays in memory
+WORLD = {"num_stratas": 3, "strata_size": [16, 16, 16]}
+SAVE_OVERHEAD = 0.1
+LOAD_OVERHEAD = 0.25
+
+def full_game():
+    """A game saved in full, like one loaded from a save that predates seeds."""
+    starting_room, all_stratas = generate_world(seed=1, workers=1, **WORLD)
+    for strata in all_stratas:
+        list(strata.grid.values()) # Build every room
+    return Game(all_stratas=all_stratas, player=Player(starting_room, all_stratas[0]))
+
+def measure(function, *args):
+    """(peak bytes above the starting point, bytes still held afterwards, result)."""
+    gc.collect() # Rooms and grids reference each other, so dropped worlds wait for the collector
+    tracemalloc.reset_peak()
+    start = tracemalloc.get_traced_memory()[0]
+    result = function(*args)
+    current, peak = tracemalloc.get_traced_memory()
+    return peak - start, current - start, result
+
+@pytest.fixture
+def traced():
+    tracemalloc.start()
+    yield
+    tracemalloc.stop()
+
+def test_streaming_save_and_load_peaks(tmp_path, traced):
+    world_size, _, game = measure(full_game)
+    file_path = str(tmp_path / "save.sav")
+
+    save_peak, _, _ = measure(save_game, game, file_path)
+    assert save_peak <= SAVE_OVERHEAD * world_size
+
+    load_peak, loaded_size, loaded = measure(load_game, file_path)
+    loaded.all_stratas.close()
+    assert load_peak <= (1 + LOAD_OVERHEAD) * loaded_size